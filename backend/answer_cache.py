@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class AnswerCache:
+    """Semantic cache of final answers.
+
+    Entries are bucketed by corpus and metadata filter, so a hit can only come
+    from a question that searched exactly the same slice of the index. Within
+    a bucket, the closest cached question wins when its cosine similarity
+    clears the threshold. Buckets are dropped whenever the corpus index
+    version changes.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.97, max_entries: int = 1000, ttl_seconds: int = 3600):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (corpus, filter) -> {"index_version", "entries", "matrix"}
+        self._buckets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _bucket_key(corpus: str, metadata_filter: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+        return corpus, json.dumps(metadata_filter or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _get_bucket(self, key: Tuple[str, str], index_version: str) -> Dict[str, Any]:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket["index_version"] != index_version:
+            bucket = {"index_version": index_version, "entries": [], "matrix": None}
+            self._buckets[key] = bucket
+        return bucket
+
+    def _expire(self, bucket: Dict[str, Any], now: float) -> None:
+        live = [entry for entry in bucket["entries"] if now - entry["created_at"] <= self.ttl_seconds]
+        if len(live) != len(bucket["entries"]):
+            bucket["entries"] = live
+            bucket["matrix"] = None
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits max_entries."""
+        total = sum(len(bucket["entries"]) for bucket in self._buckets.values())
+        while total > self.max_entries:
+            bucket, entry = min(
+                ((bucket, entry) for bucket in self._buckets.values() for entry in bucket["entries"]),
+                key=lambda pair: pair[1]["last_used"],
+            )
+            bucket["entries"].remove(entry)
+            bucket["matrix"] = None
+            total -= 1
+
+    def lookup(
+        self,
+        corpus: str,
+        metadata_filter: Optional[Dict[str, Any]],
+        query_vector: Sequence[float],
+        index_version: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a near-identical question, or None."""
+        now = time.time()
+        with self._lock:
+            bucket = self._get_bucket(self._bucket_key(corpus, metadata_filter), index_version)
+            self._expire(bucket, now)
+            if not bucket["entries"]:
+                self.misses += 1
+                return None
+            if bucket["matrix"] is None:
+                bucket["matrix"] = np.stack([entry["vector"] for entry in bucket["entries"]])
+            scores = bucket["matrix"] @ self._unit(query_vector)
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+            entry = bucket["entries"][best]
+            entry["last_used"] = now
+            self.hits += 1
+            return entry["payload"]
+
+    def store(
+        self,
+        corpus: str,
+        metadata_filter: Optional[Dict[str, Any]],
+        query_vector: Sequence[float],
+        index_version: str,
+        payload: Dict[str, Any],
+    ) -> None:
+        """Cache the final payload for a question."""
+        now = time.time()
+        with self._lock:
+            bucket = self._get_bucket(self._bucket_key(corpus, metadata_filter), index_version)
+            bucket["entries"].append({
+                "vector": self._unit(query_vector),
+                "payload": payload,
+                "created_at": now,
+                "last_used": now,
+            })
+            bucket["matrix"] = None
+            self._evict()
+
+    def invalidate(self, corpus: Optional[str] = None) -> None:
+        """Drop cached answers for one corpus, or for every corpus."""
+        with self._lock:
+            for key in [key for key in self._buckets if corpus is None or key[0] == corpus]:
+                del self._buckets[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": sum(len(bucket["entries"]) for bucket in self._buckets.values()),
+            }
+
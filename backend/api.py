@@ -0,0 +1,176 @@
+from dotenv import load_dotenv
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import List, Dict, Any, AsyncIterator, Tuple
+load_dotenv()
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from backend import lazy
+from backend.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, QueueFullError
+from config import SERVICE_CONFIG
+
+# Headless ASGI service for the executive order and Project 2025 pipelines:
+#
+#     uvicorn backend.api:app --workers 4
+#     python -m backend.api --standins     # offline, against benchmarks/standins.py
+#
+# Requests carry their own chat history, so any replica can serve any request.
+
+# URL corpus name -> backend module serving it
+CORPORA = {
+    "eo": "backend.core",
+    "proj2025": "backend.projcore",
+}
+
+
+class Question(BaseModel):
+    query: str = Field(min_length=1)
+    chat_history: List[Tuple[str, str]] = Field(
+        default_factory=list, description='[role, text] pairs, oldest first; role is "human" or "ai"'
+    )
+
+
+class Batch(BaseModel):
+    questions: List[Question]
+
+
+def serialize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Make a pipeline event or final payload JSON-safe."""
+    serialized = dict(event)
+    if "source_documents" in serialized:
+        serialized["source_documents"] = [
+            {"page_content": doc.page_content, "metadata": doc.metadata} for doc in event["source_documents"]
+        ]
+    return serialized
+
+
+def _pipeline_stats() -> Dict[str, Any]:
+    """Scheduler and single-flight counters, once the pipeline has been imported."""
+    pipeline = sys.modules.get("backend.pipeline")
+    if pipeline is None:
+        return {}
+    return {"scheduler": pipeline.scheduler.stats(), "single_flight": pipeline.flights.stats()}
+
+
+async def _backend(corpus: str) -> ModuleType:
+    """Get the backend module for a corpus, waiting off the event loop for its warm-up."""
+    module_name = CORPORA.get(corpus)
+    if module_name is None:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus {corpus!r}; expected one of {sorted(CORPORA)}")
+    return await asyncio.to_thread(lazy.load, module_name)
+
+
+def create_app() -> FastAPI:
+    """Build the service. Each process has its own concurrency limit and starts warming both corpora."""
+    running = asyncio.Semaphore(SERVICE_CONFIG["MAX_CONCURRENCY"])
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        for module_name in CORPORA.values():
+            lazy.prewarm(module_name)
+        yield
+
+    app = FastAPI(title="Executive Order and Project 2025 Analyzer API", lifespan=lifespan)
+
+    async def answer(corpus: str, question: Question, priority: int) -> Dict[str, Any]:
+        backend = await _backend(corpus)
+        async with running:
+            try:
+                result = await backend.arun_llm(question.query, question.chat_history, priority=priority)
+            except QueueFullError as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        return serialize_event(result)
+
+    @app.get("/healthz")
+    async def healthz() -> Dict[str, str]:
+        """Liveness: the process is serving requests."""
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz() -> JSONResponse:
+        """Readiness: 200 once every corpus is warm, else 503 with each corpus's warm-up state."""
+        corpora = {}
+        for corpus, module_name in CORPORA.items():
+            status = lazy.status(module_name)
+            if status["state"] == "cold":
+                # The last warm-up failed; try again rather than stay unready forever.
+                lazy.prewarm(module_name)
+            corpora[corpus] = status
+        ready = all(status["state"] == "ready" for status in corpora.values())
+        return JSONResponse(
+            {"ready": ready, "corpora": corpora, **_pipeline_stats()},
+            status_code=200 if ready else 503,
+        )
+
+    @app.post("/v1/{corpus}/ask")
+    async def ask(corpus: str, question: Question) -> Dict[str, Any]:
+        """Answer one question."""
+        return await answer(corpus, question, PRIORITY_INTERACTIVE)
+
+    @app.post("/v1/{corpus}/stream")
+    async def stream(corpus: str, question: Question) -> StreamingResponse:
+        """Answer one question as server-sent events: queued, sources, token... then done (or error)."""
+        backend = await _backend(corpus)
+
+        async def events() -> AsyncIterator[str]:
+            async with running:
+                try:
+                    async for event in backend.astream_llm(question.query, question.chat_history):
+                        yield f"event: {event['type']}\ndata: {json.dumps(serialize_event(event), default=str)}\n\n"
+                except Exception as e:
+                    yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/{corpus}/batch")
+    async def batch(corpus: str, body: Batch) -> Dict[str, Any]:
+        """Answer up to MAX_BATCH_SIZE questions at batch priority; results keep the request order."""
+        if len(body.questions) > SERVICE_CONFIG["MAX_BATCH_SIZE"]:
+            raise HTTPException(
+                status_code=413, detail=f"At most {SERVICE_CONFIG['MAX_BATCH_SIZE']} questions per batch"
+            )
+        await _backend(corpus)
+        per_batch = asyncio.Semaphore(SERVICE_CONFIG["BATCH_CONCURRENCY"])
+
+        async def one(question: Question) -> Dict[str, Any]:
+            async with per_batch:
+                try:
+                    return await answer(corpus, question, PRIORITY_BATCH)
+                except HTTPException as e:
+                    return {"query": question.query, "error": e.detail}
+                except Exception as e:
+                    return {"query": question.query, "error": str(e)}
+
+        return {"results": await asyncio.gather(*(one(question) for question in body.questions))}
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the pipelines over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--standins", action="store_true", help="Serve the offline benchmark stand-ins, no API keys")
+    args = parser.parse_args()
+
+    if args.standins:
+        import tempfile
+        from benchmarks.run import install_standins
+
+        workdir = tempfile.mkdtemp(prefix="api-standins-")
+        install_standins(argparse.Namespace(
+            dimensions=256, latency_ms=20, tokens_per_second=400, orders=400, chunks_per_order=5, dense_only=False,
+        ), workdir)
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,257 @@
+from dotenv import load_dotenv
+import argparse
+import hashlib
+import json
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Set
+load_dotenv()
+
+from tqdm import tqdm
+
+from backend import core, projcore
+from backend.condense import condense_question, message_parts, needs_rephrase
+from backend.embedding_cache import CachedEmbeddings, normalize_query
+from backend.ingest import batched
+from backend.pipeline import run_pipeline, scheduled, scheduler
+from backend.registry import get_embeddings
+from backend.scheduler import PRIORITY_BATCH
+from backend.tokens import count_tokens
+from backend.tracing import summarize
+from config import BULK_CONFIG
+
+# Run a JSONL file of questions through the pipelines:
+#
+#     python -m backend.bulk questions.jsonl --output answers.jsonl --workers 8
+#
+# Each input line is {"corpus": "eo" | "proj2025", "query": ..., "chat_history": [[role, text], ...], "id": ...};
+# chat_history and id are optional. Answers are appended to the output as they finish, so an
+# interrupted run picks up where it stopped; questions that failed are retried.
+
+# Constants
+CORPORA = {"eo": core, "proj2025": projcore}
+
+
+# Input and resume
+
+def question_id(question: Dict[str, Any]) -> str:
+    """Stable id for a question without one: a hash of its corpus, query and history."""
+    key = json.dumps([question["corpus"], question["query"], question.get("chat_history", [])])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """Read and validate questions from a JSONL file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            question = json.loads(line)
+            if question.get("corpus") not in CORPORA or not question.get("query"):
+                raise ValueError(f"{path}:{line_number}: need a query and a corpus in {sorted(CORPORA)}")
+            question["chat_history"] = [tuple(message) for message in question.get("chat_history", [])]
+            question.setdefault("id", question_id(question))
+            yield question
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already answered in an earlier run's output."""
+    done = set()
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if "error" not in record:
+                    done.add(record["id"])
+    return done
+
+
+def end_partial_line(output_path: str) -> None:
+    """Terminate a last line an interrupted run cut short, so new records start on their own line."""
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+# Stages
+
+def metadata_filter(question: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The metadata filter the corpus's run_llm would apply."""
+    corpus = CORPORA[question["corpus"]].CORPUS
+    return corpus["filters"](question["query"]) if corpus.get("filters") else None
+
+
+def _record(question: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": question["id"], "corpus": question["corpus"], "query": question["query"]}
+
+
+def condense(question: Dict[str, Any]) -> Optional[str]:
+    """Work out the standalone question that will be embedded and answered.
+
+    A rephrase call waits for the scheduler at batch priority. The answer
+    run is handed the question, so it never condenses again. Returns the
+    error message if condensing failed, else None.
+    """
+    try:
+        question["filter"] = metadata_filter(question)
+        rephrase = needs_rephrase(question["query"], question["chat_history"], question["filter"])
+        input_tokens = count_tokens(question["query"]) + sum(
+            count_tokens(message_parts(message)[1]) for message in question["chat_history"]
+        )
+        # The standalone question is never longer than the follow-up and history it was written from.
+        with scheduled(1, 2 * input_tokens, PRIORITY_BATCH) if rephrase else nullcontext() as ticket:
+            question["standalone"], question["condense_path"] = condense_question(question["query"], question["chat_history"], question["filter"])
+            if ticket is not None:
+                scheduler.settle(ticket, 1, input_tokens + count_tokens(question["standalone"]))
+    except Exception as e:
+        print(f"Error condensing {question['id']}: {str(e)}")
+        return str(e)
+    return None
+
+
+def prefill_embeddings(questions: List[Dict[str, Any]], batch_size: int) -> Dict[str, int]:
+    """Embed every distinct standalone question in batches and seed the query embedding cache.
+
+    The answer runs then find their query vectors cached instead of making
+    one embedding call per question. Each batch waits for the scheduler at
+    batch priority; a batch that fails is left to the answer runs to embed.
+    """
+    stats = {"questions": len(questions), "distinct": 0, "cached": 0, "embedded": 0, "batches": 0}
+    by_model: Dict[str, Dict[str, str]] = {}
+    for question in questions:
+        model = CORPORA[question["corpus"]].CORPUS["embedding_model"]
+        by_model.setdefault(model, {}).setdefault(normalize_query(question["standalone"]), question["standalone"])
+
+    for model, texts in by_model.items():
+        embeddings = get_embeddings(model)
+        stats["distinct"] += len(texts)
+        if not isinstance(embeddings, CachedEmbeddings):
+            print("Embedding cache is disabled; questions will be embedded one at a time")
+            continue
+        missing = [text for text in texts.values() if embeddings.lookup(text) is None]
+        stats["cached"] += len(texts) - len(missing)
+        for batch in batched(missing, batch_size):
+            try:
+                with scheduled(1, sum(count_tokens(text) for text in batch), PRIORITY_BATCH):
+                    vectors = embeddings.embed_documents(batch)
+            except Exception as e:
+                print(f"Error embedding a batch of {len(batch)} questions: {str(e)}")
+                continue
+            for text, vector in zip(batch, vectors):
+                embeddings.store(text, vector)
+            stats["embedded"] += len(batch)
+            stats["batches"] += 1
+    return stats
+
+
+def answer(question: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one question at batch priority and build its output record."""
+    record = _record(question)
+    try:
+        result = run_pipeline(
+            CORPORA[question["corpus"]].CORPUS, question["query"], question["chat_history"], question["filter"],
+            priority=PRIORITY_BATCH, standalone=question["standalone"],
+        )
+    except Exception as e:
+        print(f"Error answering {question['id']}: {str(e)}")
+        record["error"] = str(e)
+        return record
+    trace = result["trace"]
+    record.update({
+        "result": result["result"],
+        "sources": [doc.metadata for doc in result["source_documents"]],
+        "route": result["retrieval_route"],
+        "condense_path": question["condense_path"],
+        "total_ms": trace["total_ms"],
+        "timings_ms": {span["name"]: span["duration_ms"] for span in trace["spans"]},
+    })
+    return record
+
+
+def run_bulk(input_path: str, output_path: str, workers: int, embed_batch_size: int) -> Dict[str, Any]:
+    """Answer every question not yet in the output and return run statistics.
+
+    Questions repeating an earlier id in the input are answered once. A
+    question that fails at any stage gets an error record and is retried
+    by the next run.
+    """
+    done = completed_ids(output_path)
+    questions, seen = [], set(done)
+    for question in read_questions(input_path):
+        if question["id"] not in seen:
+            seen.add(question["id"])
+            questions.append(question)
+    stats: Dict[str, Any] = {"skipped": len(done), "answered": 0, "failed": 0}
+    if not questions:
+        return stats
+
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    end_partial_line(output_path)
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(output_path, "a", encoding="utf-8") as f:
+        errors = list(tqdm(pool.map(condense, questions), total=len(questions), desc="Condensing", unit="question"))
+        for question, error in zip(questions, errors):
+            if error is not None:
+                f.write(json.dumps(dict(_record(question), error=error)) + "\n")
+                stats["failed"] += 1
+        f.flush()
+        questions = [question for question, error in zip(questions, errors) if error is None]
+        stats["condense_seconds"] = round(time.perf_counter() - start, 3)
+
+        embed_start = time.perf_counter()
+        stats["embeddings"] = prefill_embeddings(questions, embed_batch_size)
+        stats["embed_seconds"] = round(time.perf_counter() - embed_start, 3)
+
+        answer_start = time.perf_counter()
+        timings: Dict[str, List[float]] = {}
+        futures = [pool.submit(answer, question) for question in questions]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Answering", unit="question"):
+            record = future.result()
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            if "error" in record:
+                stats["failed"] += 1
+                continue
+            stats["answered"] += 1
+            timings.setdefault("total", []).append(record["total_ms"])
+            for name, duration in record["timings_ms"].items():
+                timings.setdefault(name, []).append(duration)
+        stats["answer_seconds"] = round(time.perf_counter() - answer_start, 3)
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["questions_per_minute"] = round(stats["answered"] / elapsed * 60, 1)
+    stats["stages"] = summarize(timings)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with bounded concurrency.")
+    parser.add_argument("input", help="JSONL file of {corpus, query, chat_history?, id?} questions")
+    parser.add_argument("--output", required=True, help="JSONL file answers are appended to; reruns resume from it")
+    parser.add_argument("--workers", type=int, default=BULK_CONFIG["WORKERS"])
+    parser.add_argument("--embed-batch-size", type=int, default=BULK_CONFIG["EMBED_BATCH_SIZE"])
+    args = parser.parse_args()
+
+    result = run_bulk(args.input, args.output, args.workers, args.embed_batch_size)
+    if result["skipped"]:
+        print(f"Skipped {result['skipped']} questions already answered in {args.output}")
+    if "elapsed_seconds" not in result:
+        print("Nothing left to answer")
+    else:
+        embeddings = result["embeddings"]
+        print(f"Answered {result['answered']} questions ({result['failed']} failed) in {result['elapsed_seconds']:.1f}s: "
+              f"{result['questions_per_minute']:.1f} questions/minute")
+        print(f"Embeddings: {embeddings['distinct']} distinct of {embeddings['questions']} questions, "
+              f"{embeddings['cached']} already cached, {embeddings['embedded']} embedded in {embeddings['batches']} batches")
+        print(f"Stages: condense {result['condense_seconds']:.1f}s, embed {result['embed_seconds']:.1f}s, "
+              f"answer {result['answer_seconds']:.1f}s")
+        for name, stats in result["stages"].items():
+            print(f"  {name:<14} n={stats['count']:<6} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms")
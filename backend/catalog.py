@@ -0,0 +1,424 @@
+from dotenv import load_dotenv
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+load_dotenv()
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from config import CATALOG_CONFIG, QUERY_CONFIG
+
+# Local SQLite catalog of executive orders: one row per order (number,
+# president, signing date, title, URL and every category flag) plus the
+# text of its chunks. Build it for an existing index with
+#
+#     python -m backend.catalog
+#
+# backend.ingest keeps it current afterwards. The app copies it into memory
+# at startup, resolves metadata filters to candidate orders before the vector
+# search, and hydrates sources from it so the index can return ids only.
+# Filters are only narrowed to candidate orders once a build has found every
+# vector in the index catalogued; until then orders it missed would vanish.
+
+# Constants
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    number INTEGER PRIMARY KEY,
+    president TEXT,
+    signing_date TEXT,
+    signing_year INTEGER,
+    title TEXT,
+    html_url TEXT,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_president_year ON orders (president, signing_year);
+CREATE INDEX IF NOT EXISTS orders_year ON orders (signing_year);
+CREATE TABLE IF NOT EXISTS order_flags (
+    field TEXT NOT NULL,
+    value,
+    number INTEGER NOT NULL,
+    PRIMARY KEY (field, value, number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    number INTEGER NOT NULL,
+    chunk_index INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_number ON chunks (number);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Filter fields stored as order columns; every other scalar field is a flag row.
+COLUMNS = {
+    "executive_order_number": "number",
+    "president": "president",
+    "signing_date": "signing_date",
+    QUERY_CONFIG["YEAR_FIELD"]: "signing_year",
+    "title": "title",
+    "html_url": "html_url",
+}
+_CHUNK_FIELDS = {"chunk_index", "text"}
+_COMPARISONS = {"$eq": "=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_NEGATIONS = {"$ne": "$eq", "$nin": "$in"}
+
+
+def _scalar(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool))
+
+
+def _signing_year(metadata: Dict[str, Any]) -> Optional[int]:
+    """The signing year, from the signing date or a numeric year field on the chunks."""
+    signing_date = str(metadata.get("signing_date") or "")
+    if signing_date[:4].isdigit():
+        return int(signing_date[:4])
+    year = metadata.get(QUERY_CONFIG["YEAR_FIELD"])
+    return int(year) if isinstance(year, (int, float)) and not isinstance(year, bool) else None
+
+
+class OrderCatalog:
+    """SQLite catalog of executive order metadata and chunk text.
+
+    ``load`` copies the file into an in-memory database for serving;
+    ``open`` works on the file itself for ingestion. Filters use the
+    Pinecone syntax ($eq, $ne, $gt, $gte, $lt, $lte, $in, $nin).
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._connection.executescript(SCHEMA)
+        self._flag_fields = {row[0] for row in self._connection.execute("SELECT DISTINCT field FROM order_flags")}
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        self._complete = row is not None and row[0] == "1"
+
+    @classmethod
+    def open(cls, path: str) -> "OrderCatalog":
+        """Open (creating if needed) the catalog file at path for writing."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return cls(sqlite3.connect(path, check_same_thread=False))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["OrderCatalog"]:
+        """Copy the catalog at path into memory, or None if none has been built."""
+        if not os.path.exists(path):
+            return None
+        memory = sqlite3.connect(":memory:", check_same_thread=False)
+        disk = sqlite3.connect(path)
+        try:
+            disk.backup(memory)
+        finally:
+            disk.close()
+        return cls(memory)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    @property
+    def complete(self) -> bool:
+        """Whether the last build found every vector in the index catalogued."""
+        return self._complete
+
+    def chunk_count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    # Writing
+
+    def upsert_order(self, number: int, documents: List[Document]) -> None:
+        """Replace an order's row, flags and chunks with those of its complete chunk list."""
+        metadata: Dict[str, Any] = {}
+        for doc in documents:
+            for field, value in doc.metadata.items():
+                if field not in _CHUNK_FIELDS and _scalar(value):
+                    metadata.setdefault(field, value)
+        metadata["executive_order_number"] = number
+        flags = [(field, value, number) for field, value in metadata.items() if field not in COLUMNS]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM order_flags WHERE number = ?", (number,))
+            self._connection.execute("DELETE FROM chunks WHERE number = ?", (number,))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    number, metadata.get("president"), metadata.get("signing_date"), _signing_year(metadata),
+                    metadata.get("title"), metadata.get("html_url"), json.dumps(metadata),
+                ),
+            )
+            self._connection.executemany("INSERT OR REPLACE INTO order_flags VALUES (?, ?, ?)", flags)
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)",
+                [(doc.id, number, doc.metadata.get("chunk_index"), doc.page_content) for doc in documents if doc.id],
+            )
+            self._flag_fields.update(field for field, _, _ in flags)
+
+    def set_complete(self, complete: bool) -> None:
+        """Record whether the catalog covers every vector in the index."""
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('complete', ?)", ("1" if complete else "0",))
+            self._complete = complete
+
+    def remove_orders(self, keep: Iterable[int]) -> int:
+        """Delete every order not in keep; returns how many were removed."""
+        keep = set(keep)
+        with self._lock, self._connection:
+            stale = [row[0] for row in self._connection.execute("SELECT number FROM orders") if row[0] not in keep]
+            for table in ("orders", "order_flags", "chunks"):
+                self._connection.executemany(f"DELETE FROM {table} WHERE number = ?", [(number,) for number in stale])
+        return len(stale)
+
+    # Filters
+
+    def _condition(self, field: str, condition: Any) -> Optional[Tuple[str, List[Any]]]:
+        """SQL for one field's condition, or None if the catalog cannot evaluate it."""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        column = COLUMNS.get(field)
+        if column is None and field not in self._flag_fields:
+            return None
+        clauses, params = [], []
+        for operator, value in condition.items():
+            negated = operator in _NEGATIONS
+            operator = _NEGATIONS.get(operator, operator)
+            if operator == "$in":
+                values = list(value)
+                test = f"{{}} IN ({', '.join('?' for _ in values)})" if values else "0"
+            elif operator in _COMPARISONS:
+                values = [value]
+                test = f"{{}} {_COMPARISONS[operator]} ?"
+            else:
+                return None
+            if column is not None:
+                clauses.append(f"NOT ({test.format(column)})" if negated else test.format(column))
+                params.extend(values)
+            else:
+                # Negations also match orders without the flag, as they do in the index.
+                membership = "NOT IN" if negated else "IN"
+                clauses.append(f"number {membership} (SELECT number FROM order_flags WHERE field = ? AND {test.format('value')})")
+                params.extend([field, *values])
+        return " AND ".join(clauses) or "1", params
+
+    def resolve(self, metadata_filter: Dict[str, Any]) -> Optional[List[int]]:
+        """The order numbers matching a filter, or None if it uses fields or operators the catalog lacks."""
+        clauses, params = [], []
+        for field, condition in metadata_filter.items():
+            resolved = self._condition(field, condition)
+            if resolved is None:
+                return None
+            clauses.append(resolved[0])
+            params.extend(resolved[1])
+        sql = "SELECT number FROM orders" + (f" WHERE {' AND '.join(clauses)}" if clauses else "") + " ORDER BY number"
+        with self._lock:
+            return [row[0] for row in self._connection.execute(sql, params)]
+
+    # Hydration
+
+    def order_metadata(self, numbers: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Order-level metadata by number, for the numbers in the catalog."""
+        numbers = list(numbers)
+        if not numbers:
+            return {}
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT number, metadata FROM orders WHERE number IN ({', '.join('?' for _ in numbers)})", numbers
+            ).fetchall()
+        return {number: json.loads(metadata) for number, metadata in rows}
+
+    def hydrate_ids(self, ids: List[str]) -> Dict[str, Document]:
+        """Rebuild chunks by id from the catalog; ids it does not hold are left out."""
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT chunks.id, chunks.chunk_index, chunks.text, orders.metadata FROM chunks "
+                f"JOIN orders ON orders.number = chunks.number WHERE chunks.id IN ({', '.join('?' for _ in ids)})",
+                ids,
+            ).fetchall()
+        return {
+            chunk_id: Document(id=chunk_id, page_content=text, metadata=dict(json.loads(metadata), chunk_index=chunk_index))
+            for chunk_id, chunk_index, text, metadata in rows
+        }
+
+    def hydrate(self, documents: List[Document]) -> List[Document]:
+        """Fill in each executive order chunk's metadata from its catalog row."""
+        numbers = {
+            int(doc.metadata["executive_order_number"]) for doc in documents
+            if isinstance(doc.metadata.get("executive_order_number"), (int, float))
+        }
+        orders = self.order_metadata(numbers)
+        if not orders:
+            return documents
+        hydrated = []
+        for doc in documents:
+            number = doc.metadata.get("executive_order_number")
+            order = orders.get(int(number)) if isinstance(number, (int, float)) else None
+            hydrated.append(
+                doc if order is None else Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, **order})
+            )
+        return hydrated
+
+
+def narrow_filter(catalog: Optional[OrderCatalog], metadata_filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Rewrite a metadata filter for the vector search.
+
+    With a catalog that covers the whole index, the filter becomes the
+    candidate order numbers it resolves to, so facts the vectors do not
+    carry (like the signing year) still narrow the search. Otherwise
+    catalog-only fields are dropped.
+    """
+    if not metadata_filter:
+        return metadata_filter
+    numbers = _candidates(catalog, metadata_filter)
+    if numbers is None:
+        return _vector_conditions(metadata_filter) or None
+    return {"executive_order_number": {"$in": numbers}}
+
+
+def dropped_conditions(catalog: Optional[OrderCatalog], metadata_filter: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The conditions narrow_filter leaves out of the search, because only a complete catalog can apply them."""
+    if not metadata_filter or _candidates(catalog, metadata_filter) is not None:
+        return {}
+    kept = _vector_conditions(metadata_filter)
+    return {field: condition for field, condition in metadata_filter.items() if field not in kept}
+
+
+def _candidates(catalog: Optional[OrderCatalog], metadata_filter: Dict[str, Any]) -> Optional[List[int]]:
+    """The order numbers a filter resolves to, if a complete catalog can resolve it to few enough."""
+    numbers = catalog.resolve(metadata_filter) if catalog is not None and catalog.complete else None
+    return numbers if numbers is not None and len(numbers) <= CATALOG_CONFIG["MAX_CANDIDATES"] else None
+
+
+def _vector_conditions(metadata_filter: Dict[str, Any]) -> Dict[str, Any]:
+    """The conditions on fields the vectors themselves carry."""
+    if QUERY_CONFIG["YEAR_ON_VECTORS"]:
+        return dict(metadata_filter)
+    return {field: condition for field, condition in metadata_filter.items() if field != QUERY_CONFIG["YEAR_FIELD"]}
+
+
+def matches_nothing(metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """Whether a narrowed filter has no candidate orders, so the search can be skipped."""
+    return bool(metadata_filter) and metadata_filter.get("executive_order_number") == {"$in": []}
+
+
+class MinimalPayloadStore(VectorStore):
+    """Search a Pinecone store for ids and scores only, hydrating chunks from the catalog.
+
+    Matches the catalog does not hold yet are fetched from the index in
+    full. Writes and deletes are passed through to the wrapped store.
+    """
+
+    def __init__(self, store: Any, catalog: OrderCatalog):
+        self.store = store
+        self.catalog = catalog
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.store.embeddings
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        return self.store.add_texts(texts, metadatas, **kwargs)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        return self.store.delete(ids, **kwargs)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        catalog: OrderCatalog,
+        **kwargs: Any,
+    ) -> "MinimalPayloadStore":
+        from langchain_pinecone import PineconeVectorStore
+
+        return cls(PineconeVectorStore.from_texts(texts, embedding, metadatas, **kwargs), catalog)
+
+    def _fetch(self, ids: List[str]) -> Dict[str, Document]:
+        documents = {}
+        for vector_id, vector in self.store.index.fetch(ids=ids, namespace=self.store._namespace).vectors.items():
+            metadata = dict(vector.metadata or {})
+            documents[vector_id] = Document(id=vector_id, page_content=metadata.pop(self.store._text_key, ""), metadata=metadata)
+        return documents
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        results = self.store.index.query(
+            vector=embedding, top_k=k, filter=filter, include_metadata=False, namespace=self.store._namespace,
+        )
+        matches = [(match["id"], match["score"]) for match in results["matches"]]
+        documents = self.catalog.hydrate_ids([vector_id for vector_id, _ in matches])
+        missing = [vector_id for vector_id, _ in matches if vector_id not in documents]
+        if missing:
+            documents.update({doc.id: doc for doc in self.catalog.hydrate(list(self._fetch(missing).values()))})
+        return [(documents[vector_id], score) for vector_id, score in matches if vector_id in documents]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+
+def build_catalog(corpus: Dict[str, Any], path: str) -> Dict[str, int]:
+    """Catalog every order in a corpus's index, dropping orders no longer in it.
+
+    Orders are found by their ids, so vectors outside the eo-<n>#<i> scheme
+    are not catalogued; the catalog is only marked complete if its chunks
+    account for every vector in the index.
+    """
+    from tqdm import tqdm
+    from backend.order_lookup import index_size, list_order_numbers, load_order
+
+    catalog = OrderCatalog.open(path)
+    stats = {"orders": 0, "missing": 0, "removed": 0, "complete": 0}
+    try:
+        numbers = list_order_numbers(corpus)
+        for number in tqdm(numbers, desc="Cataloging", unit="order"):
+            documents, _ = load_order(corpus, number)
+            if documents is None:
+                stats["missing"] += 1
+                continue
+            catalog.upsert_order(number, documents)
+            stats["orders"] += 1
+        stats["removed"] = catalog.remove_orders(numbers)
+        catalog.set_complete(stats["missing"] == 0 and catalog.chunk_count() >= index_size(corpus))
+        stats["complete"] = int(catalog.complete)
+    finally:
+        catalog.close()
+    return stats
+
+
+if __name__ == "__main__":
+    from backend.core import CORPUS
+    from backend.registry import catalog_path
+
+    parser = argparse.ArgumentParser(description="Build the executive order metadata catalog from the index.")
+    parser.add_argument("--path", help="Catalog file (defaults to the one the app loads)")
+    args = parser.parse_args()
+
+    path = args.path or catalog_path(CORPUS["index_name"])
+    result = build_catalog(CORPUS, path)
+    print(f"Cataloged {result['orders']} orders in {path} ({result['missing']} not found, {result['removed']} removed)"
+          + ("" if result["complete"] else "; the index holds vectors outside the catalog, so filters will not be narrowed"))
@@ -1,28 +1,106 @@
 from dotenv import load_dotenv
-from langchain.chains.history_aware_retriever import create_history_aware_retriever
-from langchain.chains.retrieval import create_retrieval_chain
+import asyncio
 import re
-from typing import List, Dict, Any, Optional
+import time
+from typing import Awaitable, List, Dict, Any, Optional, Union
 load_dotenv()
 
-from langchain import hub
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_pinecone import PineconeVectorStore
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.documents import Document
+from backend import core, projcore
+from backend.catalog import matches_nothing, narrow_filter
 from backend.core import create_metadata_filters
+from backend.registry import get_catalog, get_embeddings, get_event_loop, get_vectorstore
+from config import API_CONFIG
 
 
-PROJECT_2025_INDEX_NAME = "project2025"
-EXECUTIVE_ORDERS_INDEX_NAME = "executiveorderscleantxt"
+PROJECT_2025_INDEX_NAME = projcore.INDEX_NAME
+EXECUTIVE_ORDERS_INDEX_NAME = core.INDEX_NAME
 TOP_K_RESULTS = 5 # You can adjust this number
+EMBED_ATTEMPTS = 2
 
 
-embeddings_proj25 = OpenAIEmbeddings(model="text-embedding-3-small")
-docsearch_proj25 = PineconeVectorStore(index_name=PROJECT_2025_INDEX_NAME, embedding=embeddings_proj25)
+embeddings_proj25 = get_embeddings(projcore.EMBEDDING_MODEL)
+docsearch_proj25 = get_vectorstore(PROJECT_2025_INDEX_NAME, projcore.EMBEDDING_MODEL)
 
-embeddings_eo = OpenAIEmbeddings(model="text-embedding-3-large")
-docsearch_eo = PineconeVectorStore(index_name=EXECUTIVE_ORDERS_INDEX_NAME, embedding=embeddings_eo)
+embeddings_eo = get_embeddings(core.EMBEDDING_MODEL)
+docsearch_eo = get_vectorstore(EXECUTIVE_ORDERS_INDEX_NAME, core.EMBEDDING_MODEL)
+
+
+async def _with_timeout(awaitable: Awaitable[Any], timeout: float, label: str, default: Any) -> Any:
+    """Await with a timeout, returning default instead of failing the whole question."""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        print(f"Timed out after {timeout}s: {label}")
+        return default
+
+
+async def _aembed(model: str, query: str, timeout: float) -> List[float]:
+    """Embed the query, retrying a timed-out attempt; neither search can run without the vector."""
+    for attempt in range(1, EMBED_ATTEMPTS + 1):
+        try:
+            return await asyncio.wait_for(get_embeddings(model).aembed_query(query), timeout)
+        except asyncio.TimeoutError:
+            print(f"Timed out after {timeout}s embedding the question with {model} (attempt {attempt} of {EMBED_ATTEMPTS})")
+    raise TimeoutError(f"Embedding the question timed out after {EMBED_ATTEMPTS} attempts; please try again.")
+
+
+async def _asearch(docsearch: Any, vector: List[float], k: int, metadata_filter: Optional[Dict[str, Any]]) -> List[Document]:
+    """Search a store by a precomputed vector without blocking the event loop."""
+    results = await asyncio.to_thread(
+        docsearch.similarity_search_by_vector_with_score, vector, k=k, filter=metadata_filter or None
+    )
+    return [doc for doc, _ in results]
+
+
+async def aretrieve_combined(
+    query: str,
+    k: Union[int, Dict[str, int]] = TOP_K_RESULTS,
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    timeout: float = API_CONFIG["REQUEST_TIMEOUT_SECONDS"],
+) -> Dict[str, List[Document]]:
+    """Retrieve from the Project 2025 and executive order indexes concurrently.
+
+    k is one count for both indexes or a count per index name. The
+    metadata filter applies to the executive order index only. The query
+    is embedded once per embedding model, and both searches run with
+    asyncio.gather, so the question costs the slower of the two rather
+    than their sum. A search that times out contributes no documents; an
+    embedding that still times out after a retry raises TimeoutError.
+    """
+    counts = k if isinstance(k, dict) else {PROJECT_2025_INDEX_NAME: k, EXECUTIVE_ORDERS_INDEX_NAME: k}
+    catalog = get_catalog(EXECUTIVE_ORDERS_INDEX_NAME)
+    metadata_filter = narrow_filter(catalog, metadata_filter)
+    models = sorted({projcore.EMBEDDING_MODEL, core.EMBEDDING_MODEL})
+    vectors = dict(zip(models, await asyncio.gather(*[
+        _aembed(model, query, timeout) for model in models
+    ])))
+
+    project_2025_docs, executive_order_docs = await asyncio.gather(
+        _with_timeout(
+            _asearch(docsearch_proj25, vectors[projcore.EMBEDDING_MODEL], counts[PROJECT_2025_INDEX_NAME], None),
+            timeout, PROJECT_2025_INDEX_NAME, [],
+        ),
+        _with_timeout(
+            _asearch(docsearch_eo, vectors[core.EMBEDDING_MODEL], counts[EXECUTIVE_ORDERS_INDEX_NAME], metadata_filter),
+            timeout, EXECUTIVE_ORDERS_INDEX_NAME, [],
+        ) if not matches_nothing(metadata_filter) else asyncio.sleep(0, []),
+    )
+    if catalog is not None:
+        executive_order_docs = catalog.hydrate(executive_order_docs)
+    return {PROJECT_2025_INDEX_NAME: project_2025_docs, EXECUTIVE_ORDERS_INDEX_NAME: executive_order_docs}
+
+
+def retrieve_combined(
+    query: str,
+    k: Union[int, Dict[str, int]] = TOP_K_RESULTS,
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    timeout: float = API_CONFIG["REQUEST_TIMEOUT_SECONDS"],
+) -> Dict[str, List[Document]]:
+    """Blocking variant of aretrieve_combined, run on the registry's long-lived event loop."""
+    return asyncio.run_coroutine_threadsafe(
+        aretrieve_combined(query, k, metadata_filter, timeout), get_event_loop()
+    ).result()
 
 if __name__ == "__main__":
     query_str = "Can you find any proposals within Project 2025 that Trump could affect the balance of power between the federal government and states?"
@@ -31,13 +109,14 @@ if __name__ == "__main__":
 
     print(f"Connected to Pinecone vector stores: {PROJECT_2025_INDEX_NAME} and {EXECUTIVE_ORDERS_INDEX_NAME}")
 
-    # --- Query Project 2025 Database ---
-    project_2025_retriever = docsearch_proj25.as_retriever(
-        search_kwargs={"k": TOP_K_RESULTS}
-    )
-    project_2025_docs: list[Document] = project_2025_retriever.invoke(query_str)
+    # --- Query both databases concurrently ---
+    start = time.perf_counter()
+    combined_docs = retrieve_combined(query_str, metadata_filter=res)
+    project_2025_docs: list[Document] = combined_docs[PROJECT_2025_INDEX_NAME]
+    executive_order_docs: list[Document] = combined_docs[EXECUTIVE_ORDERS_INDEX_NAME]
 
-    print(f"Retrieved {len(project_2025_docs)} documents from Project 2025.")
+    print(f"Retrieved {len(project_2025_docs)} documents from Project 2025 and "
+          f"{len(executive_order_docs)} executive order documents in {time.perf_counter() - start:.2f}s.")
 
     project_2025_contexts = []
     for doc in project_2025_docs:
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.registry import get_rephrase_chain
+from config import CONDENSE_CONFIG
+
+# Condensation paths reported by condense_question
+PATH_NO_HISTORY = "no_history"
+PATH_SELF_CONTAINED = "self_contained"
+PATH_CACHED = "cached"
+PATH_REPHRASED = "rephrased"
+PATH_PROVIDED = "provided"  # the caller passed the standalone question in
+
+_rephrased: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def message_parts(message: Any) -> Tuple[str, str]:
+    """Get (role, text) from a ("human", text) tuple or a LangChain message."""
+    if isinstance(message, (tuple, list)):
+        return str(message[0]), str(message[1])
+    return getattr(message, "type", ""), str(getattr(message, "content", message))
+
+
+def history_fingerprint(chat_history: List[Any]) -> str:
+    """Hash a chat history so identical conversations share a key."""
+    parts = [message_parts(message) for message in chat_history]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def is_self_contained(metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """A question that names an executive order number needs no history to be understood."""
+    return bool(metadata_filter) and "executive_order_number" in metadata_filter
+
+
+def _cache_key(query: str, chat_history: List[Any]) -> str:
+    return f"{history_fingerprint(chat_history)}:{query}"
+
+
+def _shortcut(query: str, chat_history: List[Any], metadata_filter: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+    """Return (question, path) when no LLM call is needed, else None."""
+    if not chat_history:
+        return query, PATH_NO_HISTORY
+    if is_self_contained(metadata_filter):
+        return query, PATH_SELF_CONTAINED
+
+    with _lock:
+        key = _cache_key(query, chat_history)
+        question = _rephrased.get(key)
+        if question is not None:
+            _rephrased.move_to_end(key)
+            return question, PATH_CACHED
+    return None
+
+
+def needs_rephrase(query: str, chat_history: List[Any], metadata_filter: Optional[Dict[str, Any]] = None) -> bool:
+    """Whether condensing the query will make an LLM call."""
+    return _shortcut(query, chat_history, metadata_filter) is None
+
+
+def _remember(query: str, chat_history: List[Any], question: str) -> None:
+    with _lock:
+        _rephrased[_cache_key(query, chat_history)] = question
+        while len(_rephrased) > CONDENSE_CONFIG["CACHE_SIZE"]:
+            _rephrased.popitem(last=False)
+
+
+def condense_question(
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, str]:
+    """Turn a follow-up into a standalone question, skipping the LLM call when possible.
+
+    Returns the question to retrieve with and which path produced it.
+    """
+    shortcut = _shortcut(query, chat_history, metadata_filter)
+    if shortcut is not None:
+        return shortcut
+
+    question = get_rephrase_chain(model=CONDENSE_CONFIG["MODEL"]).invoke(
+        {"input": query, "chat_history": chat_history}
+    )
+    _remember(query, chat_history, question)
+    return question, PATH_REPHRASED
+
+
+def clear_condense_cache() -> None:
+    """Forget every remembered rephrase."""
+    with _lock:
+        _rephrased.clear()
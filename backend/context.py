@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+from backend.fusion import content_key, source_key
+from backend.lexical_index import tokenize
+from backend.tokens import count_tokens
+from config import CONTEXT_CONFIG, INGEST_CONFIG
+
+
+def dedupe(documents: List[Document]) -> List[Document]:
+    """Drop chunks whose text was already retrieved, keeping the best-ranked copy."""
+    seen: Set[str] = set()
+    unique = []
+    for doc in documents:
+        key = content_key(doc)
+        if key not in seen:
+            seen.add(key)
+            unique.append(doc)
+    return unique
+
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two token sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def mmr_order(documents: List[Document], mmr_lambda: float = CONTEXT_CONFIG["MMR_LAMBDA"]) -> List[Document]:
+    """Reorder ranked chunks by maximal marginal relevance.
+
+    Relevance is the retrieval rank and redundancy the token overlap with
+    chunks already chosen, so no extra embedding calls are needed.
+    """
+    count = len(documents)
+    token_sets = [set(tokenize(doc.page_content)) for doc in documents]
+    redundancy = [0.0] * count
+    remaining = list(range(count))
+    ordered = []
+    while remaining:
+        best = max(remaining, key=lambda i: mmr_lambda * (1 - i / count) - (1 - mmr_lambda) * redundancy[i])
+        remaining.remove(best)
+        ordered.append(documents[best])
+        for i in remaining:
+            redundancy[i] = max(redundancy[i], _similarity(token_sets[i], token_sets[best]))
+    return ordered
+
+
+def _trim_overlap(previous: str, text: str, max_overlap: int = INGEST_CONFIG["CHUNK_OVERLAP"]) -> str:
+    """Strip the prefix of text that repeats the end of previous (the splitter's chunk overlap)."""
+    for size in range(min(len(previous), len(text), max_overlap), 0, -1):
+        if previous.endswith(text[:size]):
+            return text[size:]
+    return text
+
+
+def merge_by_source(documents: List[Document]) -> List[Document]:
+    """Merge chunks from the same order into one document, in document order.
+
+    Adjacent chunks are stitched with their overlap removed; gaps are marked
+    with an ellipsis. Sources keep the position of their best-ranked chunk.
+    """
+    groups: Dict[str, List[Document]] = {}
+    for doc in documents:
+        groups.setdefault(source_key(doc), []).append(doc)
+
+    merged = []
+    for chunks in groups.values():
+        if len(chunks) == 1:
+            merged.append(chunks[0])
+            continue
+        chunks = sorted(chunks, key=lambda doc: doc.metadata.get("chunk_index", 0))
+        text = chunks[0].page_content
+        for previous, chunk in zip(chunks, chunks[1:]):
+            previous_index, index = previous.metadata.get("chunk_index"), chunk.metadata.get("chunk_index")
+            if previous_index is not None and index == previous_index + 1:
+                text += _trim_overlap(previous.page_content, chunk.page_content)
+            else:
+                text += "\n...\n" + chunk.page_content
+        merged.append(Document(id=chunks[0].id, page_content=text, metadata=dict(chunks[0].metadata)))
+    return merged
+
+
+def assemble_context(
+    documents: List[Document],
+    token_budget: Optional[int] = None,
+    mmr_lambda: Optional[float] = None,
+) -> Tuple[List[Document], Dict[str, Any]]:
+    """Turn retrieved chunks into the documents stuffed into the prompt.
+
+    Dedupes, orders by MMR, packs to the token budget (the top chunk is always
+    kept) and merges chunks of the same order. Returns the documents and the
+    request's token stats.
+    """
+    token_budget = CONTEXT_CONFIG["TOKEN_BUDGET"] if token_budget is None else token_budget
+    mmr_lambda = CONTEXT_CONFIG["MMR_LAMBDA"] if mmr_lambda is None else mmr_lambda
+    tokens_retrieved = sum(count_tokens(doc.page_content) for doc in documents)
+
+    packed, used = [], 0
+    for doc in mmr_order(dedupe(documents), mmr_lambda):
+        tokens = count_tokens(doc.page_content)
+        if packed and used + tokens > token_budget:
+            continue
+        packed.append(doc)
+        used += tokens
+
+    assembled = merge_by_source(packed)
+    tokens_used = sum(count_tokens(doc.page_content) for doc in assembled)
+    return assembled, {
+        "chunks_retrieved": len(documents),
+        "chunks_used": len(packed),
+        "tokens_retrieved": tokens_retrieved,
+        "tokens_used": tokens_used,
+        "tokens_saved": tokens_retrieved - tokens_used,
+    }
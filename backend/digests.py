@@ -0,0 +1,319 @@
+from dotenv import load_dotenv
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+load_dotenv()
+
+from langchain_core.documents import Document
+from backend import prompt_store
+from backend.order_lookup import get_cached_order, list_order_numbers, load_order
+from backend.tokens import count_tokens
+from config import API_CONFIG, DIGEST_CONFIG, SCHEDULER_CONFIG
+
+# Precomputed per-order digests: a summary, key points and sentiment for every
+# executive order, written offline and served without any model call:
+#
+#     python -m backend.digests                  # new and changed orders only
+#     python -m backend.digests --orders 14257 --force
+#
+# Run it after backend.ingest; orders whose text is unchanged keep their digest.
+
+# Constants
+ROUTE_DIGEST = "digest"
+DIGEST_PROMPT_NAME = "local/order_digest_prompt"
+DIGEST_MESSAGES = [
+    ("system",
+     "You write reference digests of U.S. Presidential Executive Orders. Read the full text of executive "
+     "order {number} and reply with a single JSON object and nothing else, with the keys: "
+     '"summary" (one paragraph of at most 150 words), '
+     '"key_points" (a list of 3 to 6 short sentences), and '
+     '"sentiment" (an object with "label", one of positive, negative, neutral or mixed, and "explanation", '
+     "one or two sentences on the order's tone and who it favors or burdens)."),
+    ("human", "{text}"),
+]
+
+# Requests a digest answers in full: a summary, key points or sentiment of one order...
+_DIGEST_INTENT = re.compile(
+    r"\b(?:summar(?:y|ies|ize|ise|ized|ised|izing|ising)|sentiment|tone|overview|(?:key|main)\s+points)\b",
+    re.IGNORECASE,
+)
+_SENTIMENT_INTENT = re.compile(r"\b(?:sentiment|tone)\b", re.IGNORECASE)
+# ...unless they also ask something more specific than the digest covers.
+_SPECIFIC_INTENT = re.compile(
+    r"\b(?:how|why|which|who|whom|when|where|about|regarding|compare|compared|versus|vs|impacts?|affects?|"
+    r"effects?|implications?|mention|mentions|list|explain|describe|does|did|do)\b",
+    re.IGNORECASE,
+)
+
+_digests: Dict[int, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+# Store
+
+def _digest_path(number: int) -> str:
+    return os.path.join(DIGEST_CONFIG["DIR"], f"{number}.json")
+
+
+def get_digest(number: int) -> Optional[Dict[str, Any]]:
+    """Get an order's digest from memory or the on-disk store."""
+    with _lock:
+        digest = _digests.get(number)
+    if digest is not None:
+        return digest
+
+    path = _digest_path(number)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            digest = json.load(f)
+    except Exception as e:
+        print(f"Error reading digest {path}: {str(e)}")
+        return None
+    with _lock:
+        _digests[number] = digest
+    return digest
+
+
+def store_digest(digest: Dict[str, Any]) -> None:
+    """Write an order's digest to memory and, atomically, to disk."""
+    number = digest["number"]
+    with _lock:
+        _digests[number] = digest
+    path = _digest_path(number)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(digest, f)
+        os.replace(f"{path}.tmp", path)
+    except Exception as e:
+        print(f"Error writing digest {path}: {str(e)}")
+
+
+def stored_numbers() -> List[int]:
+    """Order numbers with a digest on disk."""
+    directory = DIGEST_CONFIG["DIR"]
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[:-len(".json")]) for name in os.listdir(directory) if re.fullmatch(r"\d+\.json", name))
+
+
+def remove_digest(number: int) -> None:
+    """Drop the digest of an order that is no longer in the index."""
+    with _lock:
+        _digests.pop(number, None)
+    path = _digest_path(number)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def content_hash(documents: List[Document]) -> str:
+    """Hash of an order's chunk text, in document order; a digest is stale once it changes."""
+    chunks = sorted(documents, key=lambda doc: doc.metadata.get("chunk_index", 0))
+    return hashlib.sha256(json.dumps([doc.page_content for doc in chunks]).encode("utf-8")).hexdigest()
+
+
+# Generation
+
+def _digest_chain() -> Any:
+    """Get the digest chain, registering its prompt on first use."""
+    from langchain_core.prompts import ChatPromptTemplate
+    from backend.registry import get_digest_chain
+
+    if not prompt_store.has_prompt(DIGEST_PROMPT_NAME):
+        prompt_store.register_prompt(DIGEST_PROMPT_NAME, ChatPromptTemplate.from_messages(DIGEST_MESSAGES))
+    return get_digest_chain(DIGEST_PROMPT_NAME, model=DIGEST_CONFIG["MODEL"])
+
+
+def _order_text(documents: List[Document], max_tokens: int) -> str:
+    """The order's text in document order, cut off at max_tokens."""
+    parts, used = [], 0
+    for doc in documents:
+        tokens = count_tokens(doc.page_content)
+        if parts and used + tokens > max_tokens:
+            break
+        parts.append(doc.page_content)
+        used += tokens
+    return "\n\n".join(parts)
+
+
+def parse_digest(reply: str) -> Dict[str, Any]:
+    """Parse the model's JSON reply into summary, key_points and sentiment."""
+    start, end = reply.find("{"), reply.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("digest reply is not a JSON object")
+    data = json.loads(reply[start:end + 1])
+    summary = str(data.get("summary") or "").strip()
+    if not summary:
+        raise ValueError("digest reply has no summary")
+    sentiment = data.get("sentiment") or {}
+    if not isinstance(sentiment, dict):
+        sentiment = {"label": str(sentiment)}
+    return {
+        "summary": summary,
+        "key_points": [str(point).strip() for point in data.get("key_points") or [] if str(point).strip()],
+        "sentiment": {
+            "label": str(sentiment.get("label") or "neutral").strip().lower(),
+            "explanation": str(sentiment.get("explanation") or "").strip(),
+        },
+    }
+
+
+def build_digest(corpus: Dict[str, Any], number: int, documents: List[Document]) -> Dict[str, Any]:
+    """Write one order's digest with the model; sources are the chunks a lookup would cite."""
+    from backend.pipeline import scheduled, scheduler
+    from backend.scheduler import PRIORITY_BATCH
+
+    documents = sorted(documents, key=lambda doc: doc.metadata.get("chunk_index", 0))
+    chain = _digest_chain()
+    text = _order_text(documents, DIGEST_CONFIG["CONTEXT_TOKENS"])
+    input_tokens = count_tokens(text) + sum(count_tokens(content) for _, content in DIGEST_MESSAGES)
+    # Digests are refreshed offline, so they queue behind interactive requests.
+    with scheduled(1, input_tokens + SCHEDULER_CONFIG["EXPECTED_OUTPUT_TOKENS"], PRIORITY_BATCH) as ticket:
+        reply = chain.invoke({"number": number, "text": text})
+        if ticket is not None:
+            scheduler.settle(ticket, 1, input_tokens + count_tokens(reply))
+    k = corpus["search_kwargs"].get("k", 10)
+    return {
+        "number": number,
+        **parse_digest(reply),
+        "sources": [
+            {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata} for doc in documents[:k]
+        ],
+        "content_hash": content_hash(documents),
+        "prompt_version": prompt_store.get_prompt_version(DIGEST_PROMPT_NAME),
+        "model": DIGEST_CONFIG["MODEL"] or API_CONFIG["OPENAI_MODEL"],
+        "generated_at": time.time(),
+    }
+
+
+def refresh_digest(corpus: Dict[str, Any], number: int, force: bool = False) -> str:
+    """Bring one order's digest up to date; returns created, updated, unchanged or missing."""
+    documents, _ = load_order(corpus, number)
+    if documents is None:
+        return "missing"
+    existing = get_digest(number)
+    _digest_chain()  # registers the prompt, so its version can be compared
+    if (
+        existing is not None and not force
+        and existing.get("content_hash") == content_hash(documents)
+        and existing.get("prompt_version") == prompt_store.get_prompt_version(DIGEST_PROMPT_NAME)
+    ):
+        return "unchanged"
+    store_digest(build_digest(corpus, number, documents))
+    return "created" if existing is None else "updated"
+
+
+def refresh_digests(
+    corpus: Dict[str, Any],
+    numbers: Optional[Iterable[int]] = None,
+    force: bool = False,
+    workers: int = DIGEST_CONFIG["WORKERS"],
+) -> Dict[str, int]:
+    """Refresh the digests of the given orders, or of every order in the index.
+
+    Only orders that are new, whose text changed or whose digest prompt
+    changed are sent to the model. A full refresh also drops digests of
+    orders no longer in the index.
+    """
+    from tqdm import tqdm
+
+    full = numbers is None
+    numbers = list_order_numbers(corpus) if full else list(numbers)
+    stats = {"orders": len(numbers), "created": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0, "removed": 0}
+
+    def refresh(number: int) -> str:
+        try:
+            return refresh_digest(corpus, number, force)
+        except Exception as e:
+            print(f"Error building digest for executive order {number}: {str(e)}")
+            return "failed"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for outcome in tqdm(pool.map(refresh, numbers), total=len(numbers), desc="Digests", unit="order"):
+            stats[outcome] += 1
+
+    if full:
+        current = set(numbers)
+        for number in stored_numbers():
+            if number not in current:
+                remove_digest(number)
+                stats["removed"] += 1
+    return stats
+
+
+# Serving
+
+def is_digest_query(query: str) -> bool:
+    """Whether a query asks only for an order's summary, key points or sentiment."""
+    return bool(_DIGEST_INTENT.search(query)) and not _SPECIFIC_INTENT.search(query)
+
+
+def match_digest(
+    corpus: Dict[str, Any],
+    query: str,
+    metadata_filter: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Get the digest that answers a query about a single named order, if it is stored and current."""
+    if not DIGEST_CONFIG["ENABLED"] or not corpus.get("digests"):
+        return None
+    condition = (metadata_filter or {}).get("executive_order_number") or {}
+    if "$eq" not in condition or not is_digest_query(query):
+        return None
+    number = int(condition["$eq"])
+    digest = get_digest(number)
+    if digest is None:
+        return None
+    # The order was re-ingested since the digest was written; answer live until the next refresh.
+    order = get_cached_order(number)
+    if order is not None and content_hash(order) != digest.get("content_hash"):
+        return None
+    return digest
+
+
+def digest_sources(digest: Dict[str, Any]) -> List[Document]:
+    """The source documents served with a digest."""
+    return [
+        Document(id=source.get("id"), page_content=source["page_content"], metadata=source["metadata"])
+        for source in digest["sources"]
+    ]
+
+
+def format_digest(digest: Dict[str, Any], query: str) -> str:
+    """Render the parts of a digest the query asked for as markdown."""
+    sentiment_only = _SENTIMENT_INTENT.search(query) and not re.search(
+        r"\b(?:summar|overview|key\s+points|main\s+points)", query, re.IGNORECASE
+    )
+    title = next((source["metadata"].get("title") for source in digest["sources"] if source["metadata"].get("title")), None)
+    sections = [f"**Executive Order {digest['number']}{f': {title}' if title else ''}**"]
+    if not sentiment_only:
+        sections.append(digest["summary"])
+        if digest["key_points"]:
+            sections.append("**Key points**\n" + "\n".join(f"- {point}" for point in digest["key_points"]))
+    if _SENTIMENT_INTENT.search(query):
+        sentiment = digest["sentiment"]
+        sections.append(f"**Sentiment:** {sentiment['label'].capitalize()}. {sentiment['explanation']}".rstrip())
+    return "\n\n".join(sections)
+
+
+if __name__ == "__main__":
+    from backend.core import CORPUS
+
+    parser = argparse.ArgumentParser(description="Precompute executive order summaries, key points and sentiment.")
+    parser.add_argument("--orders", type=int, nargs="+", help="Only these order numbers (default: every order in the index)")
+    parser.add_argument("--force", action="store_true", help="Regenerate digests even if the order is unchanged")
+    parser.add_argument("--workers", type=int, default=DIGEST_CONFIG["WORKERS"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = refresh_digests(CORPUS, args.orders, args.force, args.workers)
+    print(f"{result['orders']} orders in {time.perf_counter() - start:.1f}s: {result['created']} created, "
+          f"{result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed, "
+          f"{result['missing']} not found, {result['removed']} removed")
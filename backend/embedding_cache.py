@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_key(model: str, text: str) -> str:
+    """Build the cache key for a model and query text."""
+    return hashlib.sha256(f"{model}\n{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Query embedding cache in front of another Embeddings object.
+
+    Query vectors are kept in an in-memory LRU and persisted on disk as
+    float32 ``.npy`` files, one per query. Document embeddings are passed
+    straight through since ingestion never repeats a chunk.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, max_size: int = 2048, cache_dir: Optional[str] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_size = max_size
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^\w.-]", "_", model)) if cache_dir else None
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def lookup(self, text: str) -> Optional[List[float]]:
+        """Return the cached vector for a query, or None on a miss."""
+        key = cache_key(self.model, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return vector
+
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                vector = np.load(self._disk_path(key)).astype(float).tolist()
+            except Exception as e:
+                print(f"Error reading embedding cache entry {key}: {str(e)}")
+            else:
+                self._remember(key, vector)
+                with self._lock:
+                    self.hits_disk += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, text: str, vector: List[float]) -> None:
+        """Add a query vector to both cache tiers."""
+        key = cache_key(self.model, text)
+        self._remember(key, vector)
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._disk_path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(vector, dtype=np.float32))
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception as e:
+            print(f"Error writing embedding cache entry {key}: {str(e)}")
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.lookup(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.store(text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self.lookup(text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self.store(text, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def clear(self) -> None:
+        """Forget every in-memory vector; the disk tier is kept."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters for this cache."""
+        with self._lock:
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "size": len(self._memory),
+            }
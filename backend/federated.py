@@ -0,0 +1,130 @@
+from dotenv import load_dotenv
+import math
+import threading
+from typing import List, Dict, Any, Optional
+load_dotenv()
+
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from backend import combined, core, projcore, prompt_store
+from backend.core import create_metadata_filters
+from backend.fusion import reciprocal_rank_fusion
+from backend.pipeline import corpus_entrypoints
+from backend.registry import get_event_loop, get_rephrase_chain, get_stuff_chain
+from backend.tokens import count_tokens
+from config import CONDENSE_CONFIG, FEDERATED_CONFIG
+
+# Constants
+PROMPT_NAME = "local/federated_prompt"
+CHUNK_TOKENS_SMOOTHING = 0.2
+MAX_K_PER_INDEX = 50
+
+FEDERATED_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are an analyst comparing Project 2025 policy proposals with Presidential Executive Orders. "
+     "Answer using only the context below. Each passage is labeled with its source. When a Project 2025 "
+     "proposal is implemented or advanced by an executive order, name both and explain the connection. "
+     "If the context does not support an answer, say so.\n\n{context}"),
+    MessagesPlaceholder("chat_history", optional=True),
+    ("human", "{input}"),
+])
+prompt_store.register_prompt(PROMPT_NAME, FEDERATED_PROMPT)
+
+
+# Mean tokens per retrieved chunk of each index, measured as questions are answered
+# by concurrent requests, so reads and updates hold _chunk_tokens_lock.
+_chunk_tokens_lock = threading.Lock()
+_chunk_tokens: Dict[str, float] = {
+    combined.PROJECT_2025_INDEX_NAME: FEDERATED_CONFIG["EST_CHUNK_TOKENS"],
+    combined.EXECUTIVE_ORDERS_INDEX_NAME: FEDERATED_CONFIG["EST_CHUNK_TOKENS"],
+}
+
+
+def per_index_k(token_budget: int = FEDERATED_CONFIG["CONTEXT_TOKEN_BUDGET"]) -> Dict[str, int]:
+    """How many chunks to fetch from each index so the fused list roughly fills the budget.
+
+    Each index gets half the budget, divided by the mean size of the chunks
+    it has returned so far (EST_CHUNK_TOKENS until the first search).
+    """
+    with _chunk_tokens_lock:
+        chunk_tokens = dict(_chunk_tokens)
+    # Fusion interleaves the two lists; one extra chunk per side covers dedup losses.
+    return {
+        index_name: min(max(1, math.ceil(token_budget / 2 / tokens)) + 1, MAX_K_PER_INDEX)
+        for index_name, tokens in chunk_tokens.items()
+    }
+
+
+def _measure(results: Dict[str, List[Document]]) -> None:
+    """Fold the sizes of the chunks just retrieved into each index's running mean."""
+    for index_name, docs in results.items():
+        if docs:
+            mean = sum(count_tokens(doc.page_content) for doc in docs) / len(docs)
+            with _chunk_tokens_lock:
+                _chunk_tokens[index_name] += CHUNK_TOKENS_SMOOTHING * (mean - _chunk_tokens[index_name])
+
+
+def _label(doc: Document) -> Document:
+    """Prefix a chunk with its source so the model can cite across corpora."""
+    if doc.metadata.get("corpus") == combined.EXECUTIVE_ORDERS_INDEX_NAME:
+        eo_number = doc.metadata.get("executive_order_number", "N/A")
+        if isinstance(eo_number, float):
+            eo_number = str(int(eo_number))
+        header = f"Source: Executive Order {eo_number} ({doc.metadata.get('html_url', 'no URL')})"
+    else:
+        header = f"Source: Project 2025, Section: {doc.metadata.get('section', 'Unknown Section')}"
+    return Document(id=doc.id, page_content=f"{header}\nContent: {doc.page_content}", metadata=doc.metadata)
+
+
+def label_sources(documents: List[Document]) -> List[Document]:
+    """Label assembled context documents with their corpus and source."""
+    return [_label(doc) for doc in documents]
+
+
+def fuse(results: Dict[str, List[Document]]) -> List[Document]:
+    """Fuse per-index results into one ranked list, tagging each document with its index.
+
+    Chunks are fused by content, so several chunks of one order survive for
+    context assembly to stitch together.
+    """
+    tagged = [
+        [Document(id=doc.id, page_content=doc.page_content, metadata=dict(doc.metadata, corpus=corpus_label)) for doc in docs]
+        for corpus_label, docs in results.items()
+    ]
+    return reciprocal_rank_fusion(tagged, k=FEDERATED_CONFIG["RRF_K"])
+
+
+def retrieve(question: str, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+    """Search both indexes concurrently and fuse the results; the pipeline packs them to the budget."""
+    results = combined.retrieve_combined(question, k=per_index_k(), metadata_filter=metadata_filter)
+    _measure(results)
+    return fuse(results)
+
+
+CORPUS = {
+    "name": "federated",
+    "index_name": None,  # both indexes are searched through "retrieve"
+    "embedding_model": core.EMBEDDING_MODEL,
+    "prompt_name": PROMPT_NAME,
+    "search_kwargs": {},
+    "filters": create_metadata_filters,
+    "retrieve": retrieve,
+    "catalog": combined.EXECUTIVE_ORDERS_INDEX_NAME,  # the executive order search filters through its catalog
+    "query_embeddings": len({core.EMBEDDING_MODEL, projcore.EMBEDDING_MODEL}),  # one per embedding model
+    "context_tokens": FEDERATED_CONFIG["CONTEXT_TOKEN_BUDGET"],
+    "format_context": label_sources,
+}
+
+run_llm, arun_llm, stream_llm, astream_llm = corpus_entrypoints(CORPUS)
+
+
+def warm_up() -> None:
+    """Build the federated answer chain and the search event loop ahead of the first question."""
+    get_event_loop()
+    get_rephrase_chain(model=CONDENSE_CONFIG["MODEL"])
+    get_stuff_chain(PROMPT_NAME)
+
+
+if __name__ == "__main__":
+    res = run_llm(query="Which Project 2025 proposals have been implemented by executive orders on immigration?")
+    print(res["result"])
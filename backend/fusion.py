@@ -0,0 +1,36 @@
+import hashlib
+from typing import Callable, Dict, List
+
+from langchain_core.documents import Document
+
+# Constants
+RRF_K = 60
+
+
+def content_key(doc: Document) -> str:
+    """Identify a chunk by its text, so the same chunk from two retrievers fuses."""
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def source_key(doc: Document) -> str:
+    """Identify a document's source: the executive order URL, else the chunk itself."""
+    url = doc.metadata.get("html_url")
+    if url:
+        return url
+    return doc.id or content_key(doc)
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Document]],
+    k: int = RRF_K,
+    key: Callable[[Document], str] = content_key,
+) -> List[Document]:
+    """Fuse ranked lists with reciprocal rank fusion, keeping the first document seen per key."""
+    scores: Dict[str, float] = {}
+    best: Dict[str, Document] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked):
+            doc_key = key(doc)
+            scores[doc_key] = scores.get(doc_key, 0.0) + 1.0 / (k + rank + 1)
+            best.setdefault(doc_key, doc)
+    return [best[doc_key] for doc_key in sorted(scores, key=scores.get, reverse=True)]
@@ -0,0 +1,115 @@
+from typing import Any, List, Optional, Tuple
+
+from backend.tokens import count_tokens
+from config import CHAT_CONFIG, CONDENSE_CONFIG
+
+# Constants
+SUMMARY_PROMPT_NAME = "local/history_summary_prompt"
+SUMMARY_MESSAGES = [
+    ("system",
+     "You maintain a running summary of a conversation about Presidential Executive Orders and Project 2025. "
+     "Update the summary with the new exchange. Keep executive order numbers, names, topics and any open "
+     "questions; drop pleasantries. Reply with the updated summary only, in at most {max_words} words."),
+    ("human", "Current summary:\n{summary}\n\nNew exchange:\nUser: {question}\nAssistant: {answer}"),
+]
+
+
+def _summary_chain() -> Any:
+    """Get the summary chain, importing LangChain only once a summary is needed.
+
+    The pages import this module before their first paint, so it must stay light.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    from backend import prompt_store
+    from backend.registry import get_summary_chain
+
+    if not prompt_store.has_prompt(SUMMARY_PROMPT_NAME):
+        prompt_store.register_prompt(SUMMARY_PROMPT_NAME, ChatPromptTemplate.from_messages(SUMMARY_MESSAGES))
+    return get_summary_chain(SUMMARY_PROMPT_NAME, model=CONDENSE_CONFIG["MODEL"])
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens."""
+    while text and count_tokens(text) > max_tokens:
+        text = text[:int(len(text) * 0.8)]
+    return text
+
+
+class ChatHistory:
+    """Bounded chat history for one conversation.
+
+    The last ``max_turns`` question/answer turns are kept verbatim; older
+    turns are folded one at a time into a running summary, so each new turn
+    costs at most one small summarization call. A turn whose fold fails stays
+    verbatim and is retried on the next add. ``messages()`` never exceeds
+    ``max_tokens``.
+    """
+
+    def __init__(self, max_turns: Optional[int] = None, max_tokens: Optional[int] = None):
+        self.max_turns = CHAT_CONFIG["MAX_HISTORY_LENGTH"] if max_turns is None else max_turns
+        self.max_tokens = CHAT_CONFIG["MAX_HISTORY_TOKENS"] if max_tokens is None else max_tokens
+        self.turns: List[Tuple[str, str]] = []
+        self.summary = ""
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def _tokens(self) -> int:
+        return count_tokens(self.summary) + sum(count_tokens(q) + count_tokens(a) for q, a in self.turns)
+
+    def _fold(self, question: str, answer: str) -> bool:
+        """Fold one turn into the running summary, within the shared OpenAI budget. True on success."""
+        from backend.pipeline import scheduled, scheduler
+
+        chain_input = {
+            "summary": self.summary or "(none)",
+            "question": question,
+            "answer": answer,
+            "max_words": CHAT_CONFIG["SUMMARY_MAX_WORDS"],
+        }
+        input_tokens = sum(count_tokens(str(value)) for value in chain_input.values())
+        try:
+            # About two tokens per word is a safe ceiling on the summary's length.
+            with scheduled(1, input_tokens + 2 * CHAT_CONFIG["SUMMARY_MAX_WORDS"]) as ticket:
+                summary = _summary_chain().invoke(chain_input).strip()
+                if ticket is not None:
+                    scheduler.settle(ticket, 1, input_tokens + count_tokens(summary))
+            self.summary = summary
+            return True
+        except Exception as e:
+            # Keep the turn for the next add rather than failing the request that triggered the fold.
+            print(f"Error in _fold, keeping the turn to retry: {str(e)}")
+            return False
+
+    def add_turn(self, question: str, answer: str) -> None:
+        """Record a finished turn, folding the oldest turns while over the turn or token limit."""
+        self.turns.append((question, answer))
+        while len(self.turns) > 1 and (len(self.turns) > self.max_turns or self._tokens() > self.max_tokens):
+            if not self._fold(*self.turns[0]):
+                break
+            self.turns.pop(0)
+
+    def messages(self) -> List[Tuple[str, str]]:
+        """The history to send with the next question: summary first, then verbatim turns."""
+        messages = []
+        budget = self.max_tokens
+        if self.summary:
+            summary = _truncate(self.summary, budget // 2)
+            messages.append(("system", f"Summary of the earlier conversation: {summary}"))
+            budget -= count_tokens(summary)
+        turns = self.turns
+        # Turns still waiting on a failed fold are left out until they fit.
+        while len(turns) > 1 and sum(count_tokens(q) + count_tokens(a) for q, a in turns) > budget:
+            turns = turns[1:]
+        for question, answer in turns:
+            # Only a single oversized turn can get here; trim its answer to fit.
+            answer = _truncate(answer, max(budget - count_tokens(question), 0))
+            messages.append(("human", question))
+            messages.append(("ai", answer))
+            budget -= count_tokens(question) + count_tokens(answer)
+        return messages
+
+    def clear(self) -> None:
+        """Forget every turn and the summary."""
+        self.turns = []
+        self.summary = ""
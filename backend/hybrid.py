@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict, Field
+
+from backend.fusion import reciprocal_rank_fusion
+from backend.lexical_index import BM25Index, exact_terms, tokenize
+from config import HYBRID_CONFIG
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense vector search fused with BM25 over the same chunks.
+
+    Takes the same search_kwargs as a vector store retriever ("k" and an
+    optional metadata "filter"). Dense and BM25 results are combined with
+    reciprocal rank fusion. When the query names exact tokens (executive
+    order numbers, legal citations) that BM25 finds, the chunks containing
+    all of them are fused in as a third list, so they rank first without
+    crowding out the dense results. When those chunks alone fill k, the
+    dense search is skipped: it could only push them out of the results.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: VectorStore
+    lexical_index: BM25Index
+    search_kwargs: Dict[str, Any] = Field(default_factory=dict)
+    rrf_k: int = HYBRID_CONFIG["RRF_K"]
+    exact_match_k: int = HYBRID_CONFIG["EXACT_MATCH_K"]
+
+    def _search_args(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        return self.search_kwargs.get("k", 4), self.search_kwargs.get("filter")
+
+    def _exact_matches(self, query: str, lexical: List[Document]) -> Optional[List[Document]]:
+        """The lexical hits containing every exact token of the query, or None."""
+        terms = exact_terms(query)
+        if not terms or not all(term in self.lexical_index for term in terms):
+            return None
+        matches = [doc for doc in lexical if terms <= set(tokenize(doc.page_content))]
+        return matches[:self.exact_match_k] or None
+
+    @staticmethod
+    def _exact_fill(exact: Optional[List[Document]], k: int) -> Optional[List[Document]]:
+        """The results when the exact matches already fill k, or None when a dense search is needed."""
+        return exact[:k] if exact and len(exact) >= k else None
+
+    def _fuse(
+        self, dense: List[Document], lexical: List[Document], exact: Optional[List[Document]], k: int
+    ) -> List[Document]:
+        ranked_lists = [exact, dense, lexical] if exact else [dense, lexical]
+        return reciprocal_rank_fusion(ranked_lists, k=self.rrf_k)[:k]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        k, metadata_filter = self._search_args()
+        lexical = [doc for doc, _ in self.lexical_index.search(query, k=k, filter=metadata_filter)]
+        exact = self._exact_matches(query, lexical)
+        filled = self._exact_fill(exact, k)
+        if filled is not None:
+            return filled
+        dense = self.vectorstore.similarity_search(query, k=k, filter=metadata_filter)
+        return self._fuse(dense, lexical, exact, k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        k, metadata_filter = self._search_args()
+        hits = await asyncio.to_thread(self.lexical_index.search, query, k, metadata_filter)
+        lexical = [doc for doc, _ in hits]
+        exact = self._exact_matches(query, lexical)
+        filled = self._exact_fill(exact, k)
+        if filled is not None:
+            return filled
+        dense = await self.vectorstore.asimilarity_search(query, k=k, filter=metadata_filter)
+        return self._fuse(dense, lexical, exact, k)
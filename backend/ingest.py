@@ -0,0 +1,336 @@
+from dotenv import load_dotenv
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+load_dotenv()
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from tqdm import tqdm
+
+from backend import core, projcore
+from backend.catalog import OrderCatalog
+from backend.local_store import LocalVectorStore
+from backend.order_lookup import store_order
+from backend.lexical_index import BM25Index
+from backend.registry import catalog_path, get_embeddings, get_vectorstore, lexical_index_path
+from config import CATALOG_CONFIG, HYBRID_CONFIG, INGEST_CONFIG
+
+# Constants
+CORPORA = {"eo": core.CORPUS, "proj2025": projcore.CORPUS}
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+# Checkpoints
+
+def checkpoint_path(corpus: Dict[str, Any]) -> str:
+    """Get the default checkpoint file for a corpus."""
+    return os.path.join(INGEST_CONFIG["CHECKPOINT_DIR"], f"{corpus['index_name']}.json")
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Load the ingestion checkpoint, or an empty one."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("format_version") == CHECKPOINT_FORMAT_VERSION:
+            return checkpoint
+        print(f"Ignoring checkpoint {path}: unsupported format version")
+    return {"format_version": CHECKPOINT_FORMAT_VERSION, "records": {}}
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """Write the ingestion checkpoint atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+# Pipeline stages
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Read raw records from a JSONL file or a directory of .json/.txt files.
+
+    Each record carries its text under "text"; every other field becomes
+    chunk metadata (executive_order_number, president, html_url, category
+    flags, constitutional_impact, ...). Plain .txt files use the file name
+    as the record id.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            stem, extension = os.path.splitext(name)
+            if extension == ".json":
+                with open(file_path, "r", encoding="utf-8") as f:
+                    yield json.load(f)
+            elif extension == ".txt":
+                with open(file_path, "r", encoding="utf-8") as f:
+                    yield {"id": stem, "text": f.read()}
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def record_key(record: Dict[str, Any]) -> str:
+    """Get the stable key of a record: its executive order number or id."""
+    number = record.get("executive_order_number")
+    if number is not None:
+        return f"eo-{int(float(number))}"
+    if record.get("id") is not None:
+        return str(record["id"])
+    return hashlib.sha256(record["text"].encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Hash a record's text and metadata so unchanged records can be skipped."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def changed_records(
+    records: Iterable[Dict[str, Any]],
+    checkpoint: Dict[str, Any],
+    force: bool = False,
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Yield (key, hash, record) for records that are new or changed since the checkpoint."""
+    for record in records:
+        key, digest = record_key(record), content_hash(record)
+        if force or checkpoint["records"].get(key, {}).get("hash") != digest:
+            yield key, digest, record
+
+
+def _chunk_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the metadata values a vector store can filter on."""
+    metadata = {}
+    for field, value in record.items():
+        if field in ("id", "text") or value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)) or (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            metadata[field] = value
+    return metadata
+
+
+def chunk_records(
+    items: Iterable[Tuple[str, str, Dict[str, Any]]],
+    splitter: RecursiveCharacterTextSplitter,
+) -> Iterator[Dict[str, Any]]:
+    """Split records into chunks with deterministic ids.
+
+    The final chunk of each record carries the record's key, hash and chunk
+    count, so the record is checkpointed only once every chunk is upserted.
+    """
+    for key, digest, record in items:
+        metadata = _chunk_metadata(record)
+        texts = splitter.split_text(record["text"]) or [""]
+        for i, text in enumerate(texts):
+            chunk = {"id": f"{key}#{i}", "text": text, "metadata": dict(metadata, chunk_index=i)}
+            if i == len(texts) - 1:
+                chunk["record"] = {"key": key, "hash": digest, "chunks": len(texts)}
+            yield chunk
+
+
+def collect_orders(chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Pass chunks through, attaching each record's full chunk list to its final chunk."""
+    pending: List[Document] = []
+    for chunk in chunks:
+        pending.append(Document(id=chunk["id"], page_content=chunk["text"], metadata=chunk["metadata"]))
+        if chunk.get("record"):
+            chunk["documents"] = pending
+            pending = []
+        yield chunk
+
+
+def cache_orders(batch: List[Dict[str, Any]], catalog: Optional[OrderCatalog] = None) -> None:
+    """Cache each executive order a batch completes for direct lookup, once the batch is upserted.
+
+    With a catalog, each order's metadata row and chunks are upserted too;
+    a record without an order number leaves it no longer complete.
+    """
+    for chunk in batch:
+        documents = chunk.get("documents")
+        if documents is None:
+            continue
+        number = chunk["metadata"].get("executive_order_number")
+        if number is not None:
+            store_order(int(number), documents)
+            if catalog is not None:
+                catalog.upsert_order(int(number), documents)
+        elif catalog is not None and catalog.complete:
+            # The catalog cannot hold it, so it no longer covers the index.
+            catalog.set_complete(False)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_batches(
+    batches: Iterable[List[Dict[str, Any]]],
+    embeddings: Embeddings,
+    concurrency: int,
+) -> Iterator[Tuple[List[Dict[str, Any]], List[List[float]]]]:
+    """Embed batches with at most `concurrency` requests in flight, yielding them in order."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append((batch, executor.submit(embeddings.embed_documents, [chunk["text"] for chunk in batch])))
+            if len(in_flight) >= concurrency:
+                batch, future = in_flight.popleft()
+                yield batch, future.result()
+        while in_flight:
+            batch, future = in_flight.popleft()
+            yield batch, future.result()
+
+
+def upsert_batch(vectorstore: VectorStore, batch: List[Dict[str, Any]], vectors: List[List[float]]) -> None:
+    """Bulk upsert one embedded batch."""
+    ids = [chunk["id"] for chunk in batch]
+    texts = [chunk["text"] for chunk in batch]
+    metadatas = [chunk["metadata"] for chunk in batch]
+    if isinstance(vectorstore, LocalVectorStore):
+        vectorstore.add_embeddings(texts, vectors, metadatas, ids)
+        return
+    # Pinecone keeps the chunk text in metadata under the store's text key.
+    vectorstore.index.upsert(vectors=[
+        (chunk_id, vector, dict(metadata, **{vectorstore._text_key: text}))
+        for chunk_id, vector, metadata, text in zip(ids, vectors, metadatas, texts)
+    ])
+
+
+def commit_batch(vectorstore: VectorStore, batch: List[Dict[str, Any]], checkpoint: Dict[str, Any]) -> List[str]:
+    """Record the records completed by a batch and drop chunks they no longer have; returns their keys."""
+    completed = []
+    for chunk in batch:
+        record = chunk.get("record")
+        if not record:
+            continue
+        previous = checkpoint["records"].get(record["key"], {}).get("chunks", 0)
+        if previous > record["chunks"]:
+            vectorstore.delete(ids=[f"{record['key']}#{i}" for i in range(record["chunks"], previous)])
+        checkpoint["records"][record["key"]] = {"hash": record["hash"], "chunks": record["chunks"]}
+        completed.append(record["key"])
+    if isinstance(vectorstore, LocalVectorStore):
+        vectorstore.persist()
+    return completed
+
+
+def fetch_records(vectorstore: VectorStore, checkpoint: Dict[str, Any], keys: Iterable[str]) -> Iterator[Document]:
+    """Read the chunks of checkpointed records back from the index, as they were embedded."""
+    ids = [f"{key}#{i}" for key in keys for i in range(checkpoint["records"][key]["chunks"])]
+    if isinstance(vectorstore, LocalVectorStore):
+        yield from vectorstore.get_by_ids(ids)
+        return
+    for start in range(0, len(ids), INGEST_CONFIG["FETCH_BATCH_SIZE"]):
+        batch = ids[start:start + INGEST_CONFIG["FETCH_BATCH_SIZE"]]
+        vectors = vectorstore.index.fetch(ids=batch, namespace=vectorstore._namespace).vectors
+        for chunk_id in batch:
+            if chunk_id in vectors:
+                metadata = dict(vectors[chunk_id].metadata or {})
+                yield Document(id=chunk_id, page_content=metadata.pop(vectorstore._text_key, ""), metadata=metadata)
+
+
+def build_lexical_index(
+    corpus: Dict[str, Any],
+    vectorstore: VectorStore,
+    checkpoint: Dict[str, Any],
+    changed: Iterable[str],
+) -> int:
+    """Bring the corpus' BM25 index up to date with every ingested record.
+
+    Chunks of records this run left alone are carried over from the current
+    index; changed records, and every record when there is no index yet, are
+    read back from the vector store. Returns the chunk count.
+    """
+    path = lexical_index_path(corpus["index_name"])
+    existing = BM25Index.load(path)
+    changed = set(changed)
+    if existing is None:
+        changed = set(checkpoint["records"])
+    kept = (
+        doc for doc in (existing.documents() if existing is not None else [])
+        if doc.id.rsplit("#", 1)[0] in checkpoint["records"] and doc.id.rsplit("#", 1)[0] not in changed
+    )
+    fetched = fetch_records(vectorstore, checkpoint, sorted(key for key in changed if key in checkpoint["records"]))
+    return BM25Index.build(path, itertools.chain(kept, fetched))
+
+
+def run_ingest(
+    corpus: Dict[str, Any],
+    input_path: str,
+    checkpoint_file: Optional[str] = None,
+    batch_size: int = INGEST_CONFIG["EMBED_BATCH_SIZE"],
+    concurrency: int = INGEST_CONFIG["EMBED_CONCURRENCY"],
+    force: bool = False,
+) -> Dict[str, int]:
+    """Stream records from input_path into the corpus index, resuming from the checkpoint."""
+    checkpoint_file = checkpoint_file or checkpoint_path(corpus)
+    checkpoint = load_checkpoint(checkpoint_file)
+    embeddings = get_embeddings(corpus["embedding_model"])
+    vectorstore = get_vectorstore(corpus["index_name"], corpus["embedding_model"])
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=INGEST_CONFIG["CHUNK_SIZE"],
+        chunk_overlap=INGEST_CONFIG["CHUNK_OVERLAP"],
+    )
+
+    chunks = chunk_records(changed_records(read_records(input_path), checkpoint, force), splitter)
+    catalog = None
+    if corpus.get("catalog") and CATALOG_CONFIG["ENABLED"]:
+        catalog = OrderCatalog.open(catalog_path(corpus["index_name"]))
+    if corpus.get("lookup"):
+        chunks = collect_orders(chunks)
+    stats = {"chunks": 0, "records": 0}
+    changed: List[str] = []
+    progress = tqdm(desc=f"Ingesting {corpus['index_name']}", unit="chunk")
+    try:
+        for batch, vectors in embed_batches(batched(chunks, batch_size), embeddings, concurrency):
+            upsert_batch(vectorstore, batch, vectors)
+            # Only what the index now holds is cached, catalogued and checkpointed.
+            if corpus.get("lookup"):
+                cache_orders(batch, catalog)
+            completed = commit_batch(vectorstore, batch, checkpoint)
+            changed.extend(completed)
+            stats["records"] += len(completed)
+            stats["chunks"] += len(batch)
+            save_checkpoint(checkpoint_file, checkpoint)
+            progress.update(len(batch))
+    finally:
+        progress.close()
+        if catalog is not None:
+            catalog.close()
+
+    # The lexical index is rewritten whole: it is cheap next to embedding and keeps postings contiguous.
+    if HYBRID_CONFIG["ENABLED"] and (changed or BM25Index.load(lexical_index_path(corpus["index_name"])) is None):
+        stats["lexical_chunks"] = build_lexical_index(corpus, vectorstore, checkpoint, changed)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed and upsert executive orders or Project 2025 text.")
+    parser.add_argument("input", help="JSONL file, or directory of .json/.txt files")
+    parser.add_argument("--corpus", choices=sorted(CORPORA), default="eo")
+    parser.add_argument("--checkpoint", help="Checkpoint file (defaults to one per index)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_CONFIG["EMBED_BATCH_SIZE"])
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONFIG["EMBED_CONCURRENCY"])
+    parser.add_argument("--force", action="store_true", help="Re-embed every record even if unchanged")
+    args = parser.parse_args()
+
+    result = run_ingest(CORPORA[args.corpus], args.input, args.checkpoint, args.batch_size, args.concurrency, args.force)
+    print(f"Upserted {result['chunks']} chunks from {result['records']} new or changed records")
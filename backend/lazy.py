@@ -0,0 +1,78 @@
+import importlib
+import threading
+from concurrent.futures import Future
+from types import ModuleType
+from typing import Any, Dict
+
+# The pages import only this module before their first paint; the LangChain
+# stack behind backend.core, backend.projcore and backend.federated loads on
+# a background thread while the user is reading or typing.
+
+_futures: Dict[str, Future] = {}
+_errors: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def _warm(module_name: str, future: Future) -> None:
+    """Import a backend module and build its clients and prompts."""
+    try:
+        module = importlib.import_module(module_name)
+        warm_up = getattr(module, "warm_up", None)
+        if warm_up is not None:
+            warm_up()
+        with _lock:
+            _errors.pop(module_name, None)
+        future.set_result(module)
+    except Exception as e:
+        print(f"Error in prewarm of {module_name}: {str(e)}")
+        with _lock:
+            _errors[module_name] = str(e)
+            # Let the next prewarm() retry, e.g. once the hub is reachable again.
+            if _futures.get(module_name) is future:
+                del _futures[module_name]
+        future.set_exception(e)
+
+
+def prewarm(module_name: str) -> Future:
+    """Start importing and warming a backend module in the background, once per process."""
+    with _lock:
+        future = _futures.get(module_name)
+        if future is None:
+            future = _futures[module_name] = Future()
+            threading.Thread(
+                target=_warm, args=(module_name, future), name=f"prewarm-{module_name}", daemon=True
+            ).start()
+    return future
+
+
+def is_ready(module_name: str) -> bool:
+    """Whether a module's prewarm has finished successfully."""
+    with _lock:
+        future = _futures.get(module_name)
+    return future is not None and future.done() and future.exception() is None
+
+
+def status(module_name: str) -> Dict[str, Any]:
+    """Warm-up state of a module: "cold", "warming" or "ready", plus the last prewarm error if any."""
+    with _lock:
+        future = _futures.get(module_name)
+        error = _errors.get(module_name)
+    if future is None:
+        state = "cold"
+    elif not future.done():
+        state = "warming"
+    else:
+        state = "ready"
+    return {"state": state, "error": error}
+
+
+def load(module_name: str) -> ModuleType:
+    """Get a backend module, waiting for its prewarm to finish.
+
+    A failed warm-up does not make the module unusable: it is imported
+    directly and its components are built on the first request instead.
+    """
+    try:
+        return prewarm(module_name).result()
+    except Exception:
+        return importlib.import_module(module_name)
@@ -0,0 +1,205 @@
+import json
+import math
+import os
+import re
+import shutil
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from backend.local_store import MetadataIndex
+
+# Constants
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+TERMS_FILE = "terms.json"
+POSTINGS_FILE = "postings.i32"
+FREQUENCIES_FILE = "frequencies.u16"
+LENGTHS_FILE = "lengths.i32"
+RECORDS_FILE = "records.jsonl"
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+# Tokens dense embeddings blur together: executive order numbers (4-5 digits, but
+# not years) and legal citations (42 U.S.C. 1983, 8 CFR 214.2, Pub. L. 117-58, § 1182).
+_EXACT = re.compile(
+    r"\b\d+\s+(?:U\.\s?S\.\s?C\.?|USC|C\.\s?F\.\s?R\.?|CFR)\s*(?:§+\s*)?\d+[\w.-]*"
+    r"|\bPub(?:lic)?\.?\s*L(?:aw)?\.?\s*(?:No\.?\s*)?\d+-\d+"
+    r"|§+\s*\d+[\w.-]*"
+    r"|\b(?!19\d\d\b|20\d\d\b)\d{4,5}\b"
+)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the their this to was "
+    "what when which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; dotted forms collapse (U.S.C. -> usc) and stopwords are dropped."""
+    tokens = (match.replace(".", "") for match in _TOKEN.findall(text.lower()))
+    return [token for token in tokens if token not in STOPWORDS]
+
+
+def exact_terms(query: str) -> Set[str]:
+    """The query's exact-match tokens: executive order numbers and legal citations."""
+    terms: Set[str] = set()
+    for match in _EXACT.findall(query):
+        terms.update(tokenize(match))
+    return terms
+
+
+def bm25_scores(query: str, texts: List[str], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    """BM25 score of each text for the query, with term statistics from the texts themselves."""
+    documents = [Counter(tokenize(text)) for text in texts]
+    avg_length = sum(sum(counts.values()) for counts in documents) / max(len(documents), 1)
+    scores = [0.0] * len(documents)
+    for term in set(tokenize(query)):
+        df = sum(1 for counts in documents if term in counts)
+        if not df:
+            continue
+        idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        for i, counts in enumerate(documents):
+            frequency = counts.get(term, 0)
+            if frequency:
+                norm = k1 * (1 - b + b * sum(counts.values()) / max(avg_length, 1e-9))
+                scores[i] += idf * frequency * (k1 + 1) / (frequency + norm)
+    return scores
+
+
+class BM25Index:
+    """Read-only BM25 inverted index over a corpus' chunks.
+
+    Postings (row ids and term frequencies, grouped by term) and document
+    lengths are flat arrays on disk that are memory-mapped on load; the term
+    dictionary maps each term to its slice of the postings. Chunk text and
+    metadata are kept alongside so hits come back as Documents, and filters
+    use the same MetadataIndex as LocalVectorStore.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexical index format in {path}")
+        with open(os.path.join(path, TERMS_FILE), "r", encoding="utf-8") as f:
+            self._terms: Dict[str, List[int]] = json.load(f)
+        with open(os.path.join(path, RECORDS_FILE), "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+        self.count = manifest["count"]
+        self.avg_length = manifest["avg_length"]
+        self._postings = self._map(POSTINGS_FILE, np.int32, manifest["postings"])
+        self._frequencies = self._map(FREQUENCIES_FILE, np.uint16, manifest["postings"])
+        self._lengths = self._map(LENGTHS_FILE, np.int32, self.count)
+        self._ids = [record["id"] for record in records]
+        self._texts = [record["text"] for record in records]
+        self._metadatas = [record["metadata"] for record in records]
+        self._metadata_index = MetadataIndex(self._metadatas)
+
+    def _map(self, name: str, dtype: Any, length: int) -> np.ndarray:
+        if not length:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=(length,))
+
+    @classmethod
+    def load(cls, path: str, k1: float = 1.2, b: float = 0.75) -> Optional["BM25Index"]:
+        """Open the index stored at path, or None if none has been built."""
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return None
+        return cls(path, k1, b)
+
+    @staticmethod
+    def build(path: str, documents: Iterable[Document]) -> int:
+        """Write a BM25 index for documents to path, replacing any existing one. Returns the chunk count.
+
+        The index is written to a sibling directory and renamed into place, so
+        readers see either the old index or the new one, never a mix. One that
+        opens during the swap finds no index and searches dense-only.
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        build_path, old_path = f"{path}.tmp", f"{path}.old"
+        shutil.rmtree(build_path, ignore_errors=True)
+        os.makedirs(build_path)
+        with open(os.path.join(build_path, RECORDS_FILE), "w", encoding="utf-8") as f:
+            for row, doc in enumerate(documents):
+                tokens = tokenize(doc.page_content)
+                lengths.append(len(tokens))
+                for term, frequency in Counter(tokens).items():
+                    postings.setdefault(term, []).append((row, min(frequency, np.iinfo(np.uint16).max)))
+                f.write(json.dumps({"id": doc.id, "text": doc.page_content, "metadata": doc.metadata}) + "\n")
+
+        terms: Dict[str, List[int]] = {}
+        rows: List[int] = []
+        frequencies: List[int] = []
+        for term in sorted(postings):
+            terms[term] = [len(rows), len(postings[term])]
+            for row, frequency in postings[term]:
+                rows.append(row)
+                frequencies.append(frequency)
+
+        np.asarray(rows, dtype=np.int32).tofile(os.path.join(build_path, POSTINGS_FILE))
+        np.asarray(frequencies, dtype=np.uint16).tofile(os.path.join(build_path, FREQUENCIES_FILE))
+        np.asarray(lengths, dtype=np.int32).tofile(os.path.join(build_path, LENGTHS_FILE))
+        with open(os.path.join(build_path, TERMS_FILE), "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+        with open(os.path.join(build_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "count": len(lengths),
+                "postings": len(rows),
+                "avg_length": sum(lengths) / len(lengths) if lengths else 0.0,
+            }, f)
+
+        # A directory cannot be renamed over a non-empty one, so the old index steps aside first.
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(build_path, path)
+        # Open indexes keep their memory maps of the old files.
+        shutil.rmtree(old_path, ignore_errors=True)
+        return len(lengths)
+
+    def documents(self) -> Iterator[Document]:
+        """Every indexed chunk, in row order."""
+        for row in range(self.count):
+            yield self._document(row)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._terms
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25 score, restricted to a Pinecone-style metadata filter."""
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            rows = self._postings[start:start + df]
+            frequencies = self._frequencies[start:start + df].astype(np.float32)
+            idf = math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[rows] / max(self.avg_length, 1e-9))
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+
+        mask = self._metadata_index.mask(filter)
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if k <= 0 or not len(candidates):
+            return []
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._document(int(row)), float(scores[row])) for row in candidates]
@@ -0,0 +1,534 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Constants
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+MANIFEST_FILE = "manifest.json"
+SEARCH_BLOCK_ROWS = 65536
+MIN_CAPACITY_ROWS = 1024
+# Per-order text and links: never filtered on, and one posting list per order if indexed.
+UNINDEXED_FIELDS = frozenset({"text", "title", "html_url", "pdf_url", "full_text_xml_url", "signing_date", "chunk_index"})
+_RANGE_OPERATORS = {
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+}
+
+
+def _index_value(value: Any) -> Any:
+    """Normalize a metadata value so 14257 and 14257.0 land in the same posting list."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _condition_matches(value: Any, condition: Any) -> bool:
+    """Evaluate one metadata condition against a record's value (for unindexed fields)."""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    values = {_index_value(item) for item in (value if isinstance(value, list) else [value]) if not isinstance(item, (dict, list))}
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = _index_value(operand) in values
+        elif operator == "$ne":
+            matched = _index_value(operand) not in values
+        elif operator == "$in":
+            matched = bool(values & {_index_value(item) for item in operand})
+        elif operator == "$nin":
+            matched = not values & {_index_value(item) for item in operand}
+        elif operator in _RANGE_OPERATORS:
+            matched = any(
+                isinstance(item, float) and _RANGE_OPERATORS[operator](item, float(operand)) for item in values
+            )
+        else:
+            raise ValueError(f"Unsupported metadata filter operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+class MetadataIndex:
+    """Inverted index over a table of metadata dicts.
+
+    Each scalar value of a filterable field maps to the set of rows holding
+    it, so Pinecone-style filters resolve to a row mask without scanning
+    records. Rows are appended and updated incrementally. Fields in
+    ``unindexed`` (per-order text and links nobody filters on) get no
+    postings; filters on them fall back to a scan.
+    """
+
+    def __init__(self, metadatas: Sequence[Dict[str, Any]], unindexed: Iterable[str] = UNINDEXED_FIELDS):
+        self.count = 0
+        self._unindexed = frozenset(unindexed)
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {}
+        self._metadatas: List[Dict[str, Any]] = []
+        for metadata in metadatas:
+            self.append(metadata)
+
+    def _keys(self, metadata: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        for field, value in metadata.items():
+            if field in self._unindexed:
+                continue
+            for item in value if isinstance(value, list) else [value]:
+                if not isinstance(item, (dict, list)):
+                    yield field, _index_value(item)
+
+    def append(self, metadata: Dict[str, Any]) -> None:
+        """Index one new row."""
+        row = self.count
+        for field, key in self._keys(metadata):
+            self._postings.setdefault(field, {}).setdefault(key, set()).add(row)
+        self._metadatas.append(metadata)
+        self.count += 1
+
+    def update(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Replace an existing row's metadata."""
+        for field, key in self._keys(self._metadatas[row]):
+            self._postings[field][key].discard(row)
+        for field, key in self._keys(metadata):
+            self._postings.setdefault(field, {}).setdefault(key, set()).add(row)
+        self._metadatas[row] = metadata
+
+    def _rows_mask(self, rows: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self.count, dtype=bool)
+        rows = list(rows)
+        if rows:
+            mask[np.asarray(rows, dtype=np.int64)] = True
+        return mask
+
+    def _field_mask(self, field: str, condition: Any) -> np.ndarray:
+        """Resolve one metadata condition to a row mask."""
+        if field in self._unindexed:
+            return np.fromiter(
+                (field in metadata and _condition_matches(metadata[field], condition) for metadata in self._metadatas),
+                dtype=bool, count=self.count,
+            )
+        postings = self._postings.get(field, {})
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = np.ones(self.count, dtype=bool)
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                mask &= self._rows_mask(postings.get(_index_value(operand), ()))
+            elif operator == "$ne":
+                mask &= ~self._rows_mask(postings.get(_index_value(operand), ()))
+            elif operator in ("$in", "$nin"):
+                matched = self._rows_mask(
+                    row for item in operand for row in postings.get(_index_value(item), ())
+                )
+                mask &= matched if operator == "$in" else ~matched
+            elif operator in _RANGE_OPERATORS:
+                # Range filters union the postings of every indexed value in range.
+                mask &= self._rows_mask(
+                    row for value, rows in postings.items()
+                    if isinstance(value, float) and _RANGE_OPERATORS[operator](value, float(operand))
+                    for row in rows
+                )
+            else:
+                raise ValueError(f"Unsupported metadata filter operator: {operator}")
+        return mask
+
+    def values(self, field: str) -> List[Any]:
+        """Distinct (normalized) values a field takes on any row."""
+        if field in self._unindexed:
+            return list({_index_value(metadata[field]) for metadata in self._metadatas if field in metadata})
+        return [value for value, rows in self._postings.get(field, {}).items() if rows]
+
+    def mask(self, metadata_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Resolve a Pinecone-style metadata filter to a row mask, or None for no filter."""
+        if not metadata_filter:
+            return None
+        mask = np.ones(self.count, dtype=bool)
+        for field, condition in metadata_filter.items():
+            if field == "$and":
+                for clause in condition:
+                    mask &= self.mask(clause)
+            elif field == "$or":
+                matched = np.zeros(self.count, dtype=bool)
+                for clause in condition:
+                    matched |= self.mask(clause)
+                mask &= matched
+            else:
+                mask &= self._field_mask(field, condition)
+        return mask
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector index, a drop-in for PineconeVectorStore.
+
+    Vectors live in a memory-mapped float32 matrix next to a JSONL table of
+    ids, text and metadata. A MetadataIndex over the metadata resolves
+    Pinecone-style filters to a candidate mask before any vector is scored.
+
+    Upserts append into a preallocated matrix and update the metadata index
+    in place, and ``persist`` only writes what changed since the last call,
+    so ingesting N chunks in batches costs O(N) rather than O(N^2).
+    """
+
+    def __init__(self, embedding: Embeddings, path: Optional[str] = None):
+        self.embedding = embedding
+        self.path = path
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._metadata_index = MetadataIndex([])
+        self._lock = threading.RLock()
+        # What is on disk: rows, records log size and lines, rows changed in place, whether to rewrite.
+        self._persisted_rows = 0
+        self._records_bytes = 0
+        self._records_lines = 0
+        self._dirty_rows: Set[int] = set()
+        self._rewrite = True
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def _vectors(self) -> np.ndarray:
+        return self._matrix[:len(self._ids)]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # Persistence
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings) -> "LocalVectorStore":
+        """Open the index stored at path, or an empty one if it does not exist yet."""
+        store = cls(embedding, path)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return store
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        count, dim = manifest["count"], manifest["dim"]
+        records_bytes = manifest.get("records_bytes")
+        with open(os.path.join(path, RECORDS_FILE), "rb") as f:
+            # Bytes past the manifest's size are from a persist that never finished.
+            data = f.read() if records_bytes is None else f.read(records_bytes)
+        # The records file is a log: a later line for an id replaces the earlier one in place.
+        lines = 0
+        for line in data.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            lines += 1
+            row = store._positions.get(record["id"])
+            if row is None:
+                store._positions[record["id"]] = len(store._ids)
+                store._ids.append(record["id"])
+                store._texts.append(record["text"])
+                store._metadatas.append(record["metadata"])
+            else:
+                store._texts[row] = record["text"]
+                store._metadatas[row] = record["metadata"]
+
+        if count:
+            store._matrix = np.memmap(os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dim))
+        store._metadata_index = MetadataIndex(store._metadatas)
+        store._persisted_rows = count
+        store._records_bytes = len(data)
+        store._records_lines = lines
+        store._rewrite = False
+        return store
+
+    def _write_all(self) -> None:
+        """Rewrite vectors, records and manifest from scratch, swapping them in together."""
+        os.makedirs(self.path, exist_ok=True)
+        vectors = np.ascontiguousarray(self._vectors, dtype=np.float32)
+        vectors.tofile(os.path.join(self.path, f"{VECTORS_FILE}.tmp"))
+        with open(os.path.join(self.path, f"{RECORDS_FILE}.tmp"), "wb") as f:
+            for doc_id, text, metadata in zip(self._ids, self._texts, self._metadatas):
+                f.write((json.dumps({"id": doc_id, "text": text, "metadata": metadata}) + "\n").encode("utf-8"))
+            records_bytes = f.tell()
+        self._records_bytes, self._records_lines = records_bytes, len(self._ids)
+        self._write_manifest(f"{MANIFEST_FILE}.tmp")
+        # Swap the files in only after all three are complete.
+        for name in (VECTORS_FILE, RECORDS_FILE, MANIFEST_FILE):
+            os.replace(os.path.join(self.path, f"{name}.tmp"), os.path.join(self.path, name))
+
+    def _write_manifest(self, name: str) -> None:
+        with open(os.path.join(self.path, name), "w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(self._ids),
+                "dim": int(self._matrix.shape[1]) if self._ids else 0,
+                "records_bytes": self._records_bytes,
+            }, f)
+
+    def _write_changes(self) -> None:
+        """Patch changed rows and append new ones; the manifest is swapped in last."""
+        dim = int(self._matrix.shape[1])
+        row_bytes = dim * np.dtype(np.float32).itemsize
+        with open(os.path.join(self.path, VECTORS_FILE), "r+b") as f:
+            f.truncate(self._persisted_rows * row_bytes)
+            for row in sorted(self._dirty_rows):
+                f.seek(row * row_bytes)
+                f.write(np.ascontiguousarray(self._matrix[row], dtype=np.float32).tobytes())
+            f.seek(self._persisted_rows * row_bytes)
+            f.write(np.ascontiguousarray(self._matrix[self._persisted_rows:len(self._ids)], dtype=np.float32).tobytes())
+        with open(os.path.join(self.path, RECORDS_FILE), "r+b") as f:
+            f.truncate(self._records_bytes)
+            f.seek(self._records_bytes)
+            rows = sorted(self._dirty_rows) + list(range(self._persisted_rows, len(self._ids)))
+            for row in rows:
+                record = {"id": self._ids[row], "text": self._texts[row], "metadata": self._metadatas[row]}
+                f.write((json.dumps(record) + "\n").encode("utf-8"))
+            self._records_bytes = f.tell()
+            self._records_lines += len(rows)
+        self._write_manifest(f"{MANIFEST_FILE}.tmp")
+        os.replace(os.path.join(self.path, f"{MANIFEST_FILE}.tmp"), os.path.join(self.path, MANIFEST_FILE))
+
+    def persist(self) -> None:
+        """Write what changed since the last persist to the store's path.
+
+        New rows are appended and updated rows are patched in place, with the
+        manifest written last. The whole store is rewritten only after a
+        delete, or to compact a records log that has grown to twice the
+        row count.
+        """
+        if not self.path:
+            raise ValueError("LocalVectorStore has no path to persist to")
+        with self._lock:
+            if self._rewrite or self._records_lines > 2 * len(self._ids) + MIN_CAPACITY_ROWS:
+                self._write_all()
+            elif self._dirty_rows or self._persisted_rows < len(self._ids):
+                self._write_changes()
+            self._persisted_rows = len(self._ids)
+            self._dirty_rows = set()
+            self._rewrite = False
+
+    # Indexing
+
+    def _reindex(self) -> None:
+        """Rebuild id positions and the metadata index from the record table."""
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._metadata_index = MetadataIndex(self._metadatas)
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        """Make room for rows more vectors, doubling capacity so appends are amortized O(1)."""
+        count = len(self._ids)
+        writable = not isinstance(self._matrix, np.memmap)
+        if writable and self._matrix.shape[1] == dim and count + rows <= self._matrix.shape[0]:
+            return
+        capacity = max(count + rows, 2 * self._matrix.shape[0] if writable else count + rows, MIN_CAPACITY_ROWS)
+        matrix = np.empty((capacity, dim), dtype=np.float32)
+        if count:
+            # Copies out of the read-only memory map on the first write after load.
+            matrix[:count] = self._matrix[:count]
+        self._matrix = matrix
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Upsert precomputed vectors; existing ids are overwritten in place."""
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        new_vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(new_vectors, axis=1, keepdims=True)
+        new_vectors = new_vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self._ids and new_vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f"Expected {self._matrix.shape[1]}-dimensional vectors, got {new_vectors.shape[1]}")
+            self._reserve(len(ids), new_vectors.shape[1])
+            for doc_id, text, metadata, vector in zip(ids, texts, metadatas, new_vectors):
+                row = self._positions.get(doc_id)
+                metadata = dict(metadata)
+                if row is None:
+                    row = len(self._ids)
+                    self._positions[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._texts.append(text)
+                    self._metadatas.append(metadata)
+                    self._metadata_index.append(metadata)
+                else:
+                    self._texts[row] = text
+                    self._metadatas[row] = metadata
+                    self._metadata_index.update(row, metadata)
+                    if row < self._persisted_rows:
+                        self._dirty_rows.add(row)
+                self._matrix[row] = vector
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            drop = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+            if not drop:
+                return False
+            keep = [row for row in range(len(self._ids)) if row not in drop]
+            dim = self._matrix.shape[1]
+            self._matrix = np.array(self._matrix[keep], dtype=np.float32) if keep else np.zeros((0, dim), dtype=np.float32)
+            self._ids = [self._ids[row] for row in keep]
+            self._texts = [self._texts[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._reindex()
+            # Rows shifted, so the next persist rewrites the store.
+            self._rewrite = True
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            rows = [self._positions[doc_id] for doc_id in ids if doc_id in self._positions]
+            return [self._document(row) for row in rows]
+
+    def get_by_filter(self, metadata_filter: Dict[str, Any]) -> List[Document]:
+        """Get every document matching a metadata filter, without a query vector."""
+        with self._lock:
+            rows = np.flatnonzero(self.filter_mask(metadata_filter))
+            return [self._document(int(row)) for row in rows]
+
+    # Filtering
+
+    def field_values(self, field: str) -> List[Any]:
+        """Distinct values of a metadata field across the index."""
+        with self._lock:
+            return self._metadata_index.values(field)
+
+    def filter_mask(self, metadata_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Resolve a Pinecone-style metadata filter to a row mask, or None for no filter."""
+        with self._lock:
+            return self._metadata_index.mask(metadata_filter)
+
+    # Search
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def search_by_vectors(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """Batched top-k cosine search for several query vectors at once."""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            mask = self.filter_mask(filter)
+            candidates = np.flatnonzero(mask) if mask is not None else None
+            count = len(self._ids) if candidates is None else len(candidates)
+            if count == 0 or k <= 0:
+                return [[] for _ in queries]
+
+            best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+            best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+            for start in range(0, count, SEARCH_BLOCK_ROWS):
+                if candidates is None:
+                    rows = np.arange(start, min(start + SEARCH_BLOCK_ROWS, count))
+                    block = self._vectors[start:start + SEARCH_BLOCK_ROWS]
+                else:
+                    rows = candidates[start:start + SEARCH_BLOCK_ROWS]
+                    block = self._vectors[rows]
+                scores = queries @ np.asarray(block).T
+                # Merge this block's scores with the running top-k.
+                merged_scores = np.hstack([best_scores, scores])
+                merged_rows = np.hstack([best_rows, np.broadcast_to(rows, scores.shape)])
+                keep = min(k, merged_scores.shape[1])
+                top = np.argpartition(-merged_scores, keep - 1, axis=1)[:, :keep]
+                best_scores = np.take_along_axis(merged_scores, top, axis=1)
+                best_rows = np.take_along_axis(merged_rows, top, axis=1)
+
+            results = []
+            for scores, rows in zip(best_scores, best_rows):
+                order = np.argsort(-scores)
+                results.append([(self._document(int(rows[i])), float(scores[i])) for i in order])
+            return results
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return self.search_by_vectors([embedding], k=k, filter=filter)[0]
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        # Same name and signature as PineconeVectorStore's by-vector search.
+        return self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        # Vectors are unit length, so scores are already cosine similarities.
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        path: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, path)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
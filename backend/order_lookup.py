@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from backend.lexical_index import bm25_scores
+from backend.local_store import LocalVectorStore
+from backend.registry import get_vectorstore
+from backend.tokens import count_tokens
+from config import CONTEXT_CONFIG, HYBRID_CONFIG, ORDER_CACHE_CONFIG
+
+# Retrieval routes recorded by lookup_orders and the pipeline
+ROUTE_DOCUMENT_CACHE = "document_cache"
+ROUTE_INDEX_LOOKUP = "index_lookup"
+ROUTE_VECTOR = "vector"
+# Pinecone's top_k ceiling for queries that return metadata; far above any order's chunk count.
+LOOKUP_TOP_K = 1000
+
+_orders: Dict[int, List[Document]] = {}
+_dimensions: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _order_path(number: int) -> str:
+    return os.path.join(ORDER_CACHE_CONFIG["DIR"], f"{number}.json")
+
+
+def _sorted_chunks(documents: List[Document]) -> List[Document]:
+    return sorted(documents, key=lambda doc: doc.metadata.get("chunk_index", 0))
+
+
+def get_cached_order(number: int) -> Optional[List[Document]]:
+    """Get an order's chunks from the in-memory or on-disk document cache."""
+    with _lock:
+        documents = _orders.get(number)
+    if documents is not None:
+        return documents
+
+    path = _order_path(number)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            documents = [
+                Document(id=chunk.get("id"), page_content=chunk["page_content"], metadata=chunk["metadata"])
+                for chunk in json.load(f)
+            ]
+    except Exception as e:
+        print(f"Error reading order cache {path}: {str(e)}")
+        return None
+    with _lock:
+        _orders[number] = documents
+    return documents
+
+
+def store_order(number: int, documents: List[Document]) -> None:
+    """Cache the complete set of chunks for an executive order."""
+    documents = _sorted_chunks(documents)
+    with _lock:
+        _orders[number] = documents
+    path = _order_path(number)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump([{"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata} for doc in documents], f)
+        os.replace(f"{path}.tmp", path)
+    except Exception as e:
+        print(f"Error writing order cache {path}: {str(e)}")
+
+
+def _probe_vector(docsearch: Any, index_name: str) -> List[float]:
+    """A fixed unit vector of the index's dimension, for metadata-only queries."""
+    with _lock:
+        dimension = _dimensions.get(index_name)
+    if dimension is None:
+        dimension = docsearch.index.describe_index_stats()["dimension"]
+        with _lock:
+            _dimensions[index_name] = dimension
+    return [1.0] + [0.0] * (dimension - 1)
+
+
+def _index_lookup(corpus: Dict[str, Any], number: int) -> Optional[List[Document]]:
+    """Fetch an order's chunks from the index by metadata, whatever their ids, without embedding the query."""
+    docsearch = get_vectorstore(corpus["index_name"], corpus["embedding_model"])
+    metadata_filter = {"executive_order_number": {"$eq": number}}
+    if isinstance(docsearch, LocalVectorStore):
+        documents = docsearch.get_by_filter(metadata_filter)
+        return documents or None
+
+    # Pinecone has no filter-only read, so the filter rides on a query with a fixed probe vector.
+    results = docsearch.index.query(
+        vector=_probe_vector(docsearch, corpus["index_name"]), top_k=LOOKUP_TOP_K, filter=metadata_filter,
+        include_metadata=True, namespace=docsearch._namespace,
+    )
+    documents = []
+    for match in results["matches"]:
+        metadata = dict(match["metadata"] or {})
+        documents.append(Document(id=match["id"], page_content=metadata.pop(docsearch._text_key, ""), metadata=metadata))
+    return documents or None
+
+
+def load_order(corpus: Dict[str, Any], number: int) -> Tuple[Optional[List[Document]], str]:
+    """Get every chunk of one order, from the document cache or else the index: (documents or None, route)."""
+    order = get_cached_order(number)
+    if order is not None:
+        return order, ROUTE_DOCUMENT_CACHE
+    try:
+        order = _index_lookup(corpus, number)
+    except Exception as e:
+        print(f"Error looking up executive order {number}: {str(e)}")
+        return None, ROUTE_VECTOR
+    if order is None:
+        return None, ROUTE_VECTOR
+    store_order(number, order)
+    return get_cached_order(number), ROUTE_INDEX_LOOKUP
+
+
+def list_order_numbers(corpus: Dict[str, Any]) -> List[int]:
+    """Every executive order number in a corpus's index, in ascending order."""
+    docsearch = get_vectorstore(corpus["index_name"], corpus["embedding_model"])
+    if isinstance(docsearch, LocalVectorStore):
+        return sorted({int(value) for value in docsearch.field_values("executive_order_number")})
+
+    # Pinecone lists ids only; this relies on backend.ingest's eo-<n>#<i> ids.
+    numbers = set()
+    for page in docsearch.index.list(prefix="eo-"):
+        for vector_id in page:
+            prefix = vector_id.split("#", 1)[0][len("eo-"):]
+            if prefix.isdigit():
+                numbers.add(int(prefix))
+    return sorted(numbers)
+
+
+def index_size(corpus: Dict[str, Any]) -> int:
+    """How many vectors a corpus's index holds."""
+    docsearch = get_vectorstore(corpus["index_name"], corpus["embedding_model"])
+    if isinstance(docsearch, LocalVectorStore):
+        return len(docsearch)
+    stats = docsearch.index.describe_index_stats()
+    namespace = stats.namespaces.get(docsearch._namespace) if docsearch._namespace else None
+    return namespace.vector_count if namespace is not None else stats.total_vector_count
+
+
+def select_chunks(question: str, order: List[Document], token_budget: int) -> List[Document]:
+    """The chunks of one order to answer from.
+
+    An order that fits the token budget is served whole, in document order.
+    A longer one is ranked by BM25 score against the question, and the
+    best chunks that fit are returned, best first (always at least one).
+    """
+    order = _sorted_chunks(order)
+    tokens = [count_tokens(doc.page_content) for doc in order]
+    if sum(tokens) <= token_budget:
+        return order
+    scores = bm25_scores(
+        question, [doc.page_content for doc in order], k1=HYBRID_CONFIG["BM25_K1"], b=HYBRID_CONFIG["BM25_B"]
+    )
+    selected, used = [], 0
+    for i in sorted(range(len(order)), key=lambda i: -scores[i]):
+        if selected and used + tokens[i] > token_budget:
+            continue
+        selected.append(order[i])
+        used += tokens[i]
+    return selected
+
+
+def lookup_orders(
+    corpus: Dict[str, Any],
+    metadata_filter: Optional[Dict[str, Any]],
+    question: str = "",
+    token_budget: int = CONTEXT_CONFIG["TOKEN_BUDGET"],
+) -> Tuple[Optional[List[Document]], str]:
+    """Fetch the chunks of the orders a query names, skipping embedding and vector search.
+
+    Returns (documents, route); documents is None when the query names no
+    order or any named order is missing, so the caller falls back to the
+    vector path. The token budget is split evenly between the named
+    orders; see select_chunks for how each order's share is filled.
+    """
+    condition = (metadata_filter or {}).get("executive_order_number")
+    if not ORDER_CACHE_CONFIG["ENABLED"] or not condition:
+        return None, ROUTE_VECTOR
+    numbers = [condition["$eq"]] if "$eq" in condition else list(condition.get("$in", []))
+    if not numbers:
+        return None, ROUTE_VECTOR
+
+    route = ROUTE_DOCUMENT_CACHE
+    documents: List[Document] = []
+    for number in numbers:
+        order, order_route = load_order(corpus, int(number))
+        if order is None:
+            return None, ROUTE_VECTOR
+        if order_route == ROUTE_INDEX_LOOKUP:
+            route = ROUTE_INDEX_LOOKUP
+        documents.extend(select_chunks(question, order, token_budget // len(numbers)))
+    return documents, route
@@ -0,0 +1,596 @@
+from dotenv import load_dotenv
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+load_dotenv()
+
+from langchain_core.documents import Document
+from backend.answer_cache import AnswerCache
+from backend.catalog import dropped_conditions, matches_nothing, narrow_filter
+from backend.condense import (
+    PATH_PROVIDED, PATH_REPHRASED, condense_question, history_fingerprint, message_parts, needs_rephrase,
+)
+from backend.context import assemble_context
+from backend.digests import ROUTE_DIGEST, digest_sources, format_digest, match_digest
+from backend.order_lookup import ROUTE_VECTOR, lookup_orders
+from backend.registry import get_corpus_catalog, get_embeddings, get_retriever, get_stuff_chain, search_config
+from backend.scheduler import PRIORITY_INTERACTIVE, Scheduler, Ticket, is_rate_limited
+from backend.singleflight import SingleFlight
+from backend.tokens import count_tokens
+from backend.tracing import Trace
+from config import ANSWER_CACHE_CONFIG, API_CONFIG, CONTEXT_CONFIG, SCHEDULER_CONFIG, SINGLE_FLIGHT_CONFIG
+
+# Corpus specs are plain dicts with the keys:
+#   name, index_name, embedding_model, prompt_name, search_kwargs
+# and optionally "filters" to derive a request's metadata filter from its query,
+# "lookup" to enable the direct executive order lookup,
+# "digests" to answer summary and sentiment requests from precomputed digests,
+# "catalog" to filter and hydrate sources through the order catalog (True
+# for the corpus's own index, or the name of the index whose catalog to use),
+# "retrieve" to replace the index search with a (question, filter) -> documents
+# callable, "query_embeddings" for how many times that search embeds the
+# question (default 1), "context_tokens" to override the context token budget
+# and "format_context" to rewrite the assembled documents before they are
+# stuffed into the prompt.
+
+ROUTE_ANSWER_CACHE = "answer_cache"
+
+answer_cache = AnswerCache(
+    similarity_threshold=ANSWER_CACHE_CONFIG["SIMILARITY_THRESHOLD"],
+    max_entries=ANSWER_CACHE_CONFIG["MAX_ENTRIES"],
+    ttl_seconds=ANSWER_CACHE_CONFIG["TTL_SECONDS"],
+)
+
+# Identical questions asked while one is already being answered share its run.
+flights = SingleFlight()
+
+# Every session's OpenAI calls draw on the same per-minute quota.
+scheduler = Scheduler(
+    requests_per_minute=SCHEDULER_CONFIG["REQUESTS_PER_MINUTE"],
+    tokens_per_minute=SCHEDULER_CONFIG["TOKENS_PER_MINUTE"],
+    max_queue=SCHEDULER_CONFIG["MAX_QUEUE"],
+)
+
+
+def _catalog(corpus: Dict[str, Any]):
+    return get_corpus_catalog(corpus)
+
+
+def _hydrate(corpus: Dict[str, Any], documents: List[Document]) -> List[Document]:
+    """Fill in source metadata from the corpus's order catalog, if it has one."""
+    catalog = _catalog(corpus)
+    return catalog.hydrate(documents) if catalog is not None else documents
+
+
+def retrieve(corpus: Dict[str, Any], question: str, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+    """Retrieve documents for a standalone question from a corpus.
+
+    The filter is first narrowed to candidate orders by the catalog; a
+    filter no order matches skips the search.
+    """
+    if corpus.get("retrieve"):
+        return corpus["retrieve"](question, metadata_filter)
+    search_filter = narrow_filter(_catalog(corpus), metadata_filter)
+    if matches_nothing(search_filter):
+        return []
+    retriever = get_retriever(corpus["index_name"], corpus["embedding_model"], corpus["search_kwargs"])
+    documents = retriever.invoke(question, config=search_config(corpus["search_kwargs"], search_filter))
+    return _hydrate(corpus, documents)
+
+
+def _context_tokens(corpus: Dict[str, Any]) -> int:
+    return corpus.get("context_tokens") or CONTEXT_CONFIG["TOKEN_BUDGET"]
+
+
+def _lookup(corpus: Dict[str, Any], question: str, metadata_filter: Optional[Dict[str, Any]]):
+    """Direct lookup for queries naming an executive order: (documents or None, route)."""
+    if not corpus.get("lookup"):
+        return None, ROUTE_VECTOR
+    documents, route = lookup_orders(corpus, metadata_filter, question, _context_tokens(corpus))
+    return (_hydrate(corpus, documents) if documents is not None else None), route
+
+
+def _assemble(corpus: Dict[str, Any], documents: List[Document]) -> Tuple[List[Document], Optional[Dict[str, Any]]]:
+    """Dedupe, MMR-order and token-pack retrieved chunks, when context assembly is enabled."""
+    if not CONTEXT_CONFIG["ENABLED"]:
+        return documents, None
+    return assemble_context(documents, token_budget=_context_tokens(corpus))
+
+
+def _chain_input(corpus: Dict[str, Any], query: str, chat_history: List[Any], documents: List[Document]) -> Dict[str, Any]:
+    if corpus.get("format_context"):
+        documents = corpus["format_context"](documents)
+    return {"input": query, "chat_history": chat_history, "context": documents}
+
+
+def _condense(
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]],
+    standalone: Optional[str],
+) -> Tuple[str, str]:
+    """The standalone question to retrieve with and its condense path, unless the caller already has it."""
+    if standalone is not None:
+        return standalone, PATH_PROVIDED
+    return condense_question(query, chat_history, metadata_filter)
+
+
+def _ready_events(
+    query: str,
+    answer: str,
+    documents: List[Document],
+    condense_path: str,
+    route: str,
+    trace: Trace,
+) -> List[Dict[str, Any]]:
+    """The events for an answer served without generation (answer cache hit or digest)."""
+    trace.attributes["route"] = route
+    return [
+        {"type": "sources", "source_documents": documents, "condense_path": condense_path, "route": route},
+        {"type": "token", "text": answer, "condense_path": condense_path},
+        {
+            "type": "done", "query": query, "result": answer,
+            "source_documents": documents, "condense_path": condense_path, "route": route,
+            "trace": trace.finish(),
+        },
+    ]
+
+
+def _store_answer(
+    corpus: Dict[str, Any],
+    metadata_filter: Optional[Dict[str, Any]],
+    query_vector: Optional[List[float]],
+    answer: str,
+    documents: List[Document],
+) -> None:
+    if query_vector is not None:
+        answer_cache.store(
+            corpus["name"], metadata_filter, query_vector, API_CONFIG["INDEX_VERSION"],
+            {"result": answer, "source_documents": documents},
+        )
+
+
+def _history_tokens(chat_history: List[Any]) -> int:
+    return sum(count_tokens(message_parts(message)[1]) for message in chat_history)
+
+
+def _query_embeddings(corpus: Dict[str, Any]) -> int:
+    return corpus.get("query_embeddings", 1)
+
+
+def _reserve(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    priority: int,
+    rephrase: bool,
+    embeds: int,
+) -> Ticket:
+    """Queue a request with the scheduler.
+
+    Reserves one answer call at the context budget and expected answer
+    length, plus a rephrase call and the query embeddings the request
+    still has to make.
+    """
+    requests = 1 + rephrase + embeds
+    tokens = (
+        count_tokens(query) + _history_tokens(chat_history)
+        + _context_tokens(corpus) + SCHEDULER_CONFIG["EXPECTED_OUTPUT_TOKENS"]
+    )
+    if rephrase:
+        tokens += count_tokens(query) + _history_tokens(chat_history)
+    tokens += embeds * count_tokens(query)
+    return scheduler.submit(requests, tokens, priority)
+
+
+def _admit(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    priority: int,
+    rephrase: bool,
+    embeds: int,
+) -> Iterator[Dict[str, Any]]:
+    """Wait for the scheduler to admit a request, yielding "queued" events as its place in line changes.
+
+    Returns the admitted ticket.
+    """
+    ticket = _reserve(corpus, query, chat_history, priority, rephrase, embeds)
+    try:
+        position = None
+        while not scheduler.wait(ticket, SCHEDULER_CONFIG["POSITION_INTERVAL_SECONDS"]):
+            current = scheduler.position(ticket)
+            if current != position:
+                position = current
+                yield {"type": "queued", "position": position}
+    except BaseException:
+        scheduler.cancel(ticket)
+        raise
+    return ticket
+
+
+def _settle(
+    ticket: Optional[Ticket],
+    query: str,
+    chat_history: List[Any],
+    condense_path: str,
+    embeds: int,
+    documents: Optional[List[Document]] = None,
+    answer: Optional[str] = None,
+) -> None:
+    """Tell the scheduler what a finished request actually used."""
+    if ticket is None:
+        return
+    requests = tokens = 0
+    if condense_path == PATH_REPHRASED:
+        requests += 1
+        tokens += count_tokens(query) + _history_tokens(chat_history)
+    requests += embeds
+    tokens += embeds * count_tokens(query)
+    if answer is not None:
+        requests += 1
+        tokens += count_tokens(query) + _history_tokens(chat_history) + count_tokens(answer)
+        tokens += sum(count_tokens(doc.page_content) for doc in documents or [])
+    scheduler.settle(ticket, requests, tokens)
+
+
+@contextmanager
+def scheduled(requests: int, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> Iterator[Optional[Ticket]]:
+    """Hold a scheduler reservation around model calls made outside a pipeline run.
+
+    Blocks until admitted and yields the ticket, or None when the scheduler
+    is off. Settle the ticket with what the calls used; otherwise the
+    estimate stands when the block exits.
+    """
+    if not SCHEDULER_CONFIG["ENABLED"]:
+        yield None
+        return
+    ticket = scheduler.submit(requests, tokens, priority)
+    try:
+        while not scheduler.wait(ticket, SCHEDULER_CONFIG["POSITION_INTERVAL_SECONDS"]):
+            pass
+        yield ticket
+    except BaseException:
+        scheduler.cancel(ticket)
+        raise
+    scheduler.settle(ticket, requests, tokens)
+
+
+def _generate(prompt_name: str, chain_input: Dict[str, Any]) -> Iterator[str]:
+    """Stream the answer, retrying with jittered backoff when rate limited before the first token."""
+    attempt = 0
+    while True:
+        streamed = False
+        try:
+            for token in get_stuff_chain(prompt_name).stream(chain_input):
+                streamed = True
+                yield token
+            return
+        except Exception as e:
+            if streamed or not is_rate_limited(e) or attempt >= SCHEDULER_CONFIG["MAX_RETRIES"]:
+                raise
+            delay = scheduler.backoff(
+                e, attempt, SCHEDULER_CONFIG["BACKOFF_SECONDS"], SCHEDULER_CONFIG["MAX_BACKOFF_SECONDS"]
+            )
+            print(f"Rate limited generating an answer, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def final_payload(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the run_llm result from a pipeline "done" event."""
+    return {
+        "query": event["query"],
+        "result": event["result"],
+        "source_documents": event["source_documents"],
+        "condense_path": event["condense_path"],
+        "retrieval_route": event.get("route", ROUTE_VECTOR),
+        "context_stats": event.get("context"),
+        "trace": event.get("trace"),
+    }
+
+
+def flight_key(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Key under which identical in-flight requests are coalesced."""
+    normalized = " ".join(query.lower().split()).rstrip("?!. ")
+    return json.dumps(
+        [corpus["name"], API_CONFIG["INDEX_VERSION"], normalized, metadata_filter or {}, history_fingerprint(chat_history)],
+        sort_keys=True, default=str,
+    )
+
+
+def _stream_pipeline(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    standalone: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Condense, retrieve and stream an answer, serving near-duplicate questions from the answer cache.
+
+    Yields "queued" events with the request's place in line while the
+    scheduler holds it back, a "sources" event as soon as retrieval
+    finishes, then one "token" event per generated chunk, then a "done"
+    event carrying the final query, result, source documents and the
+    request's trace. A standalone question the caller has already worked
+    out is used as is, skipping condensing.
+    """
+    trace = Trace(corpus["name"], query)
+    trace.attributes["filter"] = metadata_filter
+    # Summary and sentiment requests for one order are served from its digest, ahead of the scheduler.
+    with trace.span("digest") as span:
+        digest = match_digest(corpus, query, metadata_filter)
+        span["hit"] = digest is not None
+    if digest is not None:
+        with trace.span("condense", history_messages=len(chat_history)) as span:
+            _, condense_path = _condense(query, chat_history, metadata_filter, standalone)
+            span["path"] = condense_path
+        yield from _ready_events(
+            query, format_digest(digest, query), digest_sources(digest), condense_path, ROUTE_DIGEST, trace
+        )
+        return
+    # A follow-up that must be rephrased is admitted before the rephrase call. Any other request
+    # is looked up and probed against the answer cache first, so a cache hit only waits for the
+    # small reservation covering its probe embedding, never behind whole answers.
+    ticket = None
+    if SCHEDULER_CONFIG["ENABLED"] and standalone is None and needs_rephrase(query, chat_history, metadata_filter):
+        with trace.span("admission", priority=priority) as span:
+            ticket = yield from _admit(
+                corpus, query, chat_history, priority, rephrase=True, embeds=_query_embeddings(corpus)
+            )
+            span["reserved_tokens"] = ticket.tokens
+    with trace.span("condense", history_messages=len(chat_history)) as span:
+        question, condense_path = _condense(query, chat_history, metadata_filter, standalone)
+        span["path"] = condense_path
+
+    # Orders named outright are fetched whole: no embedding, answer cache or vector search.
+    with trace.span("lookup") as span:
+        documents, route = _lookup(corpus, question, metadata_filter)
+        span["route"] = route
+    query_vector = None
+    # Whether the probe's embedding was budgeted on a ticket of its own.
+    embed_ticketed = False
+    if documents is None and ANSWER_CACHE_CONFIG["ENABLED"]:
+        # The embedding cache makes this vector free to reuse for the vector search.
+        with trace.span("embed", model=corpus["embedding_model"]):
+            if ticket is None:
+                with scheduled(1, count_tokens(question), priority):
+                    query_vector = get_embeddings(corpus["embedding_model"]).embed_query(question)
+                embed_ticketed = SCHEDULER_CONFIG["ENABLED"]
+            else:
+                query_vector = get_embeddings(corpus["embedding_model"]).embed_query(question)
+        with trace.span("answer_cache") as span:
+            cached = answer_cache.lookup(corpus["name"], metadata_filter, query_vector, API_CONFIG["INDEX_VERSION"])
+            span["hit"] = cached is not None
+        if cached is not None:
+            _settle(ticket, query, chat_history, condense_path, embeds=1)
+            yield from _ready_events(
+                query, cached["result"], cached["source_documents"], condense_path, ROUTE_ANSWER_CACHE, trace
+            )
+            return
+    if SCHEDULER_CONFIG["ENABLED"] and ticket is None:
+        with trace.span("admission", priority=priority) as span:
+            # The probe's embedding, if any, was budgeted on its own ticket.
+            embeds = _query_embeddings(corpus) - (query_vector is not None) if documents is None else 0
+            ticket = yield from _admit(corpus, query, chat_history, priority, rephrase=False, embeds=embeds)
+            span["reserved_tokens"] = ticket.tokens
+
+    if documents is None:
+        with trace.span("retrieve", k=corpus["search_kwargs"].get("k"), filter=metadata_filter) as span:
+            # Without a complete catalog, years and other catalog-only conditions cannot narrow the search.
+            dropped = dropped_conditions(_catalog(corpus), metadata_filter)
+            if dropped:
+                span["dropped_filter"] = trace.attributes["dropped_filter"] = dropped
+            documents = retrieve(corpus, question, metadata_filter)
+            span["documents"] = len(documents)
+    with trace.span("context") as span:
+        documents, context = _assemble(corpus, documents)
+        span.update(context or {})
+    trace.attributes["route"] = route
+    yield {
+        "type": "sources", "source_documents": documents, "condense_path": condense_path,
+        "route": route, "context": context,
+    }
+
+    tokens = []
+    with trace.span("generate", prompt=corpus["prompt_name"]) as span:
+        generate_start = time.perf_counter()
+        for token in _generate(
+            corpus["prompt_name"], _chain_input(corpus, query, chat_history, documents)
+        ):
+            if not tokens:
+                span["first_token_ms"] = round((time.perf_counter() - generate_start) * 1000, 3)
+            tokens.append(token)
+            yield {"type": "token", "text": token, "condense_path": condense_path}
+        answer = "".join(tokens)
+        span["output_tokens"] = count_tokens(answer)
+    _store_answer(corpus, metadata_filter, query_vector, answer, documents)
+    embeds = _query_embeddings(corpus) - embed_ticketed if route == ROUTE_VECTOR else 0
+    _settle(ticket, query, chat_history, condense_path, embeds, documents, answer)
+
+    yield {
+        "type": "done", "query": query, "result": answer,
+        "source_documents": documents, "condense_path": condense_path, "route": route, "context": context,
+        "trace": trace.finish(),
+    }
+
+
+def stream_pipeline(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    standalone: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream an answer, sharing the run of an identical request that is already in flight.
+
+    Events are the same as _stream_pipeline's; the request that starts a
+    run sets its scheduling priority. A coalesced request gets
+    its own "done" event with its query and a trace holding one
+    "coalesced" span that names the leading request.
+    """
+    if not SINGLE_FLIGHT_CONFIG["ENABLED"]:
+        yield from _stream_pipeline(corpus, query, chat_history, metadata_filter, priority, standalone)
+        return
+
+    events, shared = flights.join(
+        flight_key(corpus, query, chat_history, metadata_filter),
+        lambda: _stream_pipeline(corpus, query, chat_history, metadata_filter, priority, standalone),
+    )
+    if not shared:
+        yield from events
+        return
+
+    trace = Trace(corpus["name"], query)
+    trace.attributes["filter"] = metadata_filter
+    done = None
+    with trace.span("coalesced") as span:
+        for event in events:
+            if event["type"] == "done":
+                done = event
+                span["leader"] = event["trace"]["request_id"]
+            else:
+                yield event
+    trace.attributes["route"] = done.get("route", ROUTE_VECTOR)
+    yield dict(done, query=query, trace=trace.finish())
+
+
+def run_pipeline(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    standalone: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run stream_pipeline to completion and return its final payload."""
+    for event in stream_pipeline(corpus, query, chat_history, metadata_filter, priority, standalone):
+        if event["type"] == "done":
+            return final_payload(event)
+
+
+async def astream_pipeline(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    standalone: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of stream_pipeline: the same run, stepped on a worker thread.
+
+    Events are handed to the event loop as they are produced. Closing the
+    iterator early stops the run at its next event.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Tuple[Optional[Dict[str, Any]], Optional[BaseException]]]" = asyncio.Queue()
+    stopped = threading.Event()
+
+    def post(item: Tuple[Optional[Dict[str, Any]], Optional[BaseException]]) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            pass  # the loop has already closed
+
+    def produce() -> None:
+        events = stream_pipeline(corpus, query, chat_history, metadata_filter, priority, standalone)
+        try:
+            for event in events:
+                if stopped.is_set():
+                    break
+                post((event, None))
+        except BaseException as e:
+            post((None, e))
+            return
+        finally:
+            events.close()
+        post((None, None))
+
+    threading.Thread(target=produce, name="pipeline", daemon=True).start()
+    try:
+        while True:
+            event, error = await queue.get()
+            if error is not None:
+                raise error
+            if event is None:
+                return
+            yield event
+    finally:
+        stopped.set()
+
+
+async def arun_pipeline(
+    corpus: Dict[str, Any],
+    query: str,
+    chat_history: List[Any],
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    standalone: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run astream_pipeline to completion and return its final payload."""
+    async for event in astream_pipeline(corpus, query, chat_history, metadata_filter, priority, standalone):
+        if event["type"] == "done":
+            return final_payload(event)
+
+
+def corpus_entrypoints(corpus: Dict[str, Any]) -> Tuple[Callable[..., Any], ...]:
+    """The run_llm, arun_llm, stream_llm and astream_llm functions a corpus module exposes.
+
+    Each derives the request's metadata filter with the corpus's "filters"
+    callable, if it has one, and logs a failure before re-raising it.
+    """
+    def filters(query: str) -> Optional[Dict[str, Any]]:
+        return corpus["filters"](query) if corpus.get("filters") else None
+
+    def run_llm(
+        query: str, chat_history: List[Dict[str, Any]] = [], priority: int = PRIORITY_INTERACTIVE
+    ) -> Dict[str, Any]:
+        """Run the LLM with the given query and chat history."""
+        try:
+            return run_pipeline(corpus, query, chat_history, filters(query), priority)
+        except Exception as e:
+            print(f"Error in run_llm: {str(e)}")
+            raise
+
+    async def arun_llm(
+        query: str, chat_history: List[Dict[str, Any]] = [], priority: int = PRIORITY_INTERACTIVE
+    ) -> Dict[str, Any]:
+        """Async variant of run_llm."""
+        try:
+            return await arun_pipeline(corpus, query, chat_history, filters(query), priority)
+        except Exception as e:
+            print(f"Error in arun_llm: {str(e)}")
+            raise
+
+    def stream_llm(
+        query: str, chat_history: List[Dict[str, Any]] = [], priority: int = PRIORITY_INTERACTIVE
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream sources and then answer tokens for the given query and chat history."""
+        try:
+            yield from stream_pipeline(corpus, query, chat_history, filters(query), priority)
+        except Exception as e:
+            print(f"Error in stream_llm: {str(e)}")
+            raise
+
+    async def astream_llm(
+        query: str, chat_history: List[Dict[str, Any]] = [], priority: int = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async variant of stream_llm."""
+        try:
+            async for event in astream_pipeline(corpus, query, chat_history, filters(query), priority):
+                yield event
+        except Exception as e:
+            print(f"Error in astream_llm: {str(e)}")
+            raise
+
+    return run_llm, arun_llm, stream_llm, astream_llm
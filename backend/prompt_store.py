@@ -0,0 +1,175 @@
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+load_dotenv()
+
+from langchain import hub
+from langchain_core.load import dumpd, load
+from config import PROMPT_CONFIG
+
+# Constants
+SNAPSHOT_FORMAT_VERSION = 1
+
+# name -> {"prompt", "version", "fetched_at"}
+_prompts: Dict[str, Dict[str, Any]] = {}
+_refreshing: set = set()
+# name -> time.time() before which a failed refresh is not retried
+_retry_after: Dict[str, float] = {}
+_lock = threading.RLock()
+
+
+def snapshot_path(name: str) -> str:
+    """Get the snapshot file path for a hub prompt name."""
+    return os.path.join(PROMPT_CONFIG["SNAPSHOT_DIR"], name.replace("/", "__") + ".json")
+
+
+def _make_record(name: str, prompt: Any, fetched_at: float) -> Dict[str, Any]:
+    """Serialize a prompt into a versioned snapshot record."""
+    payload = dumpd(prompt)
+    version = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "name": name,
+        "version": version,
+        "fetched_at": fetched_at,
+        "prompt": payload,
+    }
+
+
+def save_snapshot(record: Dict[str, Any]) -> None:
+    """Write a snapshot record to disk atomically."""
+    path = snapshot_path(record["name"])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(name: str) -> Optional[Dict[str, Any]]:
+    """Load a prompt snapshot from disk, or None if it is missing or unreadable."""
+    path = snapshot_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            print(f"Ignoring prompt snapshot {path}: unsupported format version")
+            return None
+        return {
+            "prompt": load(record["prompt"]),
+            "version": record["version"],
+            "fetched_at": record["fetched_at"],
+        }
+    except Exception as e:
+        print(f"Error loading prompt snapshot {path}: {str(e)}")
+        return None
+
+
+def pull_prompt(name: str) -> Dict[str, Any]:
+    """Pull a prompt from LangChain Hub, snapshot it and make it current."""
+    prompt = hub.pull(name)
+    record = _make_record(name, prompt, time.time())
+    save_snapshot(record)
+    entry = {"prompt": prompt, "version": record["version"], "fetched_at": record["fetched_at"]}
+    with _lock:
+        _prompts[name] = entry
+    return entry
+
+
+def _refresh(name: str) -> None:
+    """Background refresh worker for a single prompt."""
+    try:
+        pull_prompt(name)
+    except Exception as e:
+        print(f"Error refreshing prompt {name}: {str(e)}")
+        with _lock:
+            _retry_after[name] = time.time() + PROMPT_CONFIG["RETRY_SECONDS"]
+    finally:
+        with _lock:
+            _refreshing.discard(name)
+
+
+def _schedule_refresh(name: str) -> None:
+    """Refresh a stale prompt in the background, at most once at a time per name.
+
+    After a failed refresh the stale snapshot keeps being served without new
+    attempts for RETRY_SECONDS, so a hub outage does not start a thread per request.
+    """
+    if PROMPT_CONFIG["OFFLINE"]:
+        return
+    with _lock:
+        if name in _refreshing or time.time() < _retry_after.get(name, 0):
+            return
+        _refreshing.add(name)
+        _retry_after.pop(name, None)
+    threading.Thread(target=_refresh, args=(name,), daemon=True).start()
+
+
+def _get_entry(name: str) -> Dict[str, Any]:
+    """Get the current entry for a prompt: memory, then disk, then the hub."""
+    with _lock:
+        entry = _prompts.get(name)
+        if entry is None:
+            entry = load_snapshot(name)
+            if entry is not None:
+                _prompts[name] = entry
+
+    if entry is None:
+        if PROMPT_CONFIG["OFFLINE"]:
+            raise FileNotFoundError(f"No snapshot for prompt {name} at {snapshot_path(name)} and offline mode is on")
+        return pull_prompt(name)
+
+    if time.time() - entry["fetched_at"] > PROMPT_CONFIG["TTL_SECONDS"]:
+        _schedule_refresh(name)
+    return entry
+
+
+def get_prompt(name: str) -> Any:
+    """Get a prompt, served from the local snapshot whenever one exists."""
+    return _get_entry(name)["prompt"]
+
+
+def get_prompt_version(name: str) -> str:
+    """Get the content version of the prompt currently being served."""
+    return _get_entry(name)["version"]
+
+
+def register_prompt(name: str, prompt: Any) -> None:
+    """Serve a prompt defined in code under name; it is never pulled or refreshed."""
+    record = _make_record(name, prompt, float("inf"))
+    with _lock:
+        _prompts[name] = {"prompt": prompt, "version": record["version"], "fetched_at": record["fetched_at"]}
+
+
+def has_prompt(name: str) -> bool:
+    """Whether a prompt is already being served from memory."""
+    with _lock:
+        return name in _prompts
+
+
+def load_prompts(names: Iterable[str]) -> None:
+    """Load prompts at startup so the first request never waits on the hub."""
+    for name in names:
+        _get_entry(name)
+
+
+def clear_prompts() -> None:
+    """Forget all in-memory prompts; snapshots on disk are kept."""
+    with _lock:
+        _prompts.clear()
+
+
+if __name__ == "__main__":
+    # Refresh every snapshot, e.g. before shipping to an air-gapped deployment.
+    from backend import core, projcore
+    from backend.registry import REPHRASE_PROMPT_NAME
+
+    for prompt_name in (core.PROMPT_NAME, projcore.PROMPT_NAME, REPHRASE_PROMPT_NAME):
+        snapshot = pull_prompt(prompt_name)
+        print(f"Snapshotted {prompt_name} version {snapshot['version']} to {snapshot_path(prompt_name)}")
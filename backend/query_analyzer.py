@@ -0,0 +1,169 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CATALOG_CONFIG, QUERY_CONFIG
+
+# Declarative taxonomy of the metadata the executive order index can be
+# filtered on, compiled into the matcher below once at import time. It lists
+# the flags the query filters have always used; the index may carry more
+# category flags, which need their field, value and search terms added here.
+TAXONOMY = {
+    "presidents": {
+        "Biden": ["biden"],
+        "Trump": ["trump"],
+    },
+    "categories": [
+        {
+            "field": "Immigration & Border Control",
+            "value": 1,
+            "terms": ["immigration", "immigrant", "border security", "asylum", "deportation"],
+        },
+        {
+            "field": "constitutional_impact",
+            "value": "Y",
+            "terms": ["constitution", "unconstitutional"],
+        },
+    ],
+}
+
+_YEAR = r"(?:19|20)\d{2}"
+_EO_NUMBER = r"\d{4,5}"
+# Phrasing that ties a year to when orders were signed ("signed in 2020",
+# "signed by Biden between 2021 and 2022", "orders from 2019"), checked just
+# before a year match. Bare years ("the 2020 census", "Project 2025") are not.
+_SIGNED_BEFORE = re.compile(
+    r"(?:\b(?:signed|issued|enacted)(?:\s+by\s+(?:president\s+)?\w+)?|\borders?)"
+    r"\s+(?:(?:in|during|from|of)\s+)?$",
+    re.IGNORECASE,
+)
+_SIGNED_WINDOW = 60
+
+
+def _term_pattern(term: str) -> str:
+    """Match a term at a word start, allowing suffixes (biden -> bidens)."""
+    return r"\b" + r"\s+".join(re.escape(word) for word in term.split()) + r"\w*"
+
+
+def _compile(taxonomy: Dict[str, Any]) -> Tuple["re.Pattern[str]", Dict[str, Tuple[str, Any]]]:
+    """Compile the taxonomy, EO numbers and year ranges into one alternation.
+
+    Alternatives are ordered so that the longer constructs (EO number lists,
+    year ranges) win over the bare years they contain.
+    """
+    groups: Dict[str, Tuple[str, Any]] = {}
+    alternatives = [
+        rf"\b(?:executive\s+orders?|e\.\s?o\.|eo)\s*(?:no\.?|number|#)?\s*"
+        rf"(?P<eo>{_EO_NUMBER}(?:\s*(?:,|and|&|or)\s*(?:no\.?\s*)?{_EO_NUMBER})*)\b",
+        rf"\b(?:from|between)\s+(?P<range_start>{_YEAR})\s+(?:to|and|through|-)\s+(?P<range_end>{_YEAR})\b",
+        rf"\b(?P<span_start>{_YEAR})\s*(?:-|–|to)\s*(?P<span_end>{_YEAR})\b",
+        rf"\b(?:since|after)\s+(?P<since>{_YEAR})\b",
+        rf"\bbefore\s+(?P<before>{_YEAR})\b",
+        rf"\b(?P<year>{_YEAR})\b",
+    ]
+    for president, terms in taxonomy["presidents"].items():
+        name = f"p{len(groups)}"
+        groups[name] = ("president", president)
+        alternatives.append(f"(?P<{name}>{'|'.join(_term_pattern(term) for term in terms)})")
+    for category in taxonomy["categories"]:
+        name = f"c{len(groups)}"
+        groups[name] = ("category", category)
+        alternatives.append(f"(?P<{name}>{'|'.join(_term_pattern(term) for term in category['terms'])})")
+    return re.compile("|".join(alternatives), re.IGNORECASE), groups
+
+
+_MATCHER, _GROUPS = _compile(TAXONOMY)
+
+
+def _eq_or_in(values: List[Any]) -> Dict[str, Any]:
+    return {"$eq": values[0]} if len(values) == 1 else {"$in": values}
+
+
+def analyze_query(query: str) -> Dict[str, Any]:
+    """Extract every filterable fact from a query in a single regex pass.
+
+    Returns the executive order numbers, presidents, categories and year range
+    found, plus the Pinecone-style metadata filter they imply. With a year
+    field on the vectors every year is a filter; through the catalog only
+    years phrased as signing dates are.
+    """
+    explicit_years = QUERY_CONFIG["YEAR_ON_VECTORS"]
+    numbers: List[int] = []
+    presidents: List[str] = []
+    categories: List[Dict[str, Any]] = []
+    year_start: Optional[int] = None
+    year_end: Optional[int] = None
+
+    for match in _MATCHER.finditer(query):
+        kind = match.lastgroup
+        if kind in ("range_end", "span_end", "since", "before", "year") and not (
+            explicit_years or _SIGNED_BEFORE.search(query, max(0, match.start() - _SIGNED_WINDOW), match.start())
+        ):
+            continue
+        if kind == "eo":
+            for number in re.findall(_EO_NUMBER, match.group("eo")):
+                if int(number) not in numbers:
+                    numbers.append(int(number))
+        elif kind in ("range_end", "span_end"):
+            prefix = kind.split("_")[0]
+            year_start, year_end = int(match.group(f"{prefix}_start")), int(match.group(kind))
+        elif kind == "since":
+            year_start = int(match.group("since"))
+        elif kind == "before":
+            year_end = int(match.group("before")) - 1
+        elif kind == "year":
+            year = int(match.group("year"))
+            year_start = year if year_start is None else min(year_start, year)
+            year_end = year if year_end is None else max(year_end, year)
+        elif kind in _GROUPS:
+            group_kind, payload = _GROUPS[kind]
+            if group_kind == "president" and payload not in presidents:
+                presidents.append(payload)
+            elif group_kind == "category" and payload not in categories:
+                categories.append(payload)
+
+    filters: Dict[str, Any] = {}
+    if numbers:
+        filters["executive_order_number"] = _eq_or_in(numbers)
+    if presidents:
+        filters["president"] = _eq_or_in(presidents)
+    for category in categories:
+        filters[category["field"]] = {"$eq": category["value"]}
+    # Without a year on the vectors, the catalog resolves years from signing dates.
+    year_field = QUERY_CONFIG["YEAR_FIELD"] if explicit_years or CATALOG_CONFIG["ENABLED"] else None
+    if year_field and (year_start is not None or year_end is not None):
+        year_range = {}
+        if year_start is not None:
+            year_range["$gte"] = year_start
+        if year_end is not None:
+            year_range["$lte"] = year_end
+        filters[year_field] = year_range
+
+    return {
+        "executive_order_numbers": numbers,
+        "presidents": presidents,
+        "categories": [category["field"] for category in categories],
+        "year_range": (year_start, year_end) if year_start is not None or year_end is not None else None,
+        "filter": filters,
+    }
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: per-query analysis cost over the example questions.
+    import timeit
+
+    example_queries = [
+        "Based on the information provided, what is president Bidens stance on immigration?",
+        "Summarize executive order 14257, and provide a summary and sentiment analysis",
+        "What are the potential policy implications of Executive Order 13988 regarding nondiscrimination?",
+        "What were the significant historical developments or prior policies concerning Reciprocal Tariffs that preceded the Executive Order 14257?",
+        "What are the constitutional implications of Executive Order 14160?",
+        "Compare executive orders 14148, 14151 and 14173 signed by Trump between 2024 and 2025",
+        "List all Biden immigration orders in 2022",
+        "How does Project 2025 treat the 2020 census?",
+    ]
+    for example in example_queries:
+        print(f"{example}\n  -> {analyze_query(example)['filter']}")
+
+    runs = 20000
+    seconds = timeit.timeit(lambda: [analyze_query(q) for q in example_queries], number=runs)
+    print(f"\nanalyze_query: {seconds / (runs * len(example_queries)) * 1e6:.2f} us/query")
@@ -0,0 +1,262 @@
+from dotenv import load_dotenv
+import asyncio
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+load_dotenv()
+
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.embeddings import Embeddings
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import ConfigurableField, Runnable
+from langchain_core.vectorstores import VectorStore
+from langchain_pinecone import PineconeVectorStore
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from backend import prompt_store
+from backend.catalog import MinimalPayloadStore, OrderCatalog
+from backend.embedding_cache import CachedEmbeddings
+from backend.hybrid import HybridRetriever
+from backend.lexical_index import BM25Index
+from backend.local_store import LocalVectorStore
+from config import API_CONFIG, CATALOG_CONFIG, CONDENSE_CONFIG, EMBEDDING_CACHE_CONFIG, HYBRID_CONFIG
+
+# Constants
+REPHRASE_PROMPT_NAME = "langchain-ai/chat-langchain-rephrase"
+SEARCH_KWARGS_FIELD = "search_kwargs"
+
+# Every component is cached under its own key so that a config change only
+# rebuilds the pieces that depend on it (e.g. a new prompt keeps the warm
+# embeddings, vector store and chat client).
+_components: Dict[Tuple[Any, ...], Any] = {}
+_lock = threading.RLock()
+
+
+def _freeze(value: Any) -> str:
+    """Turn a (possibly nested) kwargs dict into a stable hashable key."""
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _get_or_build(key: Tuple[Any, ...], builder: Callable[[], Any]) -> Any:
+    """Return the cached component for key, building it on first use."""
+    with _lock:
+        component = _components.get(key)
+        if component is None:
+            component = builder()
+            _components[key] = component
+        return component
+
+
+def get_embeddings(model: str) -> Embeddings:
+    """Get the shared embeddings client for a model, behind the query cache when enabled."""
+    def build() -> Embeddings:
+        embeddings = OpenAIEmbeddings(model=model)
+        if not EMBEDDING_CACHE_CONFIG["ENABLED"]:
+            return embeddings
+        return CachedEmbeddings(
+            embeddings,
+            model=model,
+            max_size=EMBEDDING_CACHE_CONFIG["MEMORY_SIZE"],
+            cache_dir=EMBEDDING_CACHE_CONFIG["DIR"],
+        )
+
+    return _get_or_build(("embeddings", model), build)
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the long-lived event loop that sync callers run async searches on.
+
+    The shared clients keep async connections bound to the loop that first
+    used them, so a new loop per question (asyncio.run) would strand them.
+    """
+    def build() -> asyncio.AbstractEventLoop:
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="registry-event-loop", daemon=True).start()
+        return loop
+
+    return _get_or_build(("event_loop",), build)
+
+
+def get_vectorstore(index_name: str, embedding_model: str) -> VectorStore:
+    """Get the shared vector store for an index/embedding model pair.
+
+    API_CONFIG["VECTOR_STORE"] selects Pinecone or the local in-process index.
+    """
+    def build() -> VectorStore:
+        if API_CONFIG["VECTOR_STORE"] == "local":
+            path = os.path.join(API_CONFIG["LOCAL_INDEX_DIR"], index_name)
+            return LocalVectorStore.load(path, get_embeddings(embedding_model))
+        return PineconeVectorStore(index_name=index_name, embedding=get_embeddings(embedding_model))
+
+    return _get_or_build(("vectorstore", index_name, embedding_model), build)
+
+
+def lexical_index_path(index_name: str) -> str:
+    """Get the directory holding an index's BM25 lexical index."""
+    return os.path.join(HYBRID_CONFIG["INDEX_DIR"], index_name)
+
+
+def get_lexical_index(index_name: str) -> Optional[BM25Index]:
+    """Get the shared BM25 index for an index name, or None if hybrid search is off or unbuilt."""
+    if not HYBRID_CONFIG["ENABLED"]:
+        return None
+    key = ("lexical", index_name)
+    with _lock:
+        if key not in _components:
+            _components[key] = BM25Index.load(
+                lexical_index_path(index_name), k1=HYBRID_CONFIG["BM25_K1"], b=HYBRID_CONFIG["BM25_B"]
+            )
+        return _components[key]
+
+
+def catalog_path(index_name: str) -> str:
+    """Get the SQLite file holding an index's executive order catalog."""
+    return os.path.join(CATALOG_CONFIG["DIR"], f"{index_name}.sqlite3")
+
+
+def get_catalog(index_name: str) -> Optional[OrderCatalog]:
+    """Get the shared in-memory order catalog for an index, or None if it is off or unbuilt."""
+    if not CATALOG_CONFIG["ENABLED"]:
+        return None
+    key = ("catalog", index_name)
+    with _lock:
+        if key not in _components:
+            _components[key] = OrderCatalog.load(catalog_path(index_name))
+        return _components[key]
+
+
+def get_corpus_catalog(corpus: Dict[str, Any]) -> Optional[OrderCatalog]:
+    """Get the order catalog a corpus filters through: its own index's, or that of the index its "catalog" names."""
+    index_name = corpus.get("catalog")
+    if not index_name:
+        return None
+    return get_catalog(corpus["index_name"] if index_name is True else index_name)
+
+
+def get_chat(model: Optional[str] = None, temperature: float = 0) -> ChatOpenAI:
+    """Get the shared chat model client."""
+    def build() -> ChatOpenAI:
+        if model:
+            return ChatOpenAI(model=model, verbose=True, temperature=temperature)
+        return ChatOpenAI(verbose=True, temperature=temperature)
+
+    return _get_or_build(("chat", model, temperature), build)
+
+
+def get_prompt(name: str) -> Any:
+    """Get a LangChain Hub prompt from the local snapshot store."""
+    return prompt_store.get_prompt(name)
+
+
+def _get_or_build_versioned(key: Tuple[Any, ...], version: str, builder: Callable[[], Any]) -> Any:
+    """Like _get_or_build, but rebuild when the component's source version changes."""
+    with _lock:
+        cached = _components.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, builder())
+            _components[key] = cached
+        return cached[1]
+
+
+def get_retriever(index_name: str, embedding_model: str, search_kwargs: Dict[str, Any]) -> Runnable:
+    """Get the warm retriever for an index.
+
+    Indexes with a BM25 lexical index get a HybridRetriever; others a plain
+    vector store retriever. Pinecone indexes with an order catalog are
+    searched for ids only, with chunks hydrated from the catalog. The search kwargs are exposed as a configurable
+    field so the per-request metadata filter can be supplied through
+    ``search_config`` without rebuilding anything.
+    """
+    def build() -> Runnable:
+        docsearch = get_vectorstore(index_name, embedding_model)
+        catalog = get_catalog(index_name)
+        if catalog is not None and CATALOG_CONFIG["MINIMAL_PAYLOADS"] and isinstance(docsearch, PineconeVectorStore):
+            docsearch = MinimalPayloadStore(docsearch, catalog)
+        lexical_index = get_lexical_index(index_name)
+        if lexical_index is not None:
+            retriever = HybridRetriever(
+                vectorstore=docsearch, lexical_index=lexical_index, search_kwargs=dict(search_kwargs)
+            )
+        else:
+            retriever = docsearch.as_retriever(search_kwargs=dict(search_kwargs))
+        return retriever.configurable_fields(
+            search_kwargs=ConfigurableField(id=SEARCH_KWARGS_FIELD)
+        )
+
+    return _get_or_build(("retriever", index_name, embedding_model, _freeze(search_kwargs)), build)
+
+
+def get_rephrase_chain(rephrase_prompt_name: str = REPHRASE_PROMPT_NAME, model: Optional[str] = None) -> Runnable:
+    """Get the chain that condenses chat history and a follow-up into a standalone question.
+
+    model selects a (typically cheaper) chat model for rephrasing; None uses
+    the default chat model.
+    """
+    return _get_or_build_versioned(
+        ("rephrase", rephrase_prompt_name, model),
+        prompt_store.get_prompt_version(rephrase_prompt_name),
+        lambda: get_prompt(rephrase_prompt_name) | get_chat(model) | StrOutputParser(),
+    )
+
+
+def get_summary_chain(summary_prompt_name: str, model: Optional[str] = None) -> Runnable:
+    """Get the chain that folds an exchange into a running conversation summary."""
+    return _get_or_build_versioned(
+        ("summary", summary_prompt_name, model),
+        prompt_store.get_prompt_version(summary_prompt_name),
+        lambda: get_prompt(summary_prompt_name) | get_chat(model) | StrOutputParser(),
+    )
+
+
+def get_digest_chain(digest_prompt_name: str, model: Optional[str] = None) -> Runnable:
+    """Get the chain that writes an executive order's precomputed digest."""
+    return _get_or_build_versioned(
+        ("digest", digest_prompt_name, model),
+        prompt_store.get_prompt_version(digest_prompt_name),
+        lambda: get_prompt(digest_prompt_name) | get_chat(model) | StrOutputParser(),
+    )
+
+
+def get_stuff_chain(prompt_name: str) -> Runnable:
+    """Get the chain that answers from retrieved documents.
+
+    Prompt versions are tracked, so a background prompt refresh swaps in a new
+    chain on the next request while everything else stays warm.
+    """
+    return _get_or_build_versioned(
+        ("stuff", prompt_name),
+        prompt_store.get_prompt_version(prompt_name),
+        lambda: create_stuff_documents_chain(get_chat(), get_prompt(prompt_name)),
+    )
+
+
+def warm_corpus(corpus: Dict[str, Any]) -> None:
+    """Build every component a corpus pipeline needs ahead of the first question."""
+    get_corpus_catalog(corpus)
+    get_retriever(corpus["index_name"], corpus["embedding_model"], corpus["search_kwargs"])
+    get_rephrase_chain(model=CONDENSE_CONFIG["MODEL"])
+    get_stuff_chain(corpus["prompt_name"])
+
+
+def search_config(search_kwargs: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the invoke config that applies a per-request metadata filter."""
+    request_kwargs = dict(search_kwargs)
+    if metadata_filter:
+        request_kwargs["filter"] = metadata_filter
+    return {"configurable": {SEARCH_KWARGS_FIELD: request_kwargs}}
+
+
+def set_component(key: Tuple[Any, ...], component: Any) -> None:
+    """Install a prebuilt component under its registry key, e.g. a local stand-in for benchmarks.
+
+    Keys are ("embeddings", model), ("vectorstore", index_name, model) and
+    ("chat", model, temperature).
+    """
+    with _lock:
+        _components[key] = component
+
+
+def clear_registry() -> None:
+    """Drop every cached component so the next request rebuilds from scratch."""
+    with _lock:
+        _components.clear()
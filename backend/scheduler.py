@@ -0,0 +1,210 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Priorities: lower is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class QueueFullError(Exception):
+    """Raised when the admission queue is at capacity."""
+
+
+class TokenBucket:
+    """Refilling budget of units per minute.
+
+    A bucket holds at most ``capacity`` units and refills continuously. A
+    take larger than the capacity is allowed once the bucket is full and
+    leaves it in debt, so oversized requests are delayed rather than
+    starved. A rate of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def available(self, now: float) -> float:
+        """Units in the bucket right now; negative while in debt or paused."""
+        if self.rate:
+            self._refill(now)
+        return self.level
+
+    def take(self, amount: float) -> None:
+        if self.rate:
+            self.level -= amount
+
+    def give(self, amount: float) -> None:
+        if self.rate:
+            self.level = min(self.capacity, self.level + amount)
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Empty the bucket so nothing is admitted for about seconds."""
+        if self.rate:
+            self._refill(now)
+            self.level = min(self.level, -seconds * self.rate)
+
+
+class Ticket:
+    """A request's place in the admission queue and the budget it reserved."""
+
+    def __init__(self, priority: int, sequence: int, requests: int, tokens: int):
+        self.priority = priority
+        self.sequence = sequence
+        self.requests = requests
+        self.tokens = tokens
+        self.admitted = False
+        self.settled = False
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an exception is an HTTP 429 from the OpenAI API."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """The Retry-After delay an API error asks for, if any."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    """Process-wide admission control for OpenAI calls.
+
+    Requests reserve an estimated number of API requests and tokens and
+    wait in a bounded priority queue until both token buckets can cover
+    them. Only the head of the queue is ever admitted, so large requests
+    are not starved by small ones and lower priorities (batch jobs) never
+    overtake interactive questions. Waiters poll ``position`` to show users
+    where they are in line. After a request finishes, ``settle`` corrects
+    the buckets from the estimate to what was actually used.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_queue: int = 100):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue
+        self._queue: List[Ticket] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+
+    def submit(self, requests: int, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> Ticket:
+        """Queue a request, raising QueueFullError when the queue is at capacity."""
+        with self._condition:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"{len(self._queue)} requests are already waiting; try again shortly")
+            ticket = Ticket(priority, next(self._sequence), requests, tokens)
+            heapq.heappush(self._queue, ticket)
+            self._dispatch()
+            return ticket
+
+    def _dispatch(self) -> float:
+        """Admit queued tickets from the head while budget allows; return seconds until the head fits."""
+        while self._queue:
+            head = self._queue[0]
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(head.requests, now), self.tokens.wait_time(head.tokens, now))
+            if wait > 0:
+                return wait
+            heapq.heappop(self._queue)
+            self.requests.take(head.requests)
+            self.tokens.take(head.tokens)
+            head.admitted = True
+            self.admitted += 1
+            self._condition.notify_all()
+        return 0.0
+
+    def wait(self, ticket: Ticket, timeout: float) -> bool:
+        """Block until the ticket is admitted or timeout passes; True once admitted."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not ticket.admitted:
+                head_wait = self._dispatch()
+                remaining = deadline - time.monotonic()
+                if ticket.admitted or remaining <= 0:
+                    break
+                self._condition.wait(min(remaining, head_wait) if head_wait else remaining)
+            return ticket.admitted
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place in line, or 0 once admitted."""
+        with self._condition:
+            if ticket.admitted:
+                return 0
+            return 1 + sum(1 for other in self._queue if other < ticket)
+
+    def cancel(self, ticket: Ticket) -> None:
+        """Leave the queue, or return the reservation of an admitted but unused ticket."""
+        with self._condition:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            elif ticket.admitted and not ticket.settled:
+                self.settle(ticket, 0, 0)
+            self._condition.notify_all()
+
+    def settle(self, ticket: Ticket, requests: int, tokens: int) -> None:
+        """Replace an admitted ticket's estimate with what it actually used."""
+        with self._condition:
+            if ticket.settled:
+                return
+            ticket.settled = True
+            self.requests.give(ticket.requests - requests)
+            self.tokens.give(ticket.tokens - tokens)
+            self._condition.notify_all()
+
+    def backoff(self, error: Exception, attempt: int, base_seconds: float, max_seconds: float) -> float:
+        """Record a 429 and return how long the caller should sleep before retrying.
+
+        The buckets are emptied for the server's Retry-After (or the
+        exponential backoff), so every session pauses together instead of
+        retrying into the limit; the caller's own delay adds full jitter on
+        top so retries spread out once the pause ends.
+        """
+        pause = retry_after(error) or min(max_seconds, base_seconds * 2 ** attempt)
+        with self._condition:
+            self.rate_limited += 1
+            now = time.monotonic()
+            self.requests.pause(pause, now)
+            self.tokens.pause(pause, now)
+        return pause + random.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, counters and the current bucket levels."""
+        with self._condition:
+            now = time.monotonic()
+            return {
+                "queued": len(self._queue),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "rate_limited": self.rate_limited,
+                "requests_available": round(self.requests.available(now), 1),
+                "tokens_available": round(self.tokens.available(now), 1),
+            }
@@ -0,0 +1,84 @@
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class _Flight:
+    """One in-flight computation and the events it has produced so far."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.error: Optional[Exception] = None
+        self.done = False
+        self.condition = threading.Condition()
+
+
+class SingleFlight:
+    """Coalesce concurrent identical event streams into one computation.
+
+    The first caller for a key starts the producer on a background thread;
+    every caller for that key, the first included, replays the producer's
+    events from the beginning as they arrive. A caller that stops reading
+    early does not affect the others, and the producer always runs to
+    completion. Keys are forgotten as soon as their producer finishes, so
+    only requests that overlap in time are coalesced.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _produce(self, key: str, flight: _Flight, produce: Callable[[], Iterator[Any]]) -> None:
+        try:
+            for event in produce():
+                with flight.condition:
+                    flight.events.append(event)
+                    flight.condition.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
+
+    def _replay(self, flight: _Flight) -> Iterator[Any]:
+        position = 0
+        while True:
+            with flight.condition:
+                while position >= len(flight.events) and not flight.done:
+                    flight.condition.wait()
+                pending = flight.events[position:]
+                finished = flight.done
+            yield from pending
+            position += len(pending)
+            if finished and position >= len(flight.events):
+                break
+        if flight.error is not None:
+            raise flight.error
+
+    def join(self, key: str, produce: Callable[[], Iterator[Any]]) -> Tuple[Iterator[Any], bool]:
+        """Subscribe to the flight for key, starting produce() if none is running.
+
+        Returns (events, shared) where shared is False for the caller that
+        started the flight.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return self._replay(flight), True
+            flight = self._flights[key] = _Flight()
+            self.leaders += 1
+        threading.Thread(
+            target=self._produce, args=(key, flight, produce), name="single-flight", daemon=True
+        ).start()
+        return self._replay(flight), False
+
+    def stats(self) -> Dict[str, int]:
+        """Get flight counters: computations started, requests coalesced onto them, and flights running."""
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._flights)}
@@ -0,0 +1,24 @@
+from typing import Optional
+
+import tiktoken
+
+# Constants
+ENCODING_NAME = "cl100k_base"
+
+_encoding: Optional[tiktoken.Encoding] = None
+_encoding_failed = False
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens the way OpenAI chat models do, estimating if the encoding is unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding(ENCODING_NAME)
+        except Exception as e:
+            # tiktoken downloads the encoding on first use; estimate when offline.
+            print(f"Error loading tiktoken encoding, estimating tokens: {str(e)}")
+            _encoding_failed = True
+    if _encoding is None:
+        return max(1, len(text) // 4)
+    return len(_encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+from config import TRACING_CONFIG
+
+_durations: Dict[str, Deque[float]] = {}
+_lock = threading.Lock()
+_pending: Optional["queue.Queue[Dict[str, Any]]"] = None
+_dropped = 0
+
+
+class Trace:
+    """Timing spans for one request through the pipeline.
+
+    Each span records its stage name, start offset and duration in
+    milliseconds plus any attributes (k, filter, cache hits, token counts).
+    ``finish`` adds the trace to the in-process percentile window and, when
+    TRACING_CONFIG["FILE"] is set, queues it for the JSONL log.
+    """
+
+    def __init__(self, corpus: str, query: str):
+        self.request_id = uuid.uuid4().hex
+        self.corpus = corpus
+        self.query = query
+        self.started_at = time.time()
+        self.attributes: Dict[str, Any] = {}
+        self.spans: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._total_ms: Optional[float] = None
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a stage; attributes can be added to the yielded dict before it closes."""
+        start_ms = self._now_ms()
+        try:
+            yield attributes
+        finally:
+            self.spans.append({
+                "name": name,
+                "start_ms": round(start_ms, 3),
+                "duration_ms": round(self._now_ms() - start_ms, 3),
+                **attributes,
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "corpus": self.corpus,
+            "query": self.query,
+            "started_at": self.started_at,
+            "total_ms": round(self._total_ms if self._total_ms is not None else self._now_ms(), 3),
+            **self.attributes,
+            "spans": self.spans,
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Close the trace, log it and return it as a dict."""
+        self._total_ms = self._now_ms()
+        record = self.to_dict()
+        if TRACING_CONFIG["ENABLED"]:
+            _record(record)
+            if TRACING_CONFIG["FILE"]:
+                _enqueue(record)
+        return record
+
+
+def _record(record: Dict[str, Any]) -> None:
+    """Add a finished trace to the rolling per-stage windows."""
+    with _lock:
+        for name, duration in [("total", record["total_ms"])] + [(s["name"], s["duration_ms"]) for s in record["spans"]]:
+            window = _durations.get(name)
+            if window is None:
+                window = _durations[name] = deque(maxlen=TRACING_CONFIG["WINDOW_SIZE"])
+            window.append(duration)
+
+
+def redact(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The trace as logged: the query is replaced by a hash unless LOG_QUERIES is set."""
+    if TRACING_CONFIG["LOG_QUERIES"]:
+        return record
+    digest = hashlib.sha256(record["query"].encode("utf-8")).hexdigest()[:16]
+    return dict(record, query=None, query_hash=digest)
+
+
+def _enqueue(record: Dict[str, Any]) -> None:
+    """Hand a trace to the writer thread; the request never waits on disk."""
+    global _pending, _dropped
+    with _lock:
+        if _pending is None:
+            _pending = queue.Queue(maxsize=TRACING_CONFIG["QUEUE_SIZE"])
+            threading.Thread(target=_writer, args=(_pending,), name="trace-writer", daemon=True).start()
+    try:
+        _pending.put_nowait(redact(record))
+    except queue.Full:
+        with _lock:
+            _dropped += 1
+
+
+def _writer(pending: "queue.Queue[Dict[str, Any]]") -> None:
+    while True:
+        records = [pending.get()]
+        while len(records) < 100:
+            try:
+                records.append(pending.get_nowait())
+            except queue.Empty:
+                break
+        _write(records)
+        for _ in records:
+            pending.task_done()
+
+
+def _rotate(path: str) -> None:
+    """Shift traces.jsonl to traces.jsonl.1 (and .1 to .2, ...), dropping the oldest."""
+    backups = TRACING_CONFIG["BACKUPS"]
+    if backups <= 0:
+        os.remove(path)
+        return
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def _write(records: List[Dict[str, Any]]) -> None:
+    path = TRACING_CONFIG["FILE"]
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) >= TRACING_CONFIG["MAX_BYTES"]:
+            _rotate(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+    except Exception as e:
+        print(f"Error writing traces to {path}: {str(e)}")
+
+
+def flush(timeout: float = 5.0) -> int:
+    """Wait for queued traces to reach the log; returns how many were dropped because the queue was full."""
+    deadline = time.monotonic() + timeout
+    while _pending is not None and _pending.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _dropped
+
+
+def _percentile(ordered: List[float], percentile: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))]
+
+
+def summarize(durations: Dict[str, Iterable[float]]) -> Dict[str, Dict[str, float]]:
+    """p50/p95/p99 in milliseconds for each stage."""
+    summary = {}
+    for name, values in durations.items():
+        ordered = sorted(values)
+        if ordered:
+            summary[name] = {
+                "count": len(ordered),
+                "p50_ms": _percentile(ordered, 50),
+                "p95_ms": _percentile(ordered, 95),
+                "p99_ms": _percentile(ordered, 99),
+            }
+    return summary
+
+
+def stage_percentiles() -> Dict[str, Dict[str, float]]:
+    """Percentiles per stage over the most recent traces in this process."""
+    with _lock:
+        snapshot = {name: list(window) for name, window in _durations.items()}
+    return summarize(snapshot)
+
+
+def trace_rows(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a trace into one display row per span."""
+    rows = []
+    for span in trace["spans"]:
+        details = {key: value for key, value in span.items() if key not in ("name", "start_ms", "duration_ms")}
+        rows.append({
+            "stage": span["name"],
+            "ms": round(span["duration_ms"], 1),
+            "details": ", ".join(f"{key}={value}" for key, value in details.items()),
+        })
+    return rows
+
+
+def percentile_rows() -> List[Dict[str, Any]]:
+    """One display row of p50/p95/p99 per stage over recent traces."""
+    return [
+        {"stage": name, "n": stats["count"], "p50": round(stats["p50_ms"], 1),
+         "p95": round(stats["p95_ms"], 1), "p99": round(stats["p99_ms"], 1)}
+        for name, stats in stage_percentiles().items()
+    ]
+
+
+def load_traces(path: str) -> Iterator[Dict[str, Any]]:
+    """Read traces back from a JSONL log."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    # Aggregate a trace log: python -m backend.tracing [traces.jsonl]
+    path = sys.argv[1] if len(sys.argv) > 1 else TRACING_CONFIG["FILE"]
+    if not path:
+        sys.exit("No trace log: pass a path, or set TRACING_FILE so the app writes one.")
+    durations: Dict[str, List[float]] = {}
+    for trace in load_traces(path):
+        durations.setdefault("total", []).append(trace["total_ms"])
+        for span in trace["spans"]:
+            durations.setdefault(span["name"], []).append(span["duration_ms"])
+    for name, stats in summarize(durations).items():
+        print(f"{name:<14} n={stats['count']:<6} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  p99 {stats['p99_ms']:9.2f} ms")
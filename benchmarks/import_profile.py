@@ -0,0 +1,88 @@
+"""Import-time profile of each Streamlit page and the backend it loads.
+
+Each page is executed in a fresh interpreter under ``python -X importtime``
+with the background prewarm disabled, so the numbers are what the page's
+first paint waits for. The backend modules are profiled separately; that is
+the cost the prewarm thread pays while the user is typing.
+
+    python -m benchmarks.import_profile [--top 10] [--output import_profile.json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Constants
+PAGES = {
+    "main.py": "backend.core",
+    "pages/proj2025.py": "backend.projcore",
+    "pages/federated.py": "backend.federated",
+}
+
+PAGE_SCRIPT = """
+import runpy, time
+import backend.lazy
+backend.lazy.prewarm = lambda module_name: None
+start = time.perf_counter()
+runpy.run_path({page!r}, run_name="__main__")
+print("SCRIPT_SECONDS", time.perf_counter() - start)
+"""
+
+
+def _profile(code: str) -> Dict[str, Any]:
+    """Run code in a fresh interpreter and parse its -X importtime report."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    imports: List[Dict[str, Any]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # top-level imports only; nested ones are inside their cumulative time
+            imports.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    script_seconds = None
+    for line in completed.stdout.splitlines():
+        if line.startswith("SCRIPT_SECONDS"):
+            script_seconds = float(line.split()[1])
+    errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+    return {
+        "error": errors[-1] if completed.returncode and errors else None,
+        "import_ms": sum(entry["cumulative_ms"] for entry in imports),
+        "script_ms": script_seconds * 1000 if script_seconds is not None else None,
+        "imports": sorted(imports, key=lambda entry: entry["cumulative_ms"], reverse=True),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time profile of each Streamlit page.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per page")
+    parser.add_argument("--output", help="Also write the full profile to this JSON file")
+    args = parser.parse_args()
+
+    report = {}
+    for page, backend_module in PAGES.items():
+        report[page] = {
+            "page": _profile(PAGE_SCRIPT.format(page=page)),
+            "backend": _profile(f"import {backend_module}"),
+            "backend_module": backend_module,
+        }
+
+    for page, profile in report.items():
+        first_paint, backend = profile["page"], profile["backend"]
+        print(f"\n{page}")
+        if first_paint["error"]:
+            print(f"  page failed: {first_paint['error']}")
+        else:
+            print(f"  first paint: {first_paint['script_ms']:.0f} ms script, {first_paint['import_ms']:.0f} ms of imports")
+        for entry in first_paint["imports"][:args.top]:
+            print(f"    {entry['cumulative_ms']:9.1f} ms  {entry['module']}")
+        print(f"  prewarmed in background: {profile['backend_module']} {backend['import_ms']:.0f} ms of imports"
+              + (f" (failed: {backend['error']})" if backend["error"] else ""))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Offline per-stage benchmarks for the executive order and Project 2025 pipelines.
+
+Every external service is replaced by a deterministic stand-in (see
+benchmarks/standins.py), so runs need no API keys or network and are
+comparable between commits:
+
+    python -m benchmarks.run                      # time and compare to the baseline
+    python -m benchmarks.run --update-baseline    # record a new baseline
+
+Exits non-zero when a stage's median regresses past the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from config import (
+    ANSWER_CACHE_CONFIG, CATALOG_CONFIG, CONDENSE_CONFIG, DIGEST_CONFIG, EMBEDDING_CACHE_CONFIG, HYBRID_CONFIG,
+    ORDER_CACHE_CONFIG, SCHEDULER_CONFIG, TRACING_CONFIG,
+)
+
+from benchmarks.standins import (
+    HashEmbeddings,
+    SimulatedChatModel,
+    build_vectorstore,
+    register_vendored_prompts,
+    synthetic_corpus,
+)
+from backend import core, projcore, registry, tracing
+from backend.condense import clear_condense_cache
+from backend.context import assemble_context
+from backend.embedding_cache import CachedEmbeddings
+from backend.lexical_index import BM25Index
+from backend.pipeline import retrieve
+
+# Constants
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+CORPORA = {"eo": core, "proj2025": projcore}
+QUERIES = {
+    "eo": [
+        "What are the key points of Executive Order 13905?",
+        "Based on President Biden's executive orders, what is his position on immigration?",
+        "What do the orders say about tariffs and reciprocal trade?",
+        "How do the orders direct federal agencies on artificial intelligence?",
+    ],
+    "proj2025": [
+        "Which proposals could affect the balance of power between the federal government and states?",
+        "What does Project 2025 propose for the Department of Education?",
+        "How would the proposals change immigration enforcement?",
+        "What is proposed for federal workforce regulation?",
+    ],
+}
+HISTORY = [
+    ("human", "What does the administration say about border security?"),
+    ("ai", "The orders direct the Department of Homeland Security to expand enforcement at the border."),
+]
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Millisecond summary statistics for a list of second timings."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "min_ms": min(samples) * 1000,
+    }
+
+
+def _timed(timings: Dict[str, List[float]], stage: str, fn: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = fn()
+    timings.setdefault(stage, []).append(time.perf_counter() - start)
+    return result
+
+
+def install_standins(args: argparse.Namespace, workdir: str) -> None:
+    """Point the registry and config at the local stand-ins."""
+    # Caches would turn repeated iterations into cache hits; the benchmark times the uncached path.
+    ANSWER_CACHE_CONFIG["ENABLED"] = False
+    EMBEDDING_CACHE_CONFIG["ENABLED"] = False
+    ORDER_CACHE_CONFIG["ENABLED"] = False
+    DIGEST_CONFIG["ENABLED"] = False
+    # A catalog built for the real index would narrow filters to orders the synthetic corpus doesn't have.
+    CATALOG_CONFIG["ENABLED"] = False
+    # The stand-ins have no quota; admission control would only add OpenAI-shaped waits.
+    SCHEDULER_CONFIG["ENABLED"] = False
+    HYBRID_CONFIG["INDEX_DIR"] = os.path.join(workdir, "lexical")
+    TRACING_CONFIG["FILE"] = os.path.join(workdir, "traces.jsonl")
+    DIGEST_CONFIG["DIR"] = os.path.join(workdir, "digests")
+    CATALOG_CONFIG["DIR"] = os.path.join(workdir, "catalog")
+    register_vendored_prompts()
+
+    # The search stage reuses the embed stage's vector from this cache, so stages add up;
+    # bench_corpus clears it before each end-to-end run.
+    embeddings = CachedEmbeddings(HashEmbeddings(args.dimensions), "benchmark")
+    chat = SimulatedChatModel(first_token_seconds=args.latency_ms / 1000, tokens_per_second=args.tokens_per_second)
+    for name, module in CORPORA.items():
+        corpus = module.CORPUS
+        documents = synthetic_corpus(name, args.orders, args.chunks_per_order)
+        registry.set_component(("embeddings", corpus["embedding_model"]), embeddings)
+        registry.set_component(
+            ("vectorstore", corpus["index_name"], corpus["embedding_model"]), build_vectorstore(documents, embeddings)
+        )
+        if not args.dense_only:
+            BM25Index.build(registry.lexical_index_path(corpus["index_name"]), documents)
+    registry.set_component(("chat", None, 0), chat)
+    registry.set_component(("chat", CONDENSE_CONFIG["MODEL"], 0), chat)
+
+
+def bench_corpus(name: str, args: argparse.Namespace, workdir: str) -> Dict[str, Dict[str, float]]:
+    """Time every pipeline stage for one corpus over all of its queries."""
+    module = CORPORA[name]
+    corpus = module.CORPUS
+    timings: Dict[str, List[float]] = {}
+    for _ in range(args.iterations):
+        registry.clear_registry()
+        install_standins(args, workdir)
+        _timed(timings, "setup", module.warm_up)
+
+        for query in QUERIES[name]:
+            metadata_filter = None
+            if name == "eo":
+                metadata_filter = _timed(timings, "filter", lambda: core.create_metadata_filters(query))
+            question = _timed(timings, "rephrase", lambda: registry.get_rephrase_chain(model=CONDENSE_CONFIG["MODEL"]).invoke(
+                {"input": query, "chat_history": HISTORY}
+            ))
+            embeddings = registry.get_embeddings(corpus["embedding_model"])
+            _timed(timings, "embed", lambda: embeddings.embed_query(question))
+            documents = _timed(timings, "search", lambda: retrieve(corpus, question, metadata_filter))
+
+            def stuff() -> Dict[str, Any]:
+                packed, _ = assemble_context(documents)
+                chain_input = {"input": query, "chat_history": HISTORY, "context": packed}
+                registry.get_prompt(corpus["prompt_name"]).invoke(
+                    dict(chain_input, context="\n\n".join(doc.page_content for doc in packed))
+                )
+                return chain_input
+
+            chain_input = _timed(timings, "stuff", stuff)
+
+            start = time.perf_counter()
+            first_token = None
+            for _ in registry.get_stuff_chain(corpus["prompt_name"]).stream(chain_input):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+            timings.setdefault("first_token", []).append(first_token or 0.0)
+            timings.setdefault("generate", []).append(time.perf_counter() - start)
+
+            clear_condense_cache()
+            embeddings.clear()
+            _timed(timings, "end_to_end", lambda: module.run_llm(query, HISTORY))
+    return {stage: summarize(samples) for stage, samples in timings.items()}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float) -> List[str]:
+    """List every stage whose median regressed past tolerance (and min_delta_ms) versus the baseline."""
+    regressions = []
+    for name, stages in results["corpora"].items():
+        for stage, stats in stages.items():
+            reference = baseline.get("corpora", {}).get(name, {}).get(stage)
+            if reference is None:
+                continue
+            limit = reference["p50_ms"] * (1 + tolerance)
+            if stats["p50_ms"] > limit and stats["p50_ms"] - reference["p50_ms"] > min_delta_ms:
+                regressions.append(
+                    f"{name}/{stage}: p50 {stats['p50_ms']:.2f} ms > baseline {reference['p50_ms']:.2f} ms "
+                    f"(+{tolerance:.0%} allowed)"
+                )
+    return regressions
+
+
+def _write_json(path: str, payload: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline per-stage pipeline benchmarks.")
+    parser.add_argument("--corpus", choices=sorted(CORPORA), action="append", help="Corpus to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--orders", type=int, default=400, help="Synthetic orders/sections per corpus")
+    parser.add_argument("--chunks-per-order", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=256, help="Stand-in embedding size")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Simulated time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Simulated generation rate")
+    parser.add_argument("--dense-only", action="store_true", help="Benchmark without the BM25 index")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed fractional p50 regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore regressions smaller than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            },
+            "corpora": {name: bench_corpus(name, args, workdir) for name in (args.corpus or sorted(CORPORA))},
+        }
+        # The trace writer would otherwise still be appending to workdir while it is removed.
+        tracing.flush()
+
+    _write_json(args.output, results)
+    for name, stages in results["corpora"].items():
+        print(f"\n{name}")
+        for stage, stats in stages.items():
+            print(f"  {stage:<12} p50 {stats['p50_ms']:9.2f} ms   p95 {stats['p95_ms']:9.2f} ms   n={stats['count']}")
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        _write_json(args.baseline, results)
+        print(f"Baseline updated at {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Deterministic local stand-ins for OpenAI, Pinecone and LangChain Hub."""
+import hashlib
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from backend import prompt_store
+from backend.local_store import LocalVectorStore
+from backend.registry import REPHRASE_PROMPT_NAME
+
+# Constants
+VOCABULARY = (
+    "immigration border asylum tariff trade reciprocal climate energy emissions federal agency "
+    "department secretary policy national security enforcement regulation workforce diversity equity "
+    "constitution authority congress statute funding grant education health veterans defense "
+    "infrastructure artificial intelligence technology privacy review report implementation"
+).split()
+PRESIDENTS = ("Biden", "Trump")
+
+# Close paraphrases of the hub prompts, so prompt sizes and shapes match production.
+VENDORED_PROMPTS = {
+    "tonijwilliams/execorder_prompt": ChatPromptTemplate.from_messages([
+        ("system",
+         "You are an expert on Presidential Executive Orders. Answer the question using only the executive "
+         "order excerpts below. Cite executive order numbers. If asked, include a summary and a sentiment "
+         "analysis. If the excerpts do not contain the answer, say you do not know.\n\n{context}"),
+        MessagesPlaceholder("chat_history", optional=True),
+        ("human", "{input}"),
+    ]),
+    "tonijwilliams/project2025": ChatPromptTemplate.from_messages([
+        ("system",
+         "You are an expert on the Project 2025 Mandate for Leadership. Answer the question using only the "
+         "excerpts below and name the section each point comes from. If the excerpts do not contain the "
+         "answer, say you do not know.\n\n{context}"),
+        MessagesPlaceholder("chat_history", optional=True),
+        ("human", "{input}"),
+    ]),
+    REPHRASE_PROMPT_NAME: ChatPromptTemplate.from_messages([
+        ("system",
+         "Given the following conversation and a follow up question, rephrase the follow up question to be "
+         "a standalone question."),
+        MessagesPlaceholder("chat_history"),
+        ("human", "Follow up input: {input}\nStandalone question:"),
+    ]),
+}
+
+
+class HashEmbeddings(Embeddings):
+    """Unit vectors seeded from a hash of the text: identical text, identical vector."""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Chat model that replies with a fixed answer at a configurable latency and token rate."""
+
+    response: str = " ".join(["The executive order directs federal agencies to act."] * 8)
+    first_token_seconds: float = 0.02
+    tokens_per_second: float = 400.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated-chat"
+
+    def _tokens(self) -> List[str]:
+        words = self.response.split(" ")
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._tokens()
+        time.sleep(self.first_token_seconds + len(tokens) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_seconds)
+        for token in self._tokens():
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def synthetic_corpus(corpus_name: str, orders: int, chunks_per_order: int, seed: int = 0) -> List[Document]:
+    """Chunks shaped like the real indexes' records, with the metadata the filters use."""
+    rng = random.Random(f"{corpus_name}:{seed}")
+    documents = []
+    for order in range(orders):
+        number = 13900 + order
+        metadata: Dict[str, Any] = (
+            {
+                "executive_order_number": float(number),
+                "president": PRESIDENTS[order % len(PRESIDENTS)],
+                "html_url": f"https://www.federalregister.gov/d/eo-{number}",
+                "Immigration & Border Control": 1 if order % 5 == 0 else 0,
+            }
+            if corpus_name == "eo"
+            else {"section": f"Section {order}"}
+        )
+        for chunk_index in range(chunks_per_order):
+            words = [rng.choice(VOCABULARY) for _ in range(160)]
+            if corpus_name == "eo":
+                words.insert(0, f"Executive Order {number}")
+            documents.append(Document(
+                id=f"eo-{number}#{chunk_index}" if corpus_name == "eo" else f"p2025-{order}#{chunk_index}",
+                page_content=" ".join(words),
+                metadata=dict(metadata, chunk_index=chunk_index),
+            ))
+    return documents
+
+
+def build_vectorstore(documents: List[Document], embeddings: Embeddings) -> LocalVectorStore:
+    """An in-memory LocalVectorStore over documents."""
+    store = LocalVectorStore(embeddings)
+    store.add_documents(documents, ids=[doc.id for doc in documents])
+    return store
+
+
+def register_vendored_prompts() -> None:
+    """Serve the vendored prompts instead of pulling from LangChain Hub."""
+    for name, prompt in VENDORED_PROMPTS.items():
+        prompt_store.register_prompt(name, prompt)
@@ -23,15 +23,160 @@ API_CONFIG = {
     "PINECONE_INDEX": os.getenv("PINECONE_INDEX", "executiveorderscleantxt"),
     "MAX_SOURCES": int(os.getenv("MAX_SOURCES", "3")),
     "TEMPERATURE": float(os.getenv("TEMPERATURE", "0")),
+    "INDEX_VERSION": os.getenv("INDEX_VERSION", "1"),
+    "VECTOR_STORE": os.getenv("VECTOR_STORE", "pinecone"),  # "pinecone" or "local"
+    "LOCAL_INDEX_DIR": os.getenv("LOCAL_INDEX_DIR", "local_indexes"),
+    "REQUEST_TIMEOUT_SECONDS": float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30")),
 }
 
 # Chat Configuration
 CHAT_CONFIG = {
-    "MAX_HISTORY_LENGTH": int(os.getenv("MAX_HISTORY_LENGTH", "10")),
+    "MAX_HISTORY_LENGTH": int(os.getenv("MAX_HISTORY_LENGTH", "10")),  # turns kept verbatim
+    "MAX_HISTORY_TOKENS": int(os.getenv("MAX_HISTORY_TOKENS", "1500")),  # ceiling on history sent to the model
+    "SUMMARY_MAX_WORDS": int(os.getenv("SUMMARY_MAX_WORDS", "150")),
     "PROMPT_PLACEHOLDER": "Enter your prompt here...",
     "TEXT_AREA_HEIGHT": int(os.getenv("TEXT_AREA_HEIGHT", "100")),
 }
 
+# Prompt snapshot store configuration (snapshots are local state, ignored by git)
+PROMPT_CONFIG = {
+    "SNAPSHOT_DIR": os.getenv("PROMPT_SNAPSHOT_DIR", "prompt_snapshots"),
+    "TTL_SECONDS": int(os.getenv("PROMPT_TTL_SECONDS", "86400")),
+    "RETRY_SECONDS": int(os.getenv("PROMPT_RETRY_SECONDS", "300")),  # wait after a failed refresh
+    "OFFLINE": os.getenv("PROMPT_OFFLINE", "false").lower() == "true",
+}
+
+# Query embedding cache configuration
+EMBEDDING_CACHE_CONFIG = {
+    "ENABLED": os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true",
+    "MEMORY_SIZE": int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "2048")),
+    "DIR": os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings"),
+}
+
+# Semantic answer cache configuration
+ANSWER_CACHE_CONFIG = {
+    "ENABLED": os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true",
+    "SIMILARITY_THRESHOLD": float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.97")),
+    "MAX_ENTRIES": int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    "TTL_SECONDS": int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+}
+
+# Query analysis configuration
+QUERY_CONFIG = {
+    # Filter field for signing years. Unless the vectors carry it as a number,
+    # the catalog resolves it from signing dates.
+    "YEAR_FIELD": os.getenv("QUERY_YEAR_FIELD", "signing_year"),
+    "YEAR_ON_VECTORS": os.getenv("QUERY_YEAR_ON_VECTORS", "false").lower() == "true",
+}
+
+# Direct executive order lookup configuration
+ORDER_CACHE_CONFIG = {
+    "ENABLED": os.getenv("ORDER_CACHE_ENABLED", "true").lower() == "true",
+    "DIR": os.getenv("ORDER_CACHE_DIR", ".cache/orders"),
+}
+
+# Precomputed per-order digest (summary, sentiment, key points) configuration
+DIGEST_CONFIG = {
+    "ENABLED": os.getenv("DIGESTS_ENABLED", "true").lower() == "true",
+    "DIR": os.getenv("DIGEST_DIR", ".cache/digests"),
+    "MODEL": os.getenv("DIGEST_MODEL") or None,  # None uses the default chat model
+    "CONTEXT_TOKENS": int(os.getenv("DIGEST_CONTEXT_TOKENS", "6000")),  # order text sent per digest
+    "WORKERS": int(os.getenv("DIGEST_WORKERS", "4")),
+}
+
+# Executive order metadata catalog (SQLite sidecar) configuration
+CATALOG_CONFIG = {
+    "ENABLED": os.getenv("CATALOG_ENABLED", "true").lower() == "true",
+    "DIR": os.getenv("CATALOG_DIR", ".cache/catalog"),
+    # Pinecone searches return ids and scores only; chunks are hydrated from the catalog.
+    "MINIMAL_PAYLOADS": os.getenv("CATALOG_MINIMAL_PAYLOADS", "true").lower() == "true",
+    "MAX_CANDIDATES": int(os.getenv("CATALOG_MAX_CANDIDATES", "10000")),  # Pinecone's limit on $in values
+}
+
+# Hybrid lexical (BM25) + dense retrieval configuration
+HYBRID_CONFIG = {
+    "ENABLED": os.getenv("HYBRID_ENABLED", "true").lower() == "true",
+    "INDEX_DIR": os.getenv("LEXICAL_INDEX_DIR", "lexical_indexes"),
+    "BM25_K1": float(os.getenv("BM25_K1", "1.2")),
+    "BM25_B": float(os.getenv("BM25_B", "0.75")),
+    "RRF_K": int(os.getenv("HYBRID_RRF_K", "60")),
+    # Queries whose exact tokens (EO numbers, legal citations) all hit the
+    # lexical index get this many matching BM25 chunks fused in ahead of the rest.
+    "EXACT_MATCH_K": int(os.getenv("HYBRID_EXACT_MATCH_K", "4")),
+}
+
+# Context assembly (dedup, MMR and token budget) configuration
+CONTEXT_CONFIG = {
+    "ENABLED": os.getenv("CONTEXT_ASSEMBLY_ENABLED", "true").lower() == "true",
+    "TOKEN_BUDGET": int(os.getenv("CONTEXT_TOKEN_BUDGET", "2500")),
+    "MMR_LAMBDA": float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7")),  # 1.0 = pure relevance, 0.0 = pure diversity
+}
+
+# Per-request tracing configuration
+TRACING_CONFIG = {
+    "ENABLED": os.getenv("TRACING_ENABLED", "true").lower() == "true",
+    "FILE": os.getenv("TRACING_FILE", ""),  # JSONL trace log, e.g. .cache/traces.jsonl; empty keeps traces in memory only
+    "LOG_QUERIES": os.getenv("TRACING_LOG_QUERIES", "false").lower() == "true",  # else the log holds a hash of each query
+    "MAX_BYTES": int(os.getenv("TRACING_MAX_BYTES", str(10 * 1024 * 1024))),  # rotate the log past this size
+    "BACKUPS": int(os.getenv("TRACING_BACKUPS", "3")),  # rotated logs kept (traces.jsonl.1, .2, ...)
+    "QUEUE_SIZE": int(os.getenv("TRACING_QUEUE_SIZE", "1000")),  # traces waiting to be written before new ones are dropped
+    "WINDOW_SIZE": int(os.getenv("TRACING_WINDOW_SIZE", "1000")),  # traces kept for in-process percentiles
+}
+
+# Coalescing of identical in-flight questions across sessions
+SINGLE_FLIGHT_CONFIG = {
+    "ENABLED": os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true",
+}
+
+# OpenAI admission control: shared request/token budgets and retry policy
+SCHEDULER_CONFIG = {
+    "ENABLED": os.getenv("SCHEDULER_ENABLED", "true").lower() == "true",
+    "REQUESTS_PER_MINUTE": float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500")),  # 0 = unlimited
+    "TOKENS_PER_MINUTE": float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000")),  # 0 = unlimited
+    "MAX_QUEUE": int(os.getenv("SCHEDULER_MAX_QUEUE", "100")),
+    "EXPECTED_OUTPUT_TOKENS": int(os.getenv("SCHEDULER_EXPECTED_OUTPUT_TOKENS", "500")),  # reserved per answer
+    "MAX_RETRIES": int(os.getenv("SCHEDULER_MAX_RETRIES", "3")),  # retries after a 429
+    "BACKOFF_SECONDS": float(os.getenv("SCHEDULER_BACKOFF_SECONDS", "1")),
+    "MAX_BACKOFF_SECONDS": float(os.getenv("SCHEDULER_MAX_BACKOFF_SECONDS", "30")),
+    "POSITION_INTERVAL_SECONDS": float(os.getenv("SCHEDULER_POSITION_INTERVAL_SECONDS", "0.5")),
+}
+
+# Headless HTTP API configuration
+SERVICE_CONFIG = {
+    "MAX_CONCURRENCY": int(os.getenv("SERVICE_MAX_CONCURRENCY", "16")),  # pipelines running at once per process
+    "BATCH_CONCURRENCY": int(os.getenv("SERVICE_BATCH_CONCURRENCY", "4")),  # per batch request
+    "MAX_BATCH_SIZE": int(os.getenv("SERVICE_MAX_BATCH_SIZE", "100")),
+}
+
+# Bulk question runner configuration
+BULK_CONFIG = {
+    "WORKERS": int(os.getenv("BULK_WORKERS", "8")),
+    "EMBED_BATCH_SIZE": int(os.getenv("BULK_EMBED_BATCH_SIZE", "256")),
+}
+
+# Question condensation (history-aware rephrase) configuration
+CONDENSE_CONFIG = {
+    "MODEL": os.getenv("CONDENSE_MODEL") or None,  # None uses the default chat model
+    "CACHE_SIZE": int(os.getenv("CONDENSE_CACHE_SIZE", "1024")),
+}
+
+# Federated (executive orders + Project 2025) retrieval configuration
+FEDERATED_CONFIG = {
+    "CONTEXT_TOKEN_BUDGET": int(os.getenv("FEDERATED_CONTEXT_TOKEN_BUDGET", "6000")),
+    "EST_CHUNK_TOKENS": int(os.getenv("FEDERATED_EST_CHUNK_TOKENS", "250")),
+    "RRF_K": int(os.getenv("FEDERATED_RRF_K", "60")),
+}
+
+# Ingestion pipeline configuration
+INGEST_CONFIG = {
+    "CHUNK_SIZE": int(os.getenv("INGEST_CHUNK_SIZE", "1000")),
+    "CHUNK_OVERLAP": int(os.getenv("INGEST_CHUNK_OVERLAP", "200")),
+    "EMBED_BATCH_SIZE": int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256")),
+    "EMBED_CONCURRENCY": int(os.getenv("INGEST_EMBED_CONCURRENCY", "4")),
+    "FETCH_BATCH_SIZE": int(os.getenv("INGEST_FETCH_BATCH_SIZE", "100")),
+    "CHECKPOINT_DIR": os.getenv("INGEST_CHECKPOINT_DIR", ".cache/ingest"),
+}
+
 # Instructions text
 INSTRUCTIONS_TEXT = """
 This bot helps you understand and analyze Presidential Executive Orders. 
@@ -72,6 +217,23 @@ def get_config() -> Dict[str, Any]:
         "ui": UI_CONFIG,
         "api": API_CONFIG,
         "chat": CHAT_CONFIG,
+        "prompts": PROMPT_CONFIG,
+        "embedding_cache": EMBEDDING_CACHE_CONFIG,
+        "answer_cache": ANSWER_CACHE_CONFIG,
+        "query": QUERY_CONFIG,
+        "order_cache": ORDER_CACHE_CONFIG,
+        "digests": DIGEST_CONFIG,
+        "catalog": CATALOG_CONFIG,
+        "hybrid": HYBRID_CONFIG,
+        "context": CONTEXT_CONFIG,
+        "tracing": TRACING_CONFIG,
+        "single_flight": SINGLE_FLIGHT_CONFIG,
+        "scheduler": SCHEDULER_CONFIG,
+        "service": SERVICE_CONFIG,
+        "bulk": BULK_CONFIG,
+        "condense": CONDENSE_CONFIG,
+        "federated": FEDERATED_CONFIG,
+        "ingest": INGEST_CONFIG,
         "instructions": INSTRUCTIONS_TEXT,
         "dev_info": DEV_INFO
     } 
\ No newline at end of file
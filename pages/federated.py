@@ -0,0 +1,269 @@
+import streamlit as st
+from config import get_config
+from backend import lazy
+from backend.history import ChatHistory
+from typing import List, Dict, Any, Tuple
+
+# Get configuration
+config = get_config()
+
+# Cross-corpus specific instructions
+INSTRUCTIONS_TEXT = """
+This bot answers questions that span both Project 2025 and Presidential Executive Orders in a single pass. 
+Here's how to use it:
+
+1. **Type your question** comparing Project 2025 proposals with executive orders in the prompt box.
+2. Click Submit or "Cntrl + Enter" to get an AI-generated response
+
+**Examples of questions you can ask:**
+* Implementation
+    * Which Project 2025 proposals have been implemented by executive orders?
+    * Which executive orders on immigration follow Project 2025 recommendations?
+* Federal structure
+    * Which Project 2025 proposals and executive orders affect the balance of power between the federal government and states?
+"""
+
+# Set page config
+st.set_page_config(
+    page_title="Project 2025 vs Executive Orders",
+    page_icon="⚖️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+BACKEND_MODULE = "backend.federated"
+
+# Import and warm the backend on a background thread so the page paints without waiting for it.
+lazy.prewarm(BACKEND_MODULE)
+
+# Helper Functions
+def format_source_documents(source_documents: List[Dict]) -> str:
+    """Formats the source documents into a readable string, ensuring only unique sources are included."""
+    if not source_documents:
+        return ""
+
+    sources_string = "Sources:\n\n"
+    unique_urls = set()
+    count = 0
+    for doc in source_documents:
+        if count >= config["api"]["MAX_SOURCES"]:
+            break
+        url = doc.metadata.get('html_url', None)
+        if url and url not in unique_urls:
+            unique_urls.add(url)
+            sources_string += f"--- Source ---\n"
+            sources_string += f"URL: {url}\n"
+            # Convert executive order number to string and remove decimal places
+            eo_number = doc.metadata.get('executive_order_number', 'N/A')
+            if isinstance(eo_number, float):
+                eo_number = str(int(eo_number))
+            sources_string += f"Executive Order Number: {eo_number}\n"
+            # Catalog-hydrated sources also carry the order's title and signing date
+            if doc.metadata.get('title'):
+                sources_string += f"Title: {doc.metadata['title']}\n"
+            if doc.metadata.get('signing_date'):
+                sources_string += f"Signed: {doc.metadata['signing_date']}\n"
+            sources_string += "\n"
+            count += 1
+
+    return sources_string if unique_urls else "No unique sources found."
+
+def initialize_session_state() -> None:
+    """Initialize session state variables if they don't exist."""
+    if "federated_chat_answers_history" not in st.session_state:
+        st.session_state["federated_user_prompt_history"] = []
+        st.session_state["federated_chat_answers_history"] = []
+        st.session_state["federated_chat_history"] = ChatHistory()
+
+def clear_chat_history() -> None:
+    """Clear all chat history from session state."""
+    st.session_state["federated_user_prompt_history"] = []
+    st.session_state["federated_chat_answers_history"] = []
+    st.session_state["federated_chat_history"] = ChatHistory()
+    st.rerun()
+
+def display_chat_history() -> None:
+    """Display the chat history in the UI."""
+    if st.session_state["federated_chat_answers_history"]:
+        for generate_response, user_query in zip(st.session_state["federated_chat_answers_history"], st.session_state["federated_user_prompt_history"]):
+            st.chat_message("user").write(user_query)
+            st.chat_message("assistant").write(generate_response)
+
+def handle_chat_submission(prompt: str) -> None:
+    """Stream the answer for a chat submission and update session state."""
+    try:
+        st.chat_message("user").write(prompt)
+        with st.chat_message("assistant"):
+            answer_placeholder = st.empty()
+            sources_placeholder = st.empty()
+            answer_placeholder.markdown("Searching Project 2025 and executive orders...")
+
+            answer = ""
+            generate_response = {}
+            for event in lazy.load(BACKEND_MODULE).stream_llm(query=prompt, chat_history=st.session_state["federated_chat_history"].messages()):
+                if event["type"] == "sources":
+                    sources_placeholder.markdown(format_source_documents(event["source_documents"]))
+                elif event["type"] == "token":
+                    answer += event["text"]
+                    answer_placeholder.markdown(answer + "▌")
+                elif event["type"] == "done":
+                    generate_response = event
+            answer_placeholder.markdown(answer)
+
+        formatted_sources = format_source_documents(generate_response["source_documents"])
+        formatted_response_with_sources = f"{generate_response['result']} \n\n {formatted_sources}"
+
+        st.session_state["federated_user_prompt_history"].append(prompt)
+        st.session_state["federated_chat_answers_history"].append(formatted_response_with_sources)
+        st.session_state["federated_chat_history"].add_turn(prompt, generate_response["result"])
+    except Exception as e:
+        st.error(f"An error occurred while generating the response: {str(e)}")
+        st.stop()
+
+# CSS Styles
+SIDEBAR_CSS = f"""
+    <style>
+    section[data-testid="stSidebar"] {{
+        background-color: {config['ui']['SIDEBAR_BG_COLOR']} !important;
+        color: {config['ui']['TEXT_COLOR']} !important;
+    }}
+    section[data-testid="stSidebar"] * {{
+        color: {config['ui']['TEXT_COLOR']} !important;
+    }}
+    </style>
+"""
+
+MAIN_CSS = """
+    <style>
+    .main {
+        display: flex;
+        flex-direction: column;
+        height: 100vh;
+    }
+    h1, h2, h3, .stMarkdown h1, .stMarkdown h2, .stMarkdown h3 {
+        color: #19253F !important;
+        font-family: 'Georgia', 'Times New Roman', Times, serif !important;
+        font-weight: 600 !important;
+        letter-spacing: -1px;
+    }
+    .stApp {
+        display: flex;
+        flex-direction: column;
+        height: 100vh;
+    }
+    .chat-messages {
+        flex: 1;
+        overflow-y: auto;
+        padding: 1rem;
+        margin-bottom: 0px;
+        margin-top: 0.5rem !important;
+    }
+    .input-form {
+        position: fixed;
+        bottom: 0;
+        left: 0;
+        right: 0;
+        background: white;
+        padding: 0;
+        border-top: 1px solid #e0e0e0;
+        z-index: 100;
+    }
+    .stTextInput > div > div > textarea {
+        min-height: 100px !important;
+        resize: vertical !important;
+    }
+    .main-flex {
+        display: flex;
+        flex-direction: column;
+        align-items: flex-start;
+        gap: 0.5rem;
+        margin-top: 1.5rem;
+    }
+    .input-row {
+        display: flex;
+        flex-direction: row;
+        align-items: flex-end;
+        gap: 1rem;
+        width: 100%;
+    }
+    .input-row textarea {
+        flex: 4;
+        min-height: 100px;
+        resize: vertical;
+    }
+    .input-row .submit-btn {
+        flex: 1;
+        height: 40px;
+        align-self: flex-end;
+    }
+    </style>
+"""
+
+@st.cache_data
+def static_markup() -> Tuple[str, str]:
+    """The page CSS and sidebar text, built once per server process and shared by every session."""
+    sidebar = (
+        f"---\n\n## Instructions\n\n{INSTRUCTIONS_TEXT}\n\n"
+        f"---\n\n## Developer Information\n\n{config['dev_info']}"
+    )
+    return SIDEBAR_CSS + MAIN_CSS, sidebar
+
+@st.fragment
+def chat_input(transcript: Any) -> None:
+    """The prompt form. Submitting reruns only this function, which appends the new turn to the transcript."""
+    st.markdown('<div class="input-form main-flex">', unsafe_allow_html=True)
+    with st.form("prompt_form", clear_on_submit=True):
+        st.markdown('<div class="input-row">', unsafe_allow_html=True)
+        prompt = st.text_area(
+            "Prompt",
+            placeholder="Enter your question about Project 2025 and executive orders...",
+            key="prompt_input",
+            height=config["chat"]["TEXT_AREA_HEIGHT"]
+        )
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            submit_button = st.form_submit_button("Submit", type="primary")
+        with col2:
+            clear_button = st.form_submit_button("Clear Chat", type="secondary")
+        st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Handle form submissions
+    if prompt and submit_button:
+        with transcript:
+            handle_chat_submission(prompt)
+
+    if clear_button:
+        clear_chat_history()
+
+# Initialize session state
+initialize_session_state()
+
+page_css, sidebar_markup = static_markup()
+
+# Add sidebar content
+with st.sidebar:
+    # Custom Navigation
+
+    st.page_link("main.py", label="Executive Orders", icon="📋")
+    st.page_link("pages/proj2025.py", label="Project 2025", icon="📚")
+    st.page_link("pages/federated.py", label="Project 2025 vs Executive Orders", icon="⚖️")
+    
+    # Instructions and developer information
+    st.markdown(sidebar_markup)
+
+# Apply CSS
+st.markdown(page_css, unsafe_allow_html=True)
+
+# Main content
+st.title("Project 2025 vs Executive Orders")
+
+# Create the main chat interface. Earlier turns are drawn on full runs only;
+# the chat input fragment draws each new turn into the same container.
+st.markdown('<div class="chat-messages">', unsafe_allow_html=True)
+transcript = st.container()
+with transcript:
+    display_chat_history()
+st.markdown('</div>', unsafe_allow_html=True)
+
+chat_input(transcript)
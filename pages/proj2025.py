@@ -1,7 +1,9 @@
 import streamlit as st
 from config import get_config
-from backend.projcore import run_llm
-from typing import List, Dict, Any
+from backend import lazy
+from backend.history import ChatHistory
+from backend.tracing import percentile_rows, trace_rows
+from typing import List, Dict, Any, Tuple
 
 # Get configuration
 config = get_config()
@@ -36,6 +38,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+BACKEND_MODULE = "backend.projcore"
+
+# Import and warm the backend on a background thread so the page paints without waiting for it.
+lazy.prewarm(BACKEND_MODULE)
+
 # Helper Functions
 def format_source_documents(source_documents: List[Dict]) -> str:
     """Formats the source documents into a readable string, ensuring only unique sources are included."""
@@ -62,13 +69,13 @@ def initialize_session_state() -> None:
     if "proj2025_chat_answers_history" not in st.session_state:
         st.session_state["proj2025_user_prompt_history"] = []
         st.session_state["proj2025_chat_answers_history"] = []
-        st.session_state["proj2025_chat_history"] = []
+        st.session_state["proj2025_chat_history"] = ChatHistory()
 
 def clear_chat_history() -> None:
     """Clear all chat history from session state."""
     st.session_state["proj2025_user_prompt_history"] = []
     st.session_state["proj2025_chat_answers_history"] = []
-    st.session_state["proj2025_chat_history"] = []
+    st.session_state["proj2025_chat_history"] = ChatHistory()
     st.rerun()
 
 def display_chat_history() -> None:
@@ -79,23 +86,49 @@ def display_chat_history() -> None:
             st.chat_message("assistant").write(generate_response)
 
 def handle_chat_submission(prompt: str) -> None:
-    """Handle the chat submission and update session state."""
+    """Stream the answer for a chat submission and update session state."""
     try:
-        with st.spinner("Generating response..."):
-            generate_response = run_llm(query=prompt, chat_history=st.session_state["proj2025_chat_history"])
-            # formatted_sources = format_source_documents(generate_response["source_documents"])
-            formatted_response_with_sources = f"{generate_response['result']}"
-
-            st.session_state["proj2025_user_prompt_history"].append(prompt)
-            st.session_state["proj2025_chat_answers_history"].append(formatted_response_with_sources)
-            st.session_state["proj2025_chat_history"].append(("human", prompt))
-            st.session_state["proj2025_chat_history"].append(("ai", generate_response["result"]))
-            
-            st.rerun()
+        st.chat_message("user").write(prompt)
+        with st.chat_message("assistant"):
+            answer_placeholder = st.empty()
+            answer_placeholder.markdown("Searching Project 2025...")
+
+            answer = ""
+            generate_response = {}
+            for event in lazy.load(BACKEND_MODULE).stream_llm(query=prompt, chat_history=st.session_state["proj2025_chat_history"].messages()):
+                if event["type"] == "queued":
+                    answer_placeholder.markdown(f"Many questions are being answered right now; you are number {event['position']} in line...")
+                elif event["type"] == "token":
+                    answer += event["text"]
+                    answer_placeholder.markdown(answer + "▌")
+                elif event["type"] == "done":
+                    generate_response = event
+            answer_placeholder.markdown(answer)
+
+        # formatted_sources = format_source_documents(generate_response["source_documents"])
+        formatted_response_with_sources = f"{generate_response['result']}"
+
+        st.session_state["proj2025_user_prompt_history"].append(prompt)
+        st.session_state["proj2025_chat_answers_history"].append(formatted_response_with_sources)
+        st.session_state["proj2025_chat_history"].add_turn(prompt, generate_response["result"])
+        st.session_state["proj2025_last_trace"] = generate_response.get("trace")
     except Exception as e:
         st.error(f"An error occurred while generating the response: {str(e)}")
         st.stop()
 
+def display_diagnostics() -> None:
+    """Show the stage timing breakdown of the last answer."""
+    st.caption(f"Script runs this session: {st.session_state['proj2025_full_runs']} full, "
+               f"{st.session_state['proj2025_fragment_runs']} chat only")
+    trace = st.session_state.get("proj2025_last_trace")
+    if not trace:
+        st.caption("Ask a question to see its timing breakdown.")
+        return
+    st.caption(f"Last answer: {trace['total_ms']:.0f} ms, route {trace.get('route', 'n/a')}")
+    st.table(trace_rows(trace))
+    st.caption("Recent requests (ms)")
+    st.table(percentile_rows())
+
 # CSS Styles
 SIDEBAR_CSS = f"""
     <style>
@@ -175,9 +208,53 @@ MAIN_CSS = """
     </style>
 """
 
-# Apply CSS
-st.markdown(SIDEBAR_CSS, unsafe_allow_html=True)
-st.markdown(MAIN_CSS, unsafe_allow_html=True)
+@st.cache_data
+def static_markup() -> Tuple[str, str]:
+    """The page CSS and sidebar text, built once per server process and shared by every session."""
+    sidebar = (
+        f"---\n\n## Instructions\n\n{INSTRUCTIONS_TEXT}\n\n"
+        f"---\n\n## Developer Information\n\n{config['dev_info']}\n\n---"
+    )
+    return SIDEBAR_CSS + MAIN_CSS, sidebar
+
+@st.fragment
+def chat_input(transcript: Any, diagnostics_panel: Any) -> None:
+    """The prompt form. Submitting reruns only this function, which appends the new turn to the transcript."""
+    st.session_state["proj2025_fragment_runs"] += 1
+    st.markdown('<div class="input-form main-flex">', unsafe_allow_html=True)
+    with st.form("prompt_form", clear_on_submit=True):
+        st.markdown('<div class="input-row">', unsafe_allow_html=True)
+        prompt = st.text_area(
+            "Prompt",
+            placeholder="Enter your question about Project 2025...",
+            key="prompt_input",
+            height=config["chat"]["TEXT_AREA_HEIGHT"]
+        )
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            submit_button = st.form_submit_button("Submit", type="primary")
+        with col2:
+            clear_button = st.form_submit_button("Clear Chat", type="secondary")
+        st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Handle form submissions
+    if prompt and submit_button:
+        with transcript:
+            handle_chat_submission(prompt)
+        if st.session_state.get("proj2025_show_diagnostics"):
+            with diagnostics_panel.container():
+                display_diagnostics()
+
+    if clear_button:
+        clear_chat_history()
+
+# Initialize session state
+initialize_session_state()
+st.session_state["proj2025_full_runs"] = st.session_state.get("proj2025_full_runs", 0) + 1
+st.session_state.setdefault("proj2025_fragment_runs", 0)
+
+page_css, sidebar_markup = static_markup()
 
 # Add sidebar content
 with st.sidebar:
@@ -185,50 +262,29 @@ with st.sidebar:
 
     st.page_link("main.py", label="Executive Orders", icon="📋")
     st.page_link("pages/proj2025.py", label="Project 2025", icon="📚")
+    st.page_link("pages/federated.py", label="Project 2025 vs Executive Orders", icon="⚖️")
     
-    st.markdown("---")  # Add a separator
-    
-    # Instructions section
-    st.header("Instructions")
-    st.markdown(INSTRUCTIONS_TEXT)
-    
-    # Developer information section
-    st.markdown("---")  # Add a separator
-    st.header("Developer Information")
-    st.markdown(config["dev_info"])
+    # Instructions and developer information
+    st.markdown(sidebar_markup)
+
+    show_diagnostics = st.checkbox("Show diagnostics", key="proj2025_show_diagnostics")
+    diagnostics_panel = st.empty()
+    if show_diagnostics:
+        with diagnostics_panel.container():
+            display_diagnostics()
+
+# Apply CSS
+st.markdown(page_css, unsafe_allow_html=True)
 
 # Main content
 st.title("Project 2025 Analyzer")
 
-# Initialize session state
-initialize_session_state()
-
-# Create the main chat interface
+# Create the main chat interface. Earlier turns are drawn on full runs only;
+# the chat input fragment draws each new turn into the same container.
 st.markdown('<div class="chat-messages">', unsafe_allow_html=True)
-display_chat_history()
+transcript = st.container()
+with transcript:
+    display_chat_history()
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Create the input form
-st.markdown('<div class="input-form main-flex">', unsafe_allow_html=True)
-with st.form("prompt_form", clear_on_submit=True):
-    st.markdown('<div class="input-row">', unsafe_allow_html=True)
-    prompt = st.text_area(
-        "Prompt",
-        placeholder="Enter your question about Project 2025...",
-        key="prompt_input",
-        height=config["chat"]["TEXT_AREA_HEIGHT"]
-    )
-    col1, col2 = st.columns([1, 1])
-    with col1:
-        submit_button = st.form_submit_button("Submit", type="primary")
-    with col2:
-        clear_button = st.form_submit_button("Clear Chat", type="secondary")
-    st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Handle form submissions
-if prompt and submit_button:
-    handle_chat_submission(prompt)
-
-if clear_button:
-    clear_chat_history() 
\ No newline at end of file
+chat_input(transcript, diagnostics_panel)
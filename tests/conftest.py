@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run from anywhere: the backend and config modules live at the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PINECONE_API_KEY", "test")
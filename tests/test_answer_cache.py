@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend import answer_cache
+from backend.answer_cache import AnswerCache
+
+FILTER = {"president": {"$eq": "Biden"}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_near_identical_question_hits():
+    cache = AnswerCache(similarity_threshold=0.99)
+    cache.store("eo", FILTER, [1.0, 0.0], "v1", {"answer": "cached"})
+
+    assert cache.lookup("eo", FILTER, [1.0, 0.01], "v1") == {"answer": "cached"}
+    assert cache.lookup("eo", FILTER, [0.0, 1.0], "v1") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+@pytest.mark.parametrize("corpus, metadata_filter, index_version", [
+    ("project2025", FILTER, "v1"),
+    ("eo", None, "v1"),
+    ("eo", {"president": {"$eq": "Trump"}}, "v1"),
+    ("eo", FILTER, "v2"),
+])
+def test_hits_need_the_same_corpus_filter_and_index_version(corpus, metadata_filter, index_version):
+    cache = AnswerCache()
+    cache.store("eo", FILTER, [1.0, 0.0], "v1", {"answer": "cached"})
+
+    assert cache.lookup(corpus, metadata_filter, [1.0, 0.0], index_version) is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AnswerCache(ttl_seconds=60)
+    cache.store("eo", None, [1.0, 0.0], "v1", {"answer": "cached"})
+
+    clock.value += 60
+    assert cache.lookup("eo", None, [1.0, 0.0], "v1") is not None
+    clock.value += 1
+    assert cache.lookup("eo", None, [1.0, 0.0], "v1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = AnswerCache(max_entries=2)
+    cache.store("eo", None, [1.0, 0.0], "v1", {"answer": "first"})
+    clock.value += 1
+    cache.store("project2025", None, [0.0, 1.0], "v1", {"answer": "second"})
+    clock.value += 1
+    cache.lookup("eo", None, [1.0, 0.0], "v1")
+    clock.value += 1
+    cache.store("eo", None, [0.0, 1.0], "v1", {"answer": "third"})
+
+    assert cache.lookup("eo", None, [1.0, 0.0], "v1") == {"answer": "first"}
+    assert cache.lookup("project2025", None, [0.0, 1.0], "v1") is None
+    assert cache.stats()["size"] == 2
+
+
+def test_invalidate_drops_one_corpus():
+    cache = AnswerCache()
+    cache.store("eo", None, [1.0, 0.0], "v1", {"answer": "eo"})
+    cache.store("project2025", None, [1.0, 0.0], "v1", {"answer": "p2025"})
+
+    cache.invalidate("eo")
+
+    assert cache.lookup("eo", None, [1.0, 0.0], "v1") is None
+    assert cache.lookup("project2025", None, [1.0, 0.0], "v1") == {"answer": "p2025"}
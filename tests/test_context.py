@@ -0,0 +1,58 @@
+from langchain_core.documents import Document
+
+from backend import context
+from backend.context import assemble_context, dedupe, merge_by_source, mmr_order
+
+
+def _chunk(number: int, index: int, text: str) -> Document:
+    return Document(
+        id=f"eo-{number}#{index}",
+        page_content=text,
+        metadata={"executive_order_number": number, "chunk_index": index, "html_url": f"https://example.gov/eo/{number}"},
+    )
+
+
+def test_dedupe_keeps_the_best_ranked_copy():
+    documents = [_chunk(1, 0, "same text"), _chunk(2, 0, "other"), _chunk(3, 4, "same text")]
+
+    assert [doc.id for doc in dedupe(documents)] == ["eo-1#0", "eo-2#0"]
+
+
+def test_mmr_moves_redundant_chunks_down():
+    documents = [
+        _chunk(1, 0, "tariffs on steel imports from china"),
+        _chunk(1, 1, "tariffs on steel imports from china and mexico"),
+        _chunk(2, 0, "asylum processing at the southern border"),
+    ]
+
+    assert [doc.id for doc in mmr_order(documents, mmr_lambda=0.5)] == ["eo-1#0", "eo-2#0", "eo-1#1"]
+    assert [doc.id for doc in mmr_order(documents, mmr_lambda=1.0)] == ["eo-1#0", "eo-1#1", "eo-2#0"]
+
+
+def test_adjacent_chunks_merge_without_their_overlap():
+    documents = [_chunk(7, 1, "overlap and the end."), _chunk(7, 0, "The start with overlap"), _chunk(7, 3, "Later.")]
+
+    (merged,) = merge_by_source(documents)
+
+    assert merged.page_content == "The start with overlap and the end.\n...\nLater."
+    assert merged.id == "eo-7#0"
+
+
+def test_packing_respects_the_budget_but_keeps_the_top_chunk(monkeypatch):
+    monkeypatch.setattr(context, "count_tokens", lambda text: len(text.split()))
+    documents = [
+        _chunk(1, 0, "one two three four five six"),
+        _chunk(2, 0, "alpha beta gamma"),
+        _chunk(3, 0, "delta epsilon"),
+    ]
+
+    packed, stats = assemble_context(documents, token_budget=5, mmr_lambda=1.0)
+    assert [doc.id for doc in packed] == ["eo-1#0"]
+
+    packed, stats = assemble_context(documents, token_budget=11, mmr_lambda=1.0)
+    assert [doc.id for doc in packed] == ["eo-1#0", "eo-2#0", "eo-3#0"]
+    assert stats == {"chunks_retrieved": 3, "chunks_used": 3, "tokens_retrieved": 11, "tokens_used": 11, "tokens_saved": 0}
+
+    packed, stats = assemble_context(documents, token_budget=8, mmr_lambda=1.0)
+    assert [doc.id for doc in packed] == ["eo-1#0", "eo-3#0"]
+    assert stats["tokens_saved"] == 3
@@ -0,0 +1,82 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from backend.embedding_cache import CachedEmbeddings, cache_key
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries: List[str] = []
+
+    def embed_query(self, text: str) -> List[float]:
+        self.queries.append(text)
+        return [float(len(text)), 1.0, 0.5]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def test_repeated_query_is_embedded_once():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, "test-model")
+
+    first = cache.embed_query("What does EO 14007 do?")
+    second = cache.embed_query("  what does  eo 14007 DO? ")
+
+    assert first == second
+    assert inner.queries == ["What does EO 14007 do?"]
+    assert cache.stats() == {"hits_memory": 1, "hits_disk": 0, "misses": 1, "size": 1}
+
+
+def test_keys_depend_on_model():
+    assert cache_key("model-a", "question") != cache_key("model-b", "question")
+    assert cache_key("model-a", "Question ") == cache_key("model-a", "question")
+
+
+def test_least_recently_used_query_is_evicted():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, "test-model", max_size=2)
+
+    cache.embed_query("one")
+    cache.embed_query("two")
+    cache.embed_query("one")
+    cache.embed_query("three")
+
+    assert cache.lookup("one") is not None
+    assert cache.lookup("two") is None
+    assert cache.stats()["size"] == 2
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    CachedEmbeddings(CountingEmbeddings(), "test/model", cache_dir=str(tmp_path)).embed_query("persisted")
+
+    inner = CountingEmbeddings()
+    restarted = CachedEmbeddings(inner, "test/model", cache_dir=str(tmp_path))
+
+    assert restarted.embed_query("persisted") == [9.0, 1.0, 0.5]
+    assert inner.queries == []
+    assert restarted.stats()["hits_disk"] == 1
+
+
+def test_clear_forgets_memory_but_keeps_disk(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, "test-model", cache_dir=str(tmp_path))
+    cache.embed_query("kept on disk")
+
+    cache.clear()
+
+    assert cache.stats()["size"] == 0
+    assert cache.embed_query("kept on disk") == [12.0, 1.0, 0.5]
+    assert cache.stats()["hits_disk"] == 1 and inner.queries == ["kept on disk"]
+
+
+def test_documents_are_not_cached():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, "test-model")
+
+    cache.embed_documents(["chunk"])
+    cache.embed_documents(["chunk"])
+
+    assert inner.queries == ["chunk", "chunk"]
+    assert cache.stats()["size"] == 0
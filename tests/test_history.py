@@ -0,0 +1,107 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from backend import history
+from backend.history import ChatHistory
+from config import SCHEDULER_CONFIG
+
+
+class FakeSummaryChain:
+    def __init__(self):
+        self.inputs: List[Dict[str, Any]] = []
+        self.failing = False
+
+    def invoke(self, chain_input: Dict[str, Any]) -> str:
+        self.inputs.append(chain_input)
+        if self.failing:
+            raise RuntimeError("summary model unavailable")
+        return f"{chain_input['summary']} | {chain_input['question']}"
+
+
+@pytest.fixture
+def chain(monkeypatch) -> FakeSummaryChain:
+    chain = FakeSummaryChain()
+    monkeypatch.setattr(history, "_summary_chain", lambda: chain)
+    # One token per word keeps the budgets readable.
+    monkeypatch.setattr(history, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setitem(SCHEDULER_CONFIG, "ENABLED", False)
+    return chain
+
+
+def test_turns_within_limits_are_kept_verbatim(chain):
+    chat = ChatHistory(max_turns=3, max_tokens=100)
+    chat.add_turn("q1", "a1")
+    chat.add_turn("q2", "a2")
+
+    assert chat.messages() == [("human", "q1"), ("ai", "a1"), ("human", "q2"), ("ai", "a2")]
+    assert chain.inputs == []
+
+
+def test_oldest_turns_fold_into_the_summary_one_call_each(chain):
+    chat = ChatHistory(max_turns=2, max_tokens=100)
+    for i in range(1, 5):
+        chat.add_turn(f"q{i}", f"a{i}")
+
+    assert chat.turns == [("q3", "a3"), ("q4", "a4")]
+    assert [chain_input["question"] for chain_input in chain.inputs] == ["q1", "q2"]
+    assert chat.summary == "(none) | q1 | q2"
+    assert chat.messages()[0] == ("system", "Summary of the earlier conversation: (none) | q1 | q2")
+
+
+def test_token_limit_folds_before_turn_limit(chain):
+    chat = ChatHistory(max_turns=10, max_tokens=12)
+    chat.add_turn("first question", "a long answer of six words")
+    chat.add_turn("second question", "a long answer of six words")
+
+    assert len(chat) == 1
+    assert chain.inputs[0]["question"] == "first question"
+
+
+def test_messages_stay_within_the_token_budget(chain):
+    chat = ChatHistory(max_turns=2, max_tokens=10)
+    chat.add_turn("only question", " ".join(["word"] * 50))
+
+    messages = chat.messages()
+
+    assert sum(len(text.split()) for _, text in messages) <= 10
+    assert messages[0] == ("human", "only question")
+
+
+def test_failed_fold_keeps_the_turn_and_retries_on_the_next_add(chain, capsys):
+    chat = ChatHistory(max_turns=2, max_tokens=100)
+    chain.failing = True
+    for i in range(1, 4):
+        chat.add_turn(f"q{i}", f"a{i}")
+
+    assert chat.turns == [("q1", "a1"), ("q2", "a2"), ("q3", "a3")]
+    assert chat.summary == ""
+    assert "summary model unavailable" in capsys.readouterr().out
+
+    chain.failing = False
+    chat.add_turn("q4", "a4")
+
+    assert chat.turns == [("q3", "a3"), ("q4", "a4")]
+    assert chat.summary == "(none) | q1 | q2"
+
+
+def test_unfolded_turns_that_do_not_fit_are_left_out_of_messages(chain):
+    chat = ChatHistory(max_turns=1, max_tokens=8)
+    chain.failing = True
+    chat.add_turn("first question", "first answer")
+    chat.add_turn("second question", "second answer")
+    chat.add_turn("third question", "third answer")
+
+    assert len(chat) == 3
+    assert chat.messages() == [("human", "second question"), ("ai", "second answer"),
+                               ("human", "third question"), ("ai", "third answer")]
+
+
+def test_clear_forgets_turns_and_summary(chain):
+    chat = ChatHistory(max_turns=1, max_tokens=100)
+    chat.add_turn("q1", "a1")
+    chat.add_turn("q2", "a2")
+
+    chat.clear()
+
+    assert len(chat) == 0 and chat.summary == "" and chat.messages() == []
@@ -0,0 +1,58 @@
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.hybrid import HybridRetriever
+from backend.lexical_index import BM25Index
+from backend.local_store import LocalVectorStore
+
+CHUNKS = [
+    Document(id=f"eo-14159#{i}", page_content=f"Executive Order 14159 section {i} on immigration enforcement.",
+             metadata={"executive_order_number": 14159})
+    for i in range(3)
+] + [
+    Document(id="eo-14012#0", page_content="Restoring faith in our legal immigration systems.",
+             metadata={"executive_order_number": 14012}),
+]
+
+
+class CountingStore(LocalVectorStore):
+    def __init__(self):
+        super().__init__(DeterministicFakeEmbedding(size=8))
+        self.searches: List[str] = []
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        self.searches.append(query)
+        return super().similarity_search(query, k=k, filter=filter)
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    BM25Index.build(str(tmp_path), CHUNKS)
+    store = CountingStore()
+    store.add_documents(CHUNKS, ids=[doc.id for doc in CHUNKS])
+    return HybridRetriever(vectorstore=store, lexical_index=BM25Index.load(str(tmp_path)), exact_match_k=4)
+
+
+def test_exact_matches_filling_k_skip_the_dense_search(retriever):
+    retriever.search_kwargs = {"k": 3}
+
+    documents = retriever.invoke("What does EO 14159 require?")
+
+    assert sorted(doc.id for doc in documents) == ["eo-14159#0", "eo-14159#1", "eo-14159#2"]
+    assert retriever.vectorstore.searches == []
+
+
+@pytest.mark.parametrize("query, k", [
+    ("What does EO 14159 require?", 4),
+    ("legal immigration systems", 3),
+])
+def test_dense_search_runs_when_exact_matches_do_not_fill_k(retriever, query, k):
+    retriever.search_kwargs = {"k": k}
+
+    documents = retriever.invoke(query)
+
+    assert retriever.vectorstore.searches == [query]
+    assert len(documents) == k
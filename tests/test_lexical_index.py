@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+from backend.lexical_index import BM25Index, bm25_scores, exact_terms, tokenize
+
+CHUNKS = [
+    Document(id="eo-14007#0", page_content="Establishing the President's Council of Advisors on Science and Technology.",
+             metadata={"executive_order_number": 14007, "president": "Biden"}),
+    Document(id="eo-14012#0", page_content="Restoring faith in our legal immigration systems under 8 U.S.C. 1182.",
+             metadata={"executive_order_number": 14012, "president": "Biden"}),
+    Document(id="eo-14159#0", page_content="Protecting the American people against invasion; immigration enforcement, immigration detention.",
+             metadata={"executive_order_number": 14159, "president": "Trump"}),
+    Document(id="eo-14160#0", page_content="Protecting the meaning and value of American citizenship.",
+             metadata={"executive_order_number": 14160, "president": "Trump"}),
+]
+
+
+@pytest.fixture
+def index(tmp_path) -> BM25Index:
+    assert BM25Index.build(str(tmp_path), CHUNKS) == len(CHUNKS)
+    return BM25Index.load(str(tmp_path))
+
+
+def test_tokenize_collapses_citations_and_drops_stopwords():
+    assert tokenize("The U.S.C. section of 8 CFR 214.2") == ["usc", "section", "8", "cfr", "2142"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What does EO 14159 say?", {"14159"}),
+    ("orders signed in 2021 under 42 U.S.C. 1983", {"42", "usc", "1983"}),
+    ("Pub. L. 117-58 and § 1182", {"pub", "l", "117", "58", "1182"}),
+    ("immigration in 2025", set()),
+])
+def test_exact_terms(query, expected):
+    assert exact_terms(query) == expected
+
+
+def test_search_ranks_by_bm25(index):
+    results = index.search("immigration enforcement", k=2)
+
+    assert [doc.id for doc, _ in results] == ["eo-14159#0", "eo-14012#0"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_search_scores_match_the_in_memory_formula(index):
+    query = "protecting american immigration"
+    scores = bm25_scores(query, [doc.page_content for doc in CHUNKS])
+    expected = {doc.id: score for doc, score in zip(CHUNKS, scores) if score}
+
+    results = index.search(query, k=len(CHUNKS))
+
+    assert {doc.id: score for doc, score in results} == pytest.approx(expected, rel=1e-5)
+
+
+def test_search_applies_metadata_filters(index):
+    results = index.search("immigration", k=4, filter={"president": {"$eq": "Biden"}})
+
+    assert [doc.id for doc, _ in results] == ["eo-14012#0"]
+    assert results[0][0].metadata == CHUNKS[1].metadata
+
+
+def test_unknown_terms_and_missing_index(index, tmp_path):
+    assert index.search("tariffs", k=4) == []
+    assert "immigration" in index and "tariffs" not in index
+    assert BM25Index.load(str(tmp_path / "missing")) is None
+
+
+def test_rebuild_swaps_in_a_new_index(tmp_path):
+    path = str(tmp_path / "index")
+    BM25Index.build(path, CHUNKS)
+    open_index = BM25Index.load(path)
+
+    BM25Index.build(path, CHUNKS[:1])
+    rebuilt = BM25Index.load(path)
+
+    assert [doc.id for doc in rebuilt.documents()] == ["eo-14007#0"]
+    assert rebuilt.search("immigration") == []
+    assert [doc.id for doc, _ in open_index.search("immigration enforcement", k=1)] == ["eo-14159#0"]
+    assert sorted(os.listdir(tmp_path)) == ["index"]
@@ -0,0 +1,84 @@
+from typing import Any, Dict
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.local_store import LocalVectorStore
+
+ORDERS = [
+    ("eo-14001#0", [1.0, 0.0, 0.0], {"executive_order_number": 14001, "president": "Biden", "year": 2021}),
+    ("eo-14002#0", [0.9, 0.1, 0.0], {"executive_order_number": 14002, "president": "Biden", "year": 2022}),
+    ("eo-14150#0", [0.0, 1.0, 0.0], {"executive_order_number": 14150.0, "president": "Trump", "year": 2025}),
+    ("eo-14151#0", [0.0, 0.0, 1.0], {"executive_order_number": 14151, "president": "Trump", "year": 2025}),
+]
+
+
+def _store(path=None) -> LocalVectorStore:
+    store = LocalVectorStore(DeterministicFakeEmbedding(size=3), path)
+    store.add_embeddings(
+        [f"text of {doc_id}" for doc_id, _, _ in ORDERS],
+        [vector for _, vector, _ in ORDERS],
+        [metadata for _, _, metadata in ORDERS],
+        [doc_id for doc_id, _, _ in ORDERS],
+    )
+    return store
+
+
+def _ids(results) -> list:
+    return [doc.id for doc, _ in results]
+
+
+def test_search_ranks_by_cosine_similarity():
+    results = _store().similarity_search_by_vector_with_score([1.0, 0.05, 0.0], k=2)
+
+    assert _ids(results) == ["eo-14001#0", "eo-14002#0"]
+    assert results[0][1] == pytest.approx(0.9988, abs=1e-3)
+
+
+@pytest.mark.parametrize("metadata_filter, expected", [
+    ({"president": {"$eq": "Trump"}}, ["eo-14150#0", "eo-14151#0"]),
+    ({"executive_order_number": {"$in": [14150, 14002]}}, ["eo-14002#0", "eo-14150#0"]),
+    ({"executive_order_number": 14151}, ["eo-14151#0"]),
+    ({"year": {"$gte": 2022, "$lte": 2024}}, ["eo-14002#0"]),
+    ({"president": {"$ne": "Biden"}, "year": {"$lt": 2030}}, ["eo-14150#0", "eo-14151#0"]),
+    ({"president": {"$nin": ["Biden", "Trump"]}}, []),
+])
+def test_filters_restrict_candidates(metadata_filter: Dict[str, Any], expected):
+    results = _store().similarity_search_by_vector_with_score([1.0, 1.0, 1.0], k=10, filter=metadata_filter)
+
+    assert sorted(_ids(results)) == expected
+
+
+def test_upsert_overwrites_in_place():
+    store = _store()
+    store.add_embeddings(["revoked"], [[0.0, 0.0, 1.0]], [{"executive_order_number": 14001, "president": "Trump"}], ["eo-14001#0"])
+
+    assert len(store) == 4
+    assert store.get_by_ids(["eo-14001#0"])[0].page_content == "revoked"
+    assert sorted(doc.id for doc in store.get_by_filter({"president": "Biden"})) == ["eo-14002#0"]
+
+
+def test_delete_removes_rows_and_postings():
+    store = _store()
+
+    assert store.delete(["eo-14150#0", "missing"])
+    assert len(store) == 3
+    assert [doc.id for doc in store.get_by_filter({"president": "Trump"})] == ["eo-14151#0"]
+
+    store.delete(["eo-14151#0"])
+    assert store.field_values("president") == ["Biden"]
+
+
+def test_persist_and_load_round_trip(tmp_path):
+    store = _store(str(tmp_path))
+    store.persist()
+    store.add_embeddings(["new"], [[0.5, 0.5, 0.0]], [{"executive_order_number": 14200, "president": "Trump"}], ["eo-14200#0"])
+    store.add_embeddings(["updated"], [[1.0, 0.0, 0.0]], [{"executive_order_number": 14002, "president": "Biden"}], ["eo-14002#0"])
+    store.persist()
+
+    loaded = LocalVectorStore.load(str(tmp_path), DeterministicFakeEmbedding(size=3))
+
+    assert len(loaded) == 5
+    assert loaded.get_by_ids(["eo-14002#0"])[0].page_content == "updated"
+    assert _ids(loaded.similarity_search_by_vector_with_score([0.5, 0.5, 0.0], k=1)) == ["eo-14200#0"]
+    assert [doc.id for doc in loaded.get_by_filter({"executive_order_number": {"$eq": 14200}})] == ["eo-14200#0"]
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend import order_lookup
+from backend.local_store import LocalVectorStore
+from config import ORDER_CACHE_CONFIG
+
+CORPUS = {"index_name": "test-index", "embedding_model": "test-embedding"}
+# Chunks written by backend.ingest (eo-<n>#<i>) next to ones from an index built elsewhere.
+CHUNKS = [
+    Document(id="eo-14007#0", page_content="14007 part one", metadata={"executive_order_number": 14007.0, "chunk_index": 0}),
+    Document(id="eo-14007#1", page_content="14007 part two", metadata={"executive_order_number": 14007.0, "chunk_index": 1}),
+    Document(id="3f2a9c", page_content="13985 part one", metadata={"executive_order_number": 13985.0, "chunk_index": 0}),
+    Document(id="b71e04", page_content="13985 part two", metadata={"executive_order_number": 13985.0, "chunk_index": 1}),
+]
+
+
+class FakePineconeIndex:
+    """Answers filtered queries over CHUNKS; ids are never listed or fetched."""
+
+    def __init__(self):
+        self.queries: List[Dict[str, Any]] = []
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        return {"dimension": 8}
+
+    def query(self, vector, top_k, filter, include_metadata, namespace=None):
+        self.queries.append({"vector": vector, "filter": filter})
+        number = filter["executive_order_number"]["$eq"]
+        return {"matches": [
+            {"id": doc.id, "score": 0.0, "metadata": dict(doc.metadata, text=doc.page_content)}
+            for doc in CHUNKS if doc.metadata["executive_order_number"] == number
+        ][:top_k]}
+
+
+@pytest.fixture(autouse=True)
+def empty_order_cache(monkeypatch, tmp_path):
+    monkeypatch.setitem(ORDER_CACHE_CONFIG, "DIR", str(tmp_path))
+    monkeypatch.setattr(order_lookup, "_orders", {})
+    monkeypatch.setattr(order_lookup, "_dimensions", {})
+
+
+def _local_store() -> LocalVectorStore:
+    store = LocalVectorStore(DeterministicFakeEmbedding(size=8))
+    store.add_documents(CHUNKS, ids=[doc.id for doc in CHUNKS])
+    return store
+
+
+def _pinecone_store() -> Any:
+    return SimpleNamespace(index=FakePineconeIndex(), _text_key="text", _namespace=None)
+
+
+@pytest.mark.parametrize("make_store", [_local_store, _pinecone_store], ids=["local", "pinecone"])
+@pytest.mark.parametrize("number, ids", [
+    (14007, ["eo-14007#0", "eo-14007#1"]),
+    (13985, ["3f2a9c", "b71e04"]),
+])
+def test_lookup_finds_orders_under_either_id_scheme(monkeypatch, make_store, number, ids):
+    monkeypatch.setattr(order_lookup, "get_vectorstore", lambda *args: make_store())
+
+    documents, route = order_lookup.load_order(CORPUS, number)
+
+    assert route == order_lookup.ROUTE_INDEX_LOOKUP
+    assert [doc.id for doc in documents] == ids
+    assert [doc.page_content for doc in documents] == [f"{number} part one", f"{number} part two"]
+
+
+def test_pinecone_lookup_queries_by_metadata_without_embedding(monkeypatch):
+    store = _pinecone_store()
+    monkeypatch.setattr(order_lookup, "get_vectorstore", lambda *args: store)
+
+    order_lookup.load_order(CORPUS, 13985)
+
+    (query,) = store.index.queries
+    assert query["filter"] == {"executive_order_number": {"$eq": 13985}}
+    assert query["vector"] == [1.0] + [0.0] * 7
+
+
+def test_unknown_order_falls_back_to_vector_search(monkeypatch):
+    monkeypatch.setattr(order_lookup, "get_vectorstore", lambda *args: _pinecone_store())
+
+    assert order_lookup.load_order(CORPUS, 99999) == (None, order_lookup.ROUTE_VECTOR)
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend import prompt_store
+from config import PROMPT_CONFIG
+
+NAME = "test/prompt"
+
+
+class InlineThread:
+    """Runs the refresh on the calling thread so the test can count attempts."""
+
+    def __init__(self, target, args, daemon):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+@pytest.fixture
+def stale_prompt(monkeypatch, tmp_path):
+    clock = SimpleNamespace(value=10_000.0)
+    pulls = []
+
+    def pull(name):
+        pulls.append(name)
+        raise ConnectionError("hub unavailable")
+
+    monkeypatch.setitem(PROMPT_CONFIG, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setitem(PROMPT_CONFIG, "OFFLINE", False)
+    monkeypatch.setitem(PROMPT_CONFIG, "TTL_SECONDS", 60)
+    monkeypatch.setitem(PROMPT_CONFIG, "RETRY_SECONDS", 300)
+    monkeypatch.setattr(prompt_store, "time", SimpleNamespace(time=lambda: clock.value))
+    monkeypatch.setattr(prompt_store, "threading", SimpleNamespace(Thread=InlineThread))
+    monkeypatch.setattr(prompt_store.hub, "pull", pull)
+    monkeypatch.setattr(prompt_store, "_prompts", {})
+    monkeypatch.setattr(prompt_store, "_retry_after", {})
+
+    prompt = ChatPromptTemplate.from_messages([("human", "{question}")])
+    prompt_store.save_snapshot(prompt_store._make_record(NAME, prompt, clock.value - 120))
+    return SimpleNamespace(clock=clock, pulls=pulls)
+
+
+def test_stale_snapshot_is_served_while_the_hub_is_down(stale_prompt):
+    prompt = prompt_store.get_prompt(NAME)
+
+    assert prompt.input_variables == ["question"]
+    assert stale_prompt.pulls == [NAME]
+
+
+def test_failed_refresh_is_not_retried_until_the_retry_delay_passes(stale_prompt):
+    for _ in range(5):
+        prompt_store.get_prompt(NAME)
+    assert stale_prompt.pulls == [NAME]
+
+    stale_prompt.clock.value += 301
+    prompt_store.get_prompt(NAME)
+    assert stale_prompt.pulls == [NAME, NAME]
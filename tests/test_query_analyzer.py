@@ -0,0 +1,71 @@
+import pytest
+
+from backend.query_analyzer import analyze_query
+from config import CATALOG_CONFIG, QUERY_CONFIG
+
+YEAR = QUERY_CONFIG["YEAR_FIELD"]
+
+
+@pytest.fixture(autouse=True)
+def catalog_years(monkeypatch):
+    monkeypatch.setitem(QUERY_CONFIG, "YEAR_ON_VECTORS", False)
+    monkeypatch.setitem(CATALOG_CONFIG, "ENABLED", True)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Summarize executive order 14257", {"executive_order_number": {"$eq": 14257}}),
+    ("Compare executive orders 14148, 14151 and 14173", {"executive_order_number": {"$in": [14148, 14151, 14173]}}),
+    ("EO 13988 or 13988", {"executive_order_number": {"$eq": 13988}}),
+    ("What did Biden and Trump sign?", {"president": {"$in": ["Biden", "Trump"]}}),
+    ("president Bidens stance on immigration", {"president": {"$eq": "Biden"}, "Immigration & Border Control": {"$eq": 1}}),
+    ("Is executive order 14160 unconstitutional?", {"executive_order_number": {"$eq": 14160}, "constitutional_impact": {"$eq": "Y"}}),
+])
+def test_numbers_presidents_and_flags(query, expected):
+    assert analyze_query(query)["filter"] == expected
+
+
+@pytest.mark.parametrize("query, year_range", [
+    ("orders signed in 2022", (2022, 2022)),
+    ("orders signed by Biden between 2021 and 2022", (2021, 2022)),
+    ("orders from 2019 to 2020", (2019, 2020)),
+    ("orders issued 2017-2018", (2017, 2018)),
+    ("orders signed since 2021", (2021, None)),
+    ("orders signed before 2020", (None, 2019)),
+])
+def test_signing_phrases_filter_on_years(query, year_range):
+    analysis = analyze_query(query)
+    expected = {}
+    if year_range[0] is not None:
+        expected["$gte"] = year_range[0]
+    if year_range[1] is not None:
+        expected["$lte"] = year_range[1]
+
+    assert analysis["year_range"] == year_range
+    assert analysis["filter"][YEAR] == expected
+
+
+@pytest.mark.parametrize("query", [
+    "How does Project 2025 treat the 2020 census?",
+    "What changed after 2020 for asylum seekers?",
+    "Summarize executive order 14257",
+])
+def test_bare_years_are_not_filters(query):
+    analysis = analyze_query(query)
+
+    assert analysis["year_range"] is None
+    assert YEAR not in analysis["filter"]
+
+
+def test_years_on_vectors_filter_without_signing_phrase(monkeypatch):
+    monkeypatch.setitem(QUERY_CONFIG, "YEAR_ON_VECTORS", True)
+
+    assert analyze_query("the 2020 census")["filter"] == {YEAR: {"$gte": 2020, "$lte": 2020}}
+
+
+def test_years_need_a_catalog_or_vector_field(monkeypatch):
+    monkeypatch.setitem(CATALOG_CONFIG, "ENABLED", False)
+
+    analysis = analyze_query("orders signed in 2022")
+
+    assert analysis["year_range"] == (2022, 2022)
+    assert analysis["filter"] == {}
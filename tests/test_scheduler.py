@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend import scheduler as scheduler_module
+from backend.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, QueueFullError, Scheduler, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=100.0)
+    monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(60)
+
+    assert bucket.wait_time(10, clock.value) == pytest.approx(10)
+    clock.value += 10
+    assert bucket.available(clock.value) == pytest.approx(10)
+    clock.value += 1000
+    assert bucket.available(clock.value) == pytest.approx(60)
+
+
+def test_oversized_take_waits_for_a_full_bucket_then_goes_into_debt(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(30)
+
+    assert bucket.wait_time(600, clock.value) == pytest.approx(30)
+    clock.value += 30
+    assert bucket.wait_time(600, clock.value) == 0
+    bucket.take(600)
+    assert bucket.available(clock.value) == pytest.approx(-540)
+
+
+def test_zero_rate_is_unlimited(clock):
+    bucket = TokenBucket(per_minute=0)
+    bucket.take(10 ** 9)
+
+    assert bucket.wait_time(10 ** 9, clock.value) == 0
+
+
+def test_head_of_line_blocks_smaller_requests(clock):
+    scheduler = Scheduler(requests_per_minute=600, tokens_per_minute=1000)
+    first = scheduler.submit(1, 900)
+    big = scheduler.submit(1, 500)
+    small = scheduler.submit(1, 10)
+
+    assert first.admitted and not big.admitted and not small.admitted
+    assert scheduler.position(big) == 1 and scheduler.position(small) == 2
+
+    clock.value += 25
+    scheduler.wait(small, timeout=0)
+    assert big.admitted and small.admitted
+
+
+def test_interactive_requests_overtake_batch_ones(clock):
+    scheduler = Scheduler(requests_per_minute=60, tokens_per_minute=0)
+    scheduler.submit(60, 0)
+    batch = scheduler.submit(1, 0, PRIORITY_BATCH)
+    interactive = scheduler.submit(1, 0, PRIORITY_INTERACTIVE)
+
+    assert scheduler.position(interactive) == 1 and scheduler.position(batch) == 2
+
+
+def test_settle_returns_unused_budget(clock):
+    scheduler = Scheduler(requests_per_minute=60, tokens_per_minute=1000)
+    ticket = scheduler.submit(3, 800)
+
+    scheduler.settle(ticket, 1, 300)
+    scheduler.settle(ticket, 0, 0)
+
+    assert scheduler.stats()["requests_available"] == 59
+    assert scheduler.stats()["tokens_available"] == 700
+
+
+def test_cancel_leaves_the_queue_or_returns_the_reservation(clock):
+    scheduler = Scheduler(requests_per_minute=60, tokens_per_minute=1000)
+    admitted = scheduler.submit(1, 1000)
+    waiting = scheduler.submit(1, 1000)
+
+    scheduler.cancel(waiting)
+    scheduler.cancel(admitted)
+
+    assert scheduler.stats()["queued"] == 0
+    assert scheduler.stats()["tokens_available"] == 1000
+
+
+def test_full_queue_rejects(clock):
+    scheduler = Scheduler(requests_per_minute=60, tokens_per_minute=0, max_queue=1)
+    scheduler.submit(60, 0)
+    scheduler.submit(1, 0)
+
+    with pytest.raises(QueueFullError):
+        scheduler.submit(1, 0)
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_backoff_pauses_every_bucket(clock, monkeypatch):
+    monkeypatch.setattr(scheduler_module.random, "uniform", lambda low, high: 0)
+    scheduler = Scheduler(requests_per_minute=60, tokens_per_minute=1000)
+    error = SimpleNamespace(status_code=429, response=SimpleNamespace(headers={"retry-after": "5"}))
+
+    assert scheduler.backoff(error, attempt=0, base_seconds=1, max_seconds=30) == 5
+    ticket = scheduler.submit(1, 1)
+    assert not ticket.admitted
+    clock.value += 6
+    assert scheduler.wait(ticket, timeout=0)
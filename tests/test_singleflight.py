@@ -0,0 +1,178 @@
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from backend import pipeline
+from backend.singleflight import SingleFlight
+from config import SINGLE_FLIGHT_CONFIG
+
+CORPUS = {
+    "name": "test",
+    "index_name": "test-index",
+    "embedding_model": "test-embedding",
+    "prompt_name": "test/prompt",
+    "search_kwargs": {"k": 4},
+}
+CALLERS = 8
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for callers to join")
+        time.sleep(0.001)
+
+
+def _run_concurrently(calls: List[Any]) -> List[Any]:
+    """Run each call on its own thread; results (or raised exceptions) in call order."""
+    results: List[Any] = [None] * len(calls)
+
+    def run(i: int) -> None:
+        try:
+            results[i] = calls[i]()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+# SingleFlight
+
+
+def _gated_producer(release: threading.Event, runs: List[int], fail: bool = False):
+    def produce() -> Iterator[str]:
+        runs.append(1)
+        yield "first"
+        release.wait(5)
+        if fail:
+            raise RuntimeError("backend down")
+        yield "second"
+
+    return produce
+
+
+def test_concurrent_identical_keys_share_one_run():
+    flights, release, runs = SingleFlight(), threading.Event(), []
+    joined = [flights.join("key", _gated_producer(release, runs)) for _ in range(CALLERS)]
+    release.set()
+
+    results = _run_concurrently([lambda events=events: list(events) for events, _ in joined])
+
+    assert len(runs) == 1
+    assert [shared for _, shared in joined].count(False) == 1
+    assert flights.stats() == {"leaders": 1, "coalesced": CALLERS - 1, "in_flight": 0}
+    assert results == [["first", "second"]] * CALLERS
+
+
+def test_leader_exception_reaches_every_follower():
+    flights, release, runs = SingleFlight(), threading.Event(), []
+    joined = [flights.join("key", _gated_producer(release, runs, fail=True)) for _ in range(CALLERS)]
+    release.set()
+
+    results = _run_concurrently([lambda events=events: list(events) for events, _ in joined])
+
+    assert len(runs) == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "backend down" for result in results)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_join_after_completion_starts_a_new_flight():
+    flights, runs = SingleFlight(), []
+    release = threading.Event()
+    release.set()
+
+    first, first_shared = flights.join("key", _gated_producer(release, runs))
+    assert list(first) == ["first", "second"]
+    second, second_shared = flights.join("key", _gated_producer(release, runs))
+    assert list(second) == ["first", "second"]
+
+    assert (first_shared, second_shared) == (False, False)
+    assert len(runs) == 2
+    assert flights.stats() == {"leaders": 2, "coalesced": 0, "in_flight": 0}
+
+
+# stream_pipeline, with the pipeline itself stubbed out
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    """Replace the pipeline run with a stub that holds every run open until released."""
+    release = threading.Event()
+    runs: List[Dict[str, Any]] = []
+
+    def fake_stream_pipeline(corpus, query, chat_history, metadata_filter=None, priority=0, standalone=None):
+        runs.append({"query": query, "chat_history": chat_history, "filter": metadata_filter})
+        number = len(runs)
+        yield {"type": "sources", "source_documents": [], "condense_path": "passthrough"}
+        release.wait(5)
+        yield {"type": "token", "text": f"answer {number}", "condense_path": "passthrough"}
+        yield {
+            "type": "done", "query": query, "result": f"answer {number}", "source_documents": [],
+            "condense_path": "passthrough", "trace": {"request_id": f"run-{number}"},
+        }
+
+    monkeypatch.setattr(pipeline, "_stream_pipeline", fake_stream_pipeline)
+    monkeypatch.setattr(pipeline, "flights", SingleFlight())
+    monkeypatch.setitem(SINGLE_FLIGHT_CONFIG, "ENABLED", True)
+    return release, runs
+
+
+def _stream_concurrently(release: threading.Event, requests: List[Dict[str, Any]], joined) -> List[Any]:
+    """Stream every request on its own thread, letting the runs finish once all have joined a flight."""
+    results: List[Any] = [None] * len(requests)
+
+    def run(i: int) -> None:
+        results[i] = list(pipeline.stream_pipeline(CORPUS, **requests[i]))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    _wait_until(joined)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_identical_questions_coalesce_onto_one_leader(stub_pipeline):
+    release, runs = stub_pipeline
+    requests = [{"query": "What does EO 14007 do?", "chat_history": []} for _ in range(CALLERS)]
+
+    results = _stream_concurrently(release, requests, lambda: pipeline.flights.stats()["coalesced"] == CALLERS - 1)
+
+    assert len(runs) == 1
+    assert pipeline.flights.stats() == {"leaders": 1, "coalesced": CALLERS - 1, "in_flight": 0}
+    done = [events[-1] for events in results]
+    assert {event["result"] for event in done} == {"answer 1"}
+    # Followers get their own trace, pointing at the leader's run.
+    leaders = [event for event in done if event["trace"]["request_id"] == "run-1"]
+    followers = [event for event in done if event["trace"]["request_id"] != "run-1"]
+    assert len(leaders) == 1 and len(followers) == CALLERS - 1
+    assert all(event["trace"]["spans"][0]["leader"] == "run-1" for event in followers)
+
+
+def test_different_history_or_filters_never_coalesce(stub_pipeline):
+    release, runs = stub_pipeline
+    query = "What does it do?"
+    requests = [
+        {"query": query, "chat_history": []},
+        {"query": query, "chat_history": [("human", "Tell me about EO 14007"), ("ai", "It ...")]},
+        {"query": query, "chat_history": [("human", "Tell me about EO 14008"), ("ai", "It ...")]},
+        {"query": query, "chat_history": [], "metadata_filter": {"executive_order_number": {"$eq": 14007}}},
+        {"query": query, "chat_history": [], "metadata_filter": {"executive_order_number": {"$eq": 14008}}},
+        {"query": query, "chat_history": [], "metadata_filter": {"president": {"$eq": "Biden"}}},
+    ]
+
+    results = _stream_concurrently(release, requests, lambda: pipeline.flights.stats()["leaders"] == len(requests))
+
+    assert len(runs) == len(requests)
+    assert pipeline.flights.stats() == {"leaders": len(requests), "coalesced": 0, "in_flight": 0}
+    assert len({events[-1]["result"] for events in results}) == len(requests)